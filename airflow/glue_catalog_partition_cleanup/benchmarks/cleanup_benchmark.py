@@ -0,0 +1,176 @@
+"""
+Synthetic-scale benchmark of the glue_catalog_partition_cleanup task callables against a local
+Glue/S3 stand-in (moto), seeded with tables of several partition layouts.
+
+Needs the Airflow environment of the DAG plus moto:
+    pip install "moto[glue,s3]"
+
+Usage:
+    python benchmarks/cleanup_benchmark.py --partitions 10000 100000 --layouts dt year_month_day
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Callable
+
+# the DAGs folder, so the DAG module and its glue_catalog_partition_cleanup imports resolve
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+BENCHMARK_DIR = tempfile.mkdtemp(prefix='glue_cleanup_benchmark_')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+os.environ['GLUE_CLEANUP_MANIFEST_ROOT'] = os.path.join(BENCHMARK_DIR, 'manifests')
+os.environ['GLUE_CLEANUP_INVENTORY_ROOT'] = os.path.join(BENCHMARK_DIR, 'inventory')
+# moto has no quota, don't let the rate limiter ramp up from the production starting rate
+os.environ.setdefault('GLUE_CLEANUP_API_INITIAL_RATE', '100000')
+os.environ.setdefault('GLUE_CLEANUP_API_MAX_RATE', '100000')
+
+import boto3
+from moto import mock_aws
+
+from glue_catalog_partition_cleanup import glue_catalog_partition_cleanup_dag as cleanup_dag
+
+
+DATABASE = 'benchmark'
+BUCKET = 'benchmark-bucket'
+DATES_SPAN_DAYS = 240  ## partitions dates span, about half of them older than the dev retention (30 + 30 days buffer)
+SEED_BATCH_SIZE = 100  ## BatchCreatePartition limit
+
+# layout name: (partition keys, partition values of a date and a sequence number)
+LAYOUTS: Dict[str, Any] = {
+    'dt': (
+        [('dt', 'string'), ('bucket_id', 'string')],
+        lambda date, i: [date.strftime('%Y-%m-%d'), str(i)],
+    ),
+    'year_month_day': (
+        [('year', 'string'), ('month', 'string'), ('day', 'string'), ('bucket_id', 'string')],
+        lambda date, i: [date.strftime('%Y'), date.strftime('%m'), date.strftime('%d'), str(i)],
+    ),
+    'year_month_day_hour': (
+        [('tile_granularity', 'string'), ('year', 'string'), ('month', 'string'), ('day', 'string'), ('hour', 'string')],
+        lambda date, i: [f'tile_{i}', date.strftime('%Y'), date.strftime('%m'), date.strftime('%d'), f'{i % 24:02d}'],
+    ),
+    'integer_year_month_day': (
+        [('year', 'int'), ('month', 'int'), ('day', 'int'), ('bucket_id', 'string')],
+        lambda date, i: [str(date.year), str(date.month), str(date.day), str(i)],
+    ),
+}
+
+
+def seed_table(glue_client, table: str, layout: str, partitions: int) -> None:
+    """
+    Create a table of `partitions` partitions spread over the last DATES_SPAN_DAYS days.
+    """
+    key_types, make_values = LAYOUTS[layout]
+    glue_client.create_table(
+        DatabaseName=DATABASE,
+        TableInput={
+            'Name': table,
+            'PartitionKeys': [{'Name': name, 'Type': key_type} for name, key_type in key_types],
+            'StorageDescriptor': {'Location': f's3://{BUCKET}/{table}/'},
+        }
+    )
+    today = datetime.now(timezone.utc)
+    batch = []
+    for i in range(partitions):
+        date = today - timedelta(days=i % DATES_SPAN_DAYS)
+        batch.append({'Values': make_values(date, i // DATES_SPAN_DAYS)})
+        if len(batch) == SEED_BATCH_SIZE:
+            glue_client.batch_create_partition(DatabaseName=DATABASE, TableName=table, PartitionInputList=batch)
+            batch = []
+    if batch:
+        glue_client.batch_create_partition(DatabaseName=DATABASE, TableName=table, PartitionInputList=batch)
+
+
+def timed(results: Dict[str, float], name: str, call: Callable[[], Any]) -> Any:
+    started = time.perf_counter()
+    result = call()
+    results[name] = time.perf_counter() - started
+    return result
+
+
+def run_table_benchmark(glue_client, layout: str, partitions: int, scan_segments: int = 1) -> Dict[str, Any]:
+    """
+    Seed a table then run the per-table task callables on it: a full scan and delete run,
+    followed by an incremental one.
+    """
+    table = f'{layout}_{partitions}'
+    seed_started = time.perf_counter()
+    seed_table(glue_client, table, layout, partitions)
+    seed_seconds = time.perf_counter() - seed_started
+
+    seconds: Dict[str, float] = {}
+    table_config = {'database': DATABASE, 'table': table, 'scan_segments': scan_segments}
+    table_details = timed(seconds, 'get_table_details', lambda: cleanup_dag.get_table_details(
+        table_configs=[{'table_config': table_config}])[0])
+    table_details = timed(seconds, 'get_max_retention_for_table', lambda: cleanup_dag.get_max_retention_for_table(**table_details))
+
+    # the callables update table_info in place, XCom would hand every task its own copy
+    full_context = {'run_id': f'benchmark_full_{table}', 'dag_run': None}
+    listed = timed(seconds, 'list_old_partitions', lambda: cleanup_dag.list_old_partitions(**copy.deepcopy(table_details), **full_context))
+    deleted = timed(seconds, 'delete_stale_partitions', lambda: cleanup_dag.delete_stale_partitions(**listed, **full_context))
+
+    incremental_context = {'run_id': f'benchmark_incremental_{table}', 'dag_run': None}
+    incremental = timed(seconds, 'list_old_partitions_incremental',
+                        lambda: cleanup_dag.list_old_partitions(**copy.deepcopy(table_details), **incremental_context))
+
+    table_info = listed['table_info']
+    return {
+        'layout': layout,
+        'partitions': partitions,
+        'seed_seconds': round(seed_seconds, 2),
+        'seconds': {name: round(value, 3) for name, value in seconds.items()},
+        'stale_partitions': table_info['stale_partitions_count'],
+        'scanned_partitions': table_info['total_partitions'],
+        'deleted_partitions': deleted['deleted_count'],
+        'delete_errors': deleted['error_count'],
+        'incremental_scanned_partitions': incremental['table_info']['total_partitions'],
+        'scanned_partitions_per_second': round(partitions / seconds['list_old_partitions'], 1),
+        'deleted_partitions_per_second': round(deleted['deleted_count'] / seconds['delete_stale_partitions'], 1),
+    }
+
+
+def main(argv: List[str] = None) -> List[Dict[str, Any]]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--partitions', type=int, nargs='+', default=[10000, 100000],
+                        help='partitions per seeded table (e.g. 10000 100000 1000000)')
+    parser.add_argument('--layouts', nargs='+', choices=sorted(LAYOUTS), default=sorted(LAYOUTS))
+    parser.add_argument('--scan-segments', type=int, default=1,
+                        help='GetPartitions segments, keep 1 with moto versions ignoring Segment (every segment returns all partitions)')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    with mock_aws():
+        glue_client = boto3.client('glue')
+        boto3.client('s3').create_bucket(Bucket=BUCKET)
+        glue_client.create_database(DatabaseInput={'Name': DATABASE})
+
+        for partitions in args.partitions:
+            for layout in args.layouts:
+                result = run_table_benchmark(glue_client, layout, partitions, args.scan_segments)
+                results.append(result)
+                print(f"{layout:>24} {partitions:>8} partitions: "
+                      f"list {result['seconds']['list_old_partitions']:.2f}s ({result['scanned_partitions_per_second']}/s), "
+                      f"delete {result['seconds']['delete_stale_partitions']:.2f}s ({result['deleted_partitions_per_second']}/s), "
+                      f"incremental list {result['seconds']['list_old_partitions_incremental']:.2f}s "
+                      f"({result['incremental_scanned_partitions']} scanned)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import logging
+import os
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+import boto3
+import botocore.session
+from botocore.config import Config
+from botocore.credentials import RefreshableCredentials
+
+from glue_catalog_partition_cleanup.throttled_client import ThrottledClient, throttled_client
+
+
+DEFAULT_MAX_POOL_CONNECTIONS = 10  ## botocore default, raised to the caller concurrency
+ASSUME_ROLE_SESSION_NAME = os.environ.get('GLUE_CLEANUP_ROLE_SESSION_NAME', 'glue_catalog_partition_cleanup')
+ASSUME_ROLE_DURATION_SECONDS = 3600
+
+_sessions: Dict[Tuple[Optional[str], Optional[str]], boto3.Session] = {}
+_clients: Dict[Tuple[str, Optional[str], Optional[str]], Tuple[ThrottledClient, int]] = {}
+_lock = threading.Lock()  ## boto3 sessions aren't thread safe, clients are
+
+
+def client_scope(region_name: Optional[str] = None, role_arn: Optional[str] = None) -> str:
+    """
+    Returns a 'region/account' name of the clients scope, '' for the default region and credentials.
+    """
+    if not region_name and not role_arn:
+        return ''
+    account_id = role_arn.split(':')[4] if role_arn else 'default'
+    return f"{region_name or 'default'}/{account_id}"
+
+
+def _assume_role_session(role_arn: str, region_name: Optional[str]) -> boto3.Session:
+    """
+    Session with credentials of `role_arn`, assumed again before they expire.
+    """
+    sts_client = boto3.client('sts', region_name=region_name)
+
+    def refresh() -> Dict[str, Any]:
+        logging.info(f"Assuming role {role_arn}")
+        credentials = sts_client.assume_role(
+            RoleArn=role_arn,
+            RoleSessionName=ASSUME_ROLE_SESSION_NAME,
+            DurationSeconds=ASSUME_ROLE_DURATION_SECONDS
+        )['Credentials']
+        return {
+            'access_key': credentials['AccessKeyId'],
+            'secret_key': credentials['SecretAccessKey'],
+            'token': credentials['SessionToken'],
+            'expiry_time': credentials['Expiration'].isoformat(),
+        }
+
+    botocore_session = botocore.session.get_session()
+    botocore_session._credentials = RefreshableCredentials.create_from_metadata(
+        metadata=refresh(),
+        refresh_using=refresh,
+        method='sts-assume-role'
+    )
+    return boto3.Session(botocore_session=botocore_session, region_name=region_name)
+
+
+def get_session(region_name: Optional[str] = None, role_arn: Optional[str] = None) -> boto3.Session:
+    """
+    Returns the process wide session of a region and role (default credentials when no role).
+    """
+    with _lock:
+        key = (region_name, role_arn)
+        if key not in _sessions:
+            if role_arn:
+                _sessions[key] = _assume_role_session(role_arn, region_name)
+            else:
+                _sessions[key] = boto3.Session(region_name=region_name)
+        return _sessions[key]
+
+
+def get_client(service_name: str, region_name: Optional[str] = None, role_arn: Optional[str] = None,
+               max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS) -> ThrottledClient:
+    """
+    Returns the process wide throttled client of a service for a region and role.
+
+    Clients are created once per (service, region, role), with a connection pool of at least
+    `max_pool_connections` (the number of threads sharing the client). A client with a smaller
+    pool is replaced when more connections are asked for.
+    """
+    session = get_session(region_name, role_arn)
+    key = (service_name, region_name, role_arn)
+    with _lock:
+        cached = _clients.get(key)
+        if cached is None or cached[1] < max_pool_connections:
+            pool_connections = max(max_pool_connections, cached[1] if cached else DEFAULT_MAX_POOL_CONNECTIONS)
+            client = throttled_client(
+                service_name,
+                config=Config(max_pool_connections=pool_connections),
+                session=session,
+                scope=client_scope(region_name, role_arn)
+            )
+            _clients[key] = (client, pool_connections)
+        return _clients[key][0]
+
+
+def get_table_client(service_name: str, table_info: Dict[str, Any],
+                     max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS) -> ThrottledClient:
+    """
+    Returns the client of a service for the region and role of a configured table.
+    """
+    return get_client(service_name, table_info.get('region'), table_info.get('role_arn'), max_pool_connections)
@@ -1,6 +1,10 @@
-import boto3
 import logging
+import os
+import threading
+from contextlib import nullcontext
 from datetime import datetime, timedelta, timezone
+from itertools import islice
+from operator import itemgetter
 from typing import List, Dict, Any
 
 from airflow.operators.empty import EmptyOperator
@@ -8,8 +12,21 @@ from airflow.operators.python import PythonOperator
 from airflow.utils.trigger_rule import TriggerRule
 
 from airflow import DAG
+from airflow.configuration import conf
 from lib.helpers.utils import get_environment_run
 from glue_catalog_partition_cleanup.tables_config import TABLES_CONFIG
+from glue_catalog_partition_cleanup.partition_deleter import delete_partitions, DELETE_MAX_WORKERS
+from glue_catalog_partition_cleanup.partition_scanner import scan_table_partitions, MAX_SCAN_SEGMENTS
+from glue_catalog_partition_cleanup.partition_expression import build_stale_partition_expression
+from glue_catalog_partition_cleanup.partition_date import PartitionDateExtractor, stale_date_ordinal
+from glue_catalog_partition_cleanup.partition_manifest import ManifestWriter, manifest_uri, read_manifest, delete_manifests, MANIFEST_CHUNK_SIZE
+from glue_catalog_partition_cleanup.lifecycle_index import LifecycleIndex, fetch_bucket_lifecycle_rules
+from glue_catalog_partition_cleanup.partition_inventory import PartitionInventory, inventory_uri
+from glue_catalog_partition_cleanup.throttled_client import get_rate_limiters
+from glue_catalog_partition_cleanup.clients import get_client, get_table_client, client_scope
+from glue_catalog_partition_cleanup.metrics import TaskMetrics
+from glue_catalog_partition_cleanup.table_metadata import resolve_tables_metadata
+from glue_catalog_partition_cleanup.partition_verifier import verify_partition_locations, fill_partition_locations, VERIFY_MAX_WORKERS
 
 
 DAG_ID = 'glue_catalog_partition_cleanup'
@@ -18,6 +35,23 @@ DAG_ID = 'glue_catalog_partition_cleanup'
 env = get_environment_run()
 
 RETENTION_DAYS_BUFFER = 30  ## buffer days to add to the retention days to be on the safe side
+MAX_ACTIVE_TABLE_TASKS = 4  ## mapped (per-table) task instances running at the same time, per task
+TABLE_TASKS_POOL = os.environ.get('GLUE_CLEANUP_POOL', 'default_pool')  ## Airflow pool for the per-table tasks
+DEFAULT_SCAN_SEGMENTS = 1  ## GetPartitions segments per table, override with 'scan_segments' in TABLES_CONFIG
+MALFORMED_PARTITIONS_SAMPLE = 10  ## malformed partition values logged per table
+PARTITIONS_WITH_OBJECTS_SAMPLE = 10  ## locations of stale partitions still holding objects logged per table
+GLUE_MAX_POOL_CONNECTIONS = max(MAX_SCAN_SEGMENTS, DELETE_MAX_WORKERS)  ## threads sharing a table Glue client
+
+## stale partitions manifests root (s3://bucket/prefix, or a local directory on single worker deployments).
+## Only the manifest pointer and counts go through XCom. A run's manifests are deleted when it succeeds.
+MANIFEST_ROOT = os.environ.get('GLUE_CLEANUP_MANIFEST_ROOT', f'/tmp/{DAG_ID}/manifests')
+
+## per-table partition inventories used for incremental scans (same storage options as the manifests)
+INVENTORY_ROOT = os.environ.get('GLUE_CLEANUP_INVENTORY_ROOT', f'/tmp/{DAG_ID}/inventory')
+
+## executors running every task on the scheduler host, the only ones local roots work with
+## (the list, verify and delete tasks of a table may run on different Celery / Kubernetes workers)
+LOCAL_EXECUTORS = {'SequentialExecutor', 'LocalExecutor', 'DebugExecutor'}
 
 if env == 'production':
     SLACK_CHANNEL = '#airflow'
@@ -35,9 +69,23 @@ default_args = {
 }
 
 
+def validate_storage_roots() -> None:
+    """
+    Fail fast when the manifests or inventories root is a local directory and the tasks may run on
+    other workers than the one that wrote them.
+    """
+    executor = conf.get('core', 'executor')
+    for name, root in [('GLUE_CLEANUP_MANIFEST_ROOT', MANIFEST_ROOT), ('GLUE_CLEANUP_INVENTORY_ROOT', INVENTORY_ROOT)]:
+        if not root.startswith('s3://') and executor.split('.')[-1] not in LOCAL_EXECUTORS:
+            raise ValueError(f"{name} must be an s3:// root with the {executor}, tasks share it across workers: {root}")
+
+
 def get_tables_config_to_process(**context) -> List[Dict[str, Any]]:
     """
-    Validate and return the list of tables to process.
+    Validate the storage roots and return the list of tables to process.
+    
+    Returns:
+        List of op_kwargs ({'table_config': config}), one per table, to map the per-table tasks over
     """
     def validate_table_config(config: Dict[str, Any]) -> bool:
         """Validate that a table config has all required fields."""
@@ -45,344 +93,573 @@ def get_tables_config_to_process(**context) -> List[Dict[str, Any]]:
         for field in required_fields:
             if field not in config:
                 raise ValueError(f"Table config missing required field: {field}")
+        scan_segments = config.get('scan_segments', DEFAULT_SCAN_SEGMENTS)
+        if not isinstance(scan_segments, int) or not 1 <= scan_segments <= MAX_SCAN_SEGMENTS:
+            raise ValueError(f"Table config 'scan_segments' must be an integer between 1 and {MAX_SCAN_SEGMENTS}: {config}")
+        if config.get('role_arn') and not str(config['role_arn']).startswith('arn:'):
+            raise ValueError(f"Table config 'role_arn' must be an IAM role ARN: {config}")
         return True
     
+    validate_storage_roots()
+    
     processed_configs = []
     
     for config in TABLES_CONFIG:
         validate_table_config(config)
-        processed_configs.append(config)
+        processed_configs.append({'table_config': config})
     
     return processed_configs
 
 
-def get_table_details(**context) -> List[Dict[str, Any]]:
+def get_table_details(table_configs: List[Dict[str, Any]], **context) -> List[Dict[str, Any]]:
     """
-    Get partition keys from Glue table definitions for all configured tables.
+    Get S3 location and partition keys from the Glue table definitions of the configured tables.
+    
+    Tables are grouped per region/account and database, each database metadata is fetched with
+    a few paginated GetTables calls instead of one GetTable call per table (see table_metadata).
     
     Returns:
-        List of dictionaries with table info and their partition keys
+        List of op_kwargs ({'table_info': info}), one per table, to map the per-table tasks over
     """
-    ti = context['task_instance']
-    
-    # Pull validated table configs from previous task
-    table_configs = ti.xcom_pull(task_ids='get_tables_configs')
-    
-    if not table_configs:
-        logging.warning("No table configurations found from validate_table_configs task")
-        return []
+    table_configs = [table_config['table_config'] for table_config in table_configs or []]
+    
+    metrics = TaskMetrics('get_table_details')
+    
+    databases_tables = {}
+    for table_config in table_configs:
+        key = (table_config.get('region'), table_config.get('role_arn'), table_config['database'])
+        databases_tables.setdefault(key, []).append(table_config['table'])
+    
+    databases_metadata = {}
+    for (region, role_arn, database), tables in databases_tables.items():
+        logging.info(f"Getting table definitions of {len(tables)} tables from database: {database}")
+        glue_client = get_client('glue', region, role_arn)
+        with metrics.stage('get_tables'):
+            databases_metadata[(region, role_arn, database)] = resolve_tables_metadata(
+                glue_client=glue_client,
+                database=database,
+                table_names=tables,
+                scope=client_scope(region, role_arn)
+            )
     
-    glue_client = boto3.client('glue')
-    tables_with_partition_keys = []
+    tables_details = []
     
-    for config in table_configs:
-        database = config['database']
-        table = config['table']
+    for table_config in table_configs:
+        database = table_config['database']
+        table = table_config['table']
         full_table_name = f"{database}.{table}"
+        region = table_config.get('region')
+        role_arn = table_config.get('role_arn')
+        scope = client_scope(region, role_arn)
         
-        logging.info(f"Getting partition keys for table: {full_table_name}")
+        table_metadata = databases_metadata[(region, role_arn, database)].get(table)
+        if table_metadata is None:
+            error_msg = f"Error getting partition keys for {full_table_name}: table not found in the Glue catalog"
+            logging.error(error_msg)
+            raise ValueError(error_msg)
         
-        try:
-            table_response = glue_client.get_table(
-                DatabaseName=database,
-                Name=table
-            )
-            
-            s3_location = table_response['Table']['StorageDescriptor']['Location']
-            s3_parts = s3_location.split('/')
-            s3_bucket = s3_parts[2]
-            s3_prefix = '/'.join(s3_parts[3:])  # Extract only the prefix path without bucket
-            partition_keys = table_response['Table'].get('PartitionKeys', [])
-            
-            table_info = {
-                'database': database,
-                'table': table,
-                'full_table_name': full_table_name,
-                's3_bucket': s3_bucket,
-                's3_prefix': s3_prefix,
-                'partition_keys': partition_keys
-            }
-            
-            tables_with_partition_keys.append(table_info)
-            
-            logging.info(f"Found {len(partition_keys)} partition keys for {full_table_name}")
-            for key in partition_keys:
-                logging.info(f"  - {key['Name']} ({key['Type']})")
-                
-        except Exception as e:
-            logging.error(f"Error getting partition keys for {full_table_name}: {e}")
-            raise
+        table_info = {
+            'database': database,
+            'table': table,
+            'full_table_name': full_table_name,
+            # unique across the regions/accounts of the DAG, names the table manifests and inventory
+            'table_id': f"{scope}/{full_table_name}" if scope else full_table_name,
+            'region': region,
+            'role_arn': role_arn,
+            's3_bucket': table_metadata['s3_bucket'],
+            's3_prefix': table_metadata['s3_prefix'],
+            'partition_keys': table_metadata['partition_keys'],
+            'manual_retention_days': table_config.get('retention_days'),
+            'scan_segments': table_config.get('scan_segments', DEFAULT_SCAN_SEGMENTS),
+            'expression_pushdown': table_config.get('expression_pushdown', True),
+            'incremental_scan': table_config.get('incremental_scan', True),
+            'verify_s3_location': table_config.get('verify_s3_location', False)
+        }
+        
+        logging.info(f"Found {len(table_info['partition_keys'])} partition keys for {full_table_name}")
+        for key in table_info['partition_keys']:
+            logging.info(f"  - {key['Name']} ({key['Type']})")
+        
+        tables_details.append({'table_info': table_info})
     
-    return tables_with_partition_keys
+    metrics.count('tables', len(tables_details))
+    metrics.count('databases', len(databases_tables))
+    metrics.report(rate_limiters=get_rate_limiters('glue'))
+    
+    return tables_details
 
 
-def list_old_partitions(**context) -> List[Dict[str, Any]]:
+def list_old_partitions(table_info: Dict[str, Any], **context) -> Dict[str, Any]:
     """
-    List old/stale partitions from configured tables based on retention policy.
+    List old/stale partitions of a table based on retention policy.
+    
+    The table is split into 'scan_segments' GetPartitions segments (from the table config)
+    that are scanned at the same time.
+    
+    With 'incremental_scan' (default) the table partition inventory (see partition_inventory) limits
+    the scan to the partitions dated on or after the last completed run cutoff, and adds back the
+    partitions earlier runs failed to delete. A full scan is done on the first run, when the last one
+    is older than FULL_RECONCILIATION_DAYS, or when the DAG is triggered with {"full_reconciliation": true}.
+    
+    Stale partitions are streamed into a compressed manifest for the DAG run (see partition_manifest),
+    only the manifest pointer and counts are pushed to XCom.
     
     Returns:
-        List of dictionaries with table info and their stale partitions
+        op_kwargs with the table info and its stale partitions manifest
     """
-    ti = context['task_instance']
+    run_id = context['run_id']
+    dag_run_conf = (context['dag_run'].conf if context.get('dag_run') else None) or {}
+    database = table_info['database']
+    table = table_info['table']
+    full_table_name = table_info['full_table_name']
+    table_id = table_info.get('table_id', full_table_name)
+    partition_keys = table_info['partition_keys']
+    retention_days = table_info['retention_days']
+    scan_segments = table_info.get('scan_segments', DEFAULT_SCAN_SEGMENTS)
+    expression_pushdown = table_info.get('expression_pushdown', True)
     
-    # Pull table info with retention days from previous task
-    tables_info = ti.xcom_pull(task_ids='get_max_retention_for_table')
+    logging.info(f"Listing partitions for table: {full_table_name} (segments: {scan_segments})")
     
-    if not tables_info:
-        logging.warning("No table information found from get_max_retention_for_table task")
-        return []
+    metrics = TaskMetrics('list_old_partitions', full_table_name)
     
-    glue_client = boto3.client('glue')
-    tables_with_stale_partitions = []
+    # one connection per concurrently scanned segment
+    glue_client = get_table_client('glue', table_info, max_pool_connections=GLUE_MAX_POOL_CONNECTIONS)
     
-    for table_info in tables_info:
-        database = table_info['database']
-        table = table_info['table']
-        full_table_name = table_info['full_table_name']
-        partition_keys = table_info['partition_keys']
-        retention_days = table_info['retention_days']
-        
-        logging.info(f"Listing partitions for table: {full_table_name}")
-        
-        try:
+    inventory_context = nullcontext()
+    if table_info.get('incremental_scan', True):
+        inventory_context = PartitionInventory(inventory_uri(INVENTORY_ROOT, table_id))
+    
+    try:
+        with inventory_context as inventory:
             # Calculate stale date based on retention days
             stale_date_calculated = datetime.now(timezone.utc) - timedelta(days=retention_days)
             stale_date = stale_date_calculated.strftime('%Y-%m-%d')
             
             logging.info(f"Stale date for {full_table_name}: {stale_date} (retention days: {retention_days})")
             
-            # Get all partitions for the table
-            paginator = glue_client.get_paginator('get_partitions')
-            response_iterator = paginator.paginate(
-                DatabaseName=database,
-                TableName=table
-            )
+            min_date = None
+            if inventory is not None:
+                min_date = inventory.scan_lower_bound(stale_date, force_full_scan=dag_run_conf.get('full_reconciliation', False))
+            
+            # Let the catalog return only stale partitions when the partition layout can be expressed
+            expression = None
+            if expression_pushdown:
+                expression = build_stale_partition_expression(partition_keys, stale_date, min_date)
             
-            stale_partitions = []
-            total_partitions = 0
+            if min_date and not expression:
+                # the whole table is read anyway, reconcile it all
+                min_date = None
+                if expression_pushdown:
+                    expression = build_stale_partition_expression(partition_keys, stale_date)
             
-            for page in response_iterator:
-                for partition in page['Partitions']:
-                    total_partitions += 1
-                    partition_values = partition['Values']
-                    
-                    # Extract date from partition based on partition key structure
-                    partition_date = extract_partition_date(partition_keys, partition_values)
-                    
-                    if partition_date and partition_date < stale_date:
-                        stale_partitions.append({
-                            'values': partition_values
-                        })
+            if min_date:
+                logging.info(f"Incremental scan of {full_table_name} from {min_date}")
+            else:
+                logging.info(f"Full scan of {full_table_name}")
+            
+            if expression:
+                logging.info(f"Using partition expression for {full_table_name}: {expression}")
+            else:
+                logging.info(f"Partition layout of {full_table_name} can't be expressed, filtering all partitions in Python")
+            
+            # Compiled once per table from the partition keys, also re-checks the partitions already
+            # filtered by the expression
+            date_extractor = PartitionDateExtractor(partition_keys)
+            if not date_extractor.compiled:
+                logging.warning(f"Partition date layout of {full_table_name} is not compiled, comparing dates as strings")
+            
+            malformed_partitions = {'count': 0, 'sample': []}
+            malformed_lock = threading.Lock()
+            
+            def select_stale(partitions: List[Dict[str, Any]]) -> List[List[str]]:
+                stale, malformed = date_extractor.split_stale(list(map(itemgetter('Values'), partitions)), stale_date, min_date)
+                if malformed:
+                    with malformed_lock:
+                        malformed_partitions['count'] += len(malformed)
+                        sample = malformed_partitions['sample']
+                        sample.extend(malformed[:MALFORMED_PARTITIONS_SAMPLE - len(sample)])
+                return stale
+            
+            manifest_writer = ManifestWriter(manifest_uri(MANIFEST_ROOT, run_id, table_id))
+            
+            with metrics.stage('scan'):
+                stale_count, total_partitions = scan_table_partitions(
+                    glue_client=glue_client,
+                    database=database,
+                    table=table,
+                    partition_filter=select_stale,
+                    sink=manifest_writer.add,
+                    total_segments=scan_segments,
+                    expression=expression,
+                    include_location=table_info.get('verify_s3_location', False)
+                )
             
-            logging.info(f"Found {len(stale_partitions)} stale partitions out of {total_partitions} total for {full_table_name}")
+            logging.info(f"Found {stale_count} stale partitions out of {total_partitions} "
+                         f"{'returned' if expression else 'total'} for {full_table_name}")
             
-            table_info['stale_partitions'] = stale_partitions
+            if min_date:
+                # partitions earlier runs failed to delete are dated before the scanned range
+                retried_count = 0
+                with metrics.stage('retry_failed'):
+                    for partition_values in inventory.failed_partitions(before_date=stale_date_ordinal(min_date)):
+                        manifest_writer.add({'values': partition_values})
+                        retried_count += 1
+                metrics.count('retried_partitions', retried_count)
+                if retried_count:
+                    logging.info(f"Retrying {retried_count} partitions earlier runs failed to delete for {full_table_name}")
+                stale_count += retried_count
+            
+            if malformed_partitions['count']:
+                logging.warning(f"Skipped {malformed_partitions['count']} partitions of {full_table_name} with malformed date values, "
+                                f"e.g. {malformed_partitions['sample']}")
+            
+            with metrics.stage('manifest_close'):
+                table_info['stale_partitions_manifest'] = manifest_writer.close()
+            table_info['malformed_partitions_count'] = malformed_partitions['count']
+            table_info['stale_partitions_count'] = stale_count
             table_info['total_partitions'] = total_partitions
             table_info['stale_date'] = stale_date
+            table_info['scan_min_date'] = min_date
             
-            tables_with_stale_partitions.append(table_info)
-            
-        except Exception as e:
-            logging.error(f"Error listing partitions for {full_table_name}: {e}")
-            raise
-    
-    return tables_with_stale_partitions
+            if inventory is not None:
+                inventory.start_run(run_id, stale_date, min_date, stale_count)
+        
+        metrics.count('scanned_partitions', total_partitions)
+        metrics.count('stale_partitions', stale_count)
+        metrics.count('malformed_partitions', malformed_partitions['count'])
+        metrics.rate('scanned_partitions_per_second', total_partitions, 'scan')
+        metrics.report(rate_limiters=get_rate_limiters('glue'))
+        
+        return {'table_info': table_info}
+        
+    except Exception as e:
+        logging.error(f"Error listing partitions for {full_table_name}: {e}")
+        raise
 
 
-def extract_partition_date(partition_keys: List[Dict], partition_values: List[str]) -> str:
+def verify_stale_partitions(table_info: Dict[str, Any], **context) -> Dict[str, Any]:
     """
-    Extract date string from partition values based on partition key structure.
+    Optional ('verify_s3_location' in the table config) check that the S3 location of every stale
+    partition has really expired: partitions still holding objects are dropped from the manifest
+    handed to delete_stale_partitions (see partition_verifier).
+    
+    Partitions in the catalog without an S3 location can't be verified and are kept as well.
+    
+    Dropped partitions are recorded as failed in the table inventory, so the next runs check them again.
+    
+    Returns:
+        op_kwargs with the table info and its verified stale partitions manifest
     """
-    partition_date = ''
+    if not table_info.get('verify_s3_location', False):
+        return {'table_info': table_info}
     
-    # Check if partition keys contain year, month, and day
-    for i, key_info in enumerate(partition_keys):
-        key_name = key_info['Name']
-        
-        if i < len(partition_values):
-            value = partition_values[i]
+    run_id = context['run_id']
+    database = table_info['database']
+    table = table_info['table']
+    full_table_name = table_info['full_table_name']
+    table_id = table_info.get('table_id', full_table_name)
+    
+    logging.info(f"Verifying the S3 locations of {table_info.get('stale_partitions_count', 0)} stale partitions for table: {full_table_name}")
+    
+    metrics = TaskMetrics('verify_stale_partitions', full_table_name)
+    glue_client = get_table_client('glue', table_info, max_pool_connections=GLUE_MAX_POOL_CONNECTIONS)
+    s3_client = get_table_client('s3', table_info, max_pool_connections=VERIFY_MAX_WORKERS)
+    date_extractor = PartitionDateExtractor(table_info['partition_keys'])
+    
+    def partition_date(partition_values: List[str]):
+        try:
+            return date_extractor.ordinal(partition_values)
+        except ValueError:
+            return None
+    
+    inventory_context = nullcontext()
+    if table_info.get('incremental_scan', True):
+        inventory_context = PartitionInventory(inventory_uri(INVENTORY_ROOT, table_id))
+    
+    manifest_writer = ManifestWriter(manifest_uri(MANIFEST_ROOT, run_id, f"{table_id}.verified"))
+    verified_count = 0
+    with_objects_count = 0
+    with_objects_sample = []
+    no_location_count = 0
+    no_location_sample = []
+    
+    with inventory_context as inventory:
+        partitions = read_manifest(table_info.get('stale_partitions_manifest'))
+        # verified in manifest chunk sized batches, one batch in memory at a time
+        for batch in iter(lambda: list(islice(partitions, MANIFEST_CHUNK_SIZE)), []):
+            with metrics.stage('fill_locations'):
+                gone = fill_partition_locations(glue_client, database, table, batch)
+            if gone:
+                gone_ids = {id(partition_info) for partition_info in gone}
+                batch = [partition_info for partition_info in batch if id(partition_info) not in gone_ids]
+            with metrics.stage('verify'):
+                expired, with_objects, unverifiable = verify_partition_locations(s3_client, batch)
             
-            if key_name == 'year':
-                partition_date += f'{value}'
-            elif key_name in ['month', 'day', 'hour', 'minute', 'second']:
-                partition_date += f'-{value.zfill(2)}'  # Pad with zero if needed
-            elif key_name in ['date', 'dt', 'partition_date', 'impression_date']:  # Other common date partition names
-                partition_date = value
-                break
+            for partition_info in expired:
+                manifest_writer.add(partition_info)
+            verified_count += len(expired) + len(with_objects)
+            with_objects_count += len(with_objects)
+            with_objects_sample.extend(partition_info['location']
+                                       for partition_info in with_objects[:PARTITIONS_WITH_OBJECTS_SAMPLE - len(with_objects_sample)])
+            no_location_count += len(unverifiable)
+            no_location_sample.extend(partition_info['values']
+                                      for partition_info in unverifiable[:PARTITIONS_WITH_OBJECTS_SAMPLE - len(no_location_sample)])
+            
+            if inventory is not None and (gone or with_objects or unverifiable):
+                # partitions retried from the inventory and already gone from the catalog need no deletion
+                inventory.record_deletions(
+                    run_id=run_id,
+                    deleted=[(partition_info['values'], partition_date(partition_info['values'])) for partition_info in gone],
+                    failed=[(partition_info['values'], partition_date(partition_info['values']), 'S3ObjectsPresent')
+                            for partition_info in with_objects] +
+                           [(partition_info['values'], partition_date(partition_info['values']), 'NoLocation')
+                            for partition_info in unverifiable]
+                )
     
-    return partition_date
+    if with_objects_count:
+        logging.warning(f"Kept {with_objects_count} stale partitions of {full_table_name} whose S3 location still has objects, "
+                        f"e.g. {with_objects_sample}")
+    if no_location_count:
+        logging.warning(f"Kept {no_location_count} stale partitions of {full_table_name} without an S3 location to verify, "
+                        f"e.g. {no_location_sample}")
+    
+    table_info['stale_partitions_manifest'] = manifest_writer.close()
+    table_info['stale_partitions_count'] = table_info['stale_partitions_manifest']['partition_count']
+    table_info['partitions_with_objects_count'] = with_objects_count
+    table_info['partitions_without_location_count'] = no_location_count
+    
+    metrics.count('verified_partitions', verified_count)
+    metrics.count('partitions_with_objects', with_objects_count)
+    metrics.count('partitions_without_location', no_location_count)
+    metrics.rate('verified_partitions_per_second', verified_count, 'verify')
+    metrics.report(rate_limiters=get_rate_limiters('s3') + get_rate_limiters('glue'))
+    
+    return {'table_info': table_info}
 
 
-def delete_stale_partitions(**context) -> Dict[str, Any]:
-    ti = context['task_instance']
+def delete_stale_partitions(table_info: Dict[str, Any], **context) -> Dict[str, Any]:
+    """
+    Delete stale partitions of a table using BatchDeletePartition fanned out over a bounded worker pool.
+    Partitions are streamed from the table manifest written by list_old_partitions.
     
-    tables_info = ti.xcom_pull(task_ids='list_old_partitions')
+    Returns:
+        Summary of deleted partitions and errors for the table
+    """
+    database = table_info['database']
+    table = table_info['table']
+    full_table_name = table_info['full_table_name']
+    table_id = table_info.get('table_id', full_table_name)
+    stale_partitions_manifest = table_info.get('stale_partitions_manifest')
     
-    if not tables_info:
-        logging.warning("No table information found from list_old_partitions task")
-        return {'deleted_count': 0, 'error_count': 0, 'tables_processed': 0}
+    logging.info(f"Deleting {table_info.get('stale_partitions_count', 0)} stale partitions for table: {full_table_name}")
     
-    glue_client = boto3.client('glue')
+    metrics = TaskMetrics('delete_stale_partitions', full_table_name)
     
-    total_deleted = 0
-    total_errors = 0
-    tables_processed = 0
+    # one connection per concurrent BatchDeletePartition call
+    glue_client = get_table_client('glue', table_info, max_pool_connections=GLUE_MAX_POOL_CONNECTIONS)
     
-    for table_info in tables_info:
-        database = table_info['database']
-        table = table_info['table']
-        full_table_name = table_info['full_table_name']
-        stale_partitions = table_info.get('stale_partitions', [])
-        
-        tables_processed += 1
+    inventory_context = nullcontext()
+    if table_info.get('incremental_scan', True):
+        inventory_context = PartitionInventory(inventory_uri(INVENTORY_ROOT, table_id))
+    
+    with inventory_context as inventory:
+        on_batch_result = None
+        if inventory is not None:
+            date_extractor = PartitionDateExtractor(table_info['partition_keys'])
+            
+            def partition_date(partition_values: List[str]):
+                try:
+                    return date_extractor.ordinal(partition_values)
+                except ValueError:
+                    return None
+            
+            def record_batch_result(deleted_values, failed):
+                inventory.record_deletions(
+                    run_id=context['run_id'],
+                    deleted=[(values, partition_date(values)) for values in deleted_values],
+                    failed=[(values, partition_date(values), error_code) for values, error_code in failed]
+                )
+            on_batch_result = record_batch_result
         
-        logging.info(f"Deleting {len(stale_partitions)} stale partitions for table: {full_table_name}")
+        with metrics.stage('delete'):
+            deleted, errors = delete_partitions(
+                glue_client=glue_client,
+                database=database,
+                table=table,
+                partitions=read_manifest(stale_partitions_manifest),
+                max_workers=DELETE_MAX_WORKERS,
+                on_batch_result=on_batch_result
+            )
         
-        for partition_info in stale_partitions:
-            try:
-                partition_values = partition_info['values']
-                
-                response = glue_client.delete_partition(
-                    DatabaseName=database,
-                    TableName=table,
-                    PartitionValues=partition_values
-                )
-                
-                total_deleted += 1
-                logging.info(f"Deleted partition {partition_values} from {full_table_name}")
-                
-            except Exception as e:
-                total_errors += 1
-                logging.error(f"Error deleting partition {partition_values} from {full_table_name}: {e}")
+        if inventory is not None:
+            inventory.complete_run(context['run_id'], deleted, errors)
+    
+    metrics.count('deleted_partitions', deleted)
+    metrics.count('delete_errors', errors)
+    metrics.rate('deleted_partitions_per_second', deleted, 'delete')
+    metrics.report(rate_limiters=get_rate_limiters('glue'))
+    
+    return {
+        'full_table_name': full_table_name,
+        'deleted_count': deleted,
+        'error_count': errors
+    }
+
+
+def summarize_partitions_cleanup(tables_summaries: List[Dict[str, Any]], **context) -> Dict[str, Any]:
+    """
+    Merge the per-table delete_stale_partitions summaries.
+    """
+    tables_summaries = list(tables_summaries or [])
     
     summary = {
-        'deleted_count': total_deleted,
-        'error_count': total_errors,
-        'tables_processed': tables_processed
+        'deleted_count': sum(table_summary['deleted_count'] for table_summary in tables_summaries),
+        'error_count': sum(table_summary['error_count'] for table_summary in tables_summaries),
+        'tables_processed': len(tables_summaries)
     }
     
+    for table_summary in tables_summaries:
+        logging.info(f"  - {table_summary['full_table_name']}: {table_summary['deleted_count']} deleted, "
+                     f"{table_summary['error_count']} errors")
+    
     logging.info(f"Partition cleanup summary: {summary}")
     
+    metrics = TaskMetrics('summarize_partitions_cleanup')
+    for name in ['deleted_count', 'error_count', 'tables_processed']:
+        metrics.count(name, summary[name])
+    metrics.report()
+    
     return summary
 
 
-def get_max_retention_for_table(**context) -> List[Dict[str, Any]]:
+def cleanup_manifests(**context) -> int:
+    """
+    Delete the stale partitions manifests of the run, and the ones failed runs left behind.
+    
+    Returns:
+        The number of manifest files deleted
+    """
+    return delete_manifests(MANIFEST_ROOT, context['run_id'])
+
+
+def build_lifecycle_index(tables_details: List[Dict[str, Any]], **context) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Fetch the lifecycle rules of every bucket used by the configured tables, once per bucket.
+    
+    Returns:
+        Dictionary of bucket name to its lifecycle rules, indexed per table by get_max_retention_for_table
+    """
+    if env != 'production':
+        return {}
+    
+    # bucket names are global, the rules of a bucket are read with the client of (one of) its tables
+    bucket_tables = {}
+    for table_details in tables_details or []:
+        bucket_tables.setdefault(table_details['table_info']['s3_bucket'], table_details['table_info'])
+    buckets = sorted(bucket_tables)
+    
+    metrics = TaskMetrics('build_lifecycle_index')
+    bucket_rules = {}
+    
+    for bucket in buckets:
+        with metrics.stage('fetch_lifecycle_rules'):
+            rules = fetch_bucket_lifecycle_rules(bucket_name=bucket, s3_client=get_table_client('s3', bucket_tables[bucket]))
+        # keep only what the index needs, rules may hold datetimes (Expiration.Date, Transitions) XCom can't serialize
+        bucket_rules[bucket] = [
+            {
+                **{field: rule[field] for field in ['ID', 'Prefix', 'Filter'] if field in rule},
+                'Expiration': {'Days': rule.get('Expiration', {}).get('Days')}
+            }
+            for rule in rules
+        ]
+        logging.info(f"Fetched {len(bucket_rules[bucket])} lifecycle rules for bucket: {bucket}")
+    
+    metrics.count('buckets', len(buckets))
+    metrics.count('lifecycle_rules', sum(len(rules) for rules in bucket_rules.values()))
+    metrics.report(rate_limiters=get_rate_limiters('s3'))
+    
+    return bucket_rules
+
+
+def get_max_retention_for_table(table_info: Dict[str, Any], **context) -> Dict[str, Any]:
     """
-    Get maximum retention days from S3 lifecycle rules for each table.
+    Get maximum retention days from S3 lifecycle rules for a table.
+    
+    Lifecycle rules are pulled from build_lifecycle_index (fetched once per bucket per run)
+    and resolved for the table prefix through an in-memory prefix trie.
     
     Retention priority (in production):
     1. S3 lifecycle rules for the table's prefix (if found)
     2. Manual retention_days from table config (if no S3 rules and if specified)
     3. Error/abort if neither is available
-    """
-    ti = context['task_instance']
-    
-    tables_info = ti.xcom_pull(task_ids='get_table_details')
-    
-    # pull the original table configs to get manual retention if specified
-    table_configs = ti.xcom_pull(task_ids='validate_table_configs')
     
-    if not tables_info:
-        logging.warning("No table information found from get_table_details task")
-        return []
+    Returns:
+        op_kwargs with the table info and its retention days
+    """
+    full_table_name = table_info['full_table_name']
+    s3_bucket = table_info['s3_bucket']
+    s3_prefix = table_info['s3_prefix']
     
-    manual_retention_lookup = {}
-    if table_configs:
-        for config in table_configs:
-            key = f"{config['database']}.{config['table']}"
-            if 'retention_days' in config:
-                manual_retention_lookup[key] = config['retention_days']
+    logging.info(f"Getting lifecycle rules for table: {full_table_name} (bucket: {s3_bucket}, prefix: {s3_prefix})")
     
-    tables_with_retention = []
+    metrics = TaskMetrics('get_max_retention_for_table', full_table_name)
     
-    for table_info in tables_info:
-        full_table_name = table_info['full_table_name']
-        s3_bucket = table_info['s3_bucket']
-        s3_prefix = table_info['s3_prefix']
-        
-        logging.info(f"Getting lifecycle rules for table: {full_table_name} (bucket: {s3_bucket}, prefix: {s3_prefix})")
-        
-        try:
-            if env == 'production':
-                lifecycle_rules = get_lifecycle_rules_for_prefix(bucket_name=s3_bucket, prefix=s3_prefix)
-                
-                retentions = []
-                for rule in lifecycle_rules:
-                    expiration = rule.get('Expiration', {})
-                    if 'Days' in expiration:
-                        retentions.append(expiration['Days'])
-                
-                valid_retentions = [r for r in retentions if r is not None]
-                
-                if valid_retentions:
-                    # lifecycle rules exist
-                    max_retention = max(valid_retentions)
-                    logging.info(f"Found max retention of {max_retention} days from S3 lifecycle rules for {full_table_name}")
+    try:
+        if env == 'production':
+            with metrics.stage('resolve_retention'):
+                bucket_rules = context['task_instance'].xcom_pull(task_ids='build_lifecycle_index') or {}
+                if s3_bucket in bucket_rules:
+                    lifecycle_index = LifecycleIndex(bucket_rules[s3_bucket])
                 else:
-                    # lifecycle rules not found. check for manual retention
-                    if full_table_name in manual_retention_lookup:
-                        max_retention = manual_retention_lookup[full_table_name]
-                        logging.info(f"No S3 lifecycle rules found. Using manual retention of {max_retention} days for {full_table_name}")
-                    else:
-                        error_msg = (f"No valid retention configuration found for {full_table_name}. "
-                                f"No S3 lifecycle rules exist for prefix '{s3_prefix}' and no manual "
-                                f"'retention_days' specified in table config. Cannot proceed. "
-                                f"Please add S3 lifecycle rules or specify 'retention_days' in the table configuration.")
-                        logging.error(error_msg)
-                        raise ValueError(error_msg)
-            else:
-                # for development environment only (deletation will not be performed otherwise)
-                max_retention = RETENTION_DAYS_BUFFER
-                logging.info(f"Using default retention for development environment: {RETENTION_DAYS_BUFFER} days for {full_table_name}")
-            
-            # Add retention_days to table_info
-            table_info_with_retention = table_info.copy()
-            table_info_with_retention['retention_days'] = max_retention + RETENTION_DAYS_BUFFER
-            
-            tables_with_retention.append(table_info_with_retention)
+                    lifecycle_index = LifecycleIndex(fetch_bucket_lifecycle_rules(bucket_name=s3_bucket, s3_client=get_table_client('s3', table_info)))
+                
+                max_expiration_days = lifecycle_index.max_expiration_days(s3_prefix)
             
-        except Exception as e:
-            error_msg = f"Error processing retention for {full_table_name}: {e}"
-            logging.error(error_msg)
-            raise ValueError(error_msg) from e
+            if max_expiration_days is not None:
+                # lifecycle rules exist
+                max_retention = max_expiration_days
+                logging.info(f"Found max retention of {max_retention} days from S3 lifecycle rules for {full_table_name}")
+            else:
+                # lifecycle rules not found. check for manual retention
+                if table_info.get('manual_retention_days') is not None:
+                    max_retention = table_info['manual_retention_days']
+                    logging.info(f"No S3 lifecycle rules found. Using manual retention of {max_retention} days for {full_table_name}")
+                else:
+                    error_msg = (f"No valid retention configuration found for {full_table_name}. "
+                            f"No S3 lifecycle rules exist for prefix '{s3_prefix}' and no manual "
+                            f"'retention_days' specified in table config. Cannot proceed. "
+                            f"Please add S3 lifecycle rules or specify 'retention_days' in the table configuration.")
+                    logging.error(error_msg)
+                    raise ValueError(error_msg)
+        else:
+            # for development environment only (deletation will not be performed otherwise)
+            max_retention = RETENTION_DAYS_BUFFER
+            logging.info(f"Using default retention for development environment: {RETENTION_DAYS_BUFFER} days for {full_table_name}")
+        
+        # Add retention_days to table_info
+        table_info_with_retention = table_info.copy()
+        table_info_with_retention['retention_days'] = max_retention + RETENTION_DAYS_BUFFER
+        
+    except Exception as e:
+        error_msg = f"Error processing retention for {full_table_name}: {e}"
+        logging.error(error_msg)
+        raise ValueError(error_msg) from e
+    
+    metrics.report(rate_limiters=get_rate_limiters('s3'))
     
-    return tables_with_retention
+    return {'table_info': table_info_with_retention}
 
 
-def get_lifecycle_rules_for_prefix(bucket_name, prefix):
+def get_lifecycle_rules_for_prefix(bucket_name, prefix, region_name=None, role_arn=None):
     """
     Returns all lifecycle rules in a bucket that apply to the given prefix.
     """
-    s3 = boto3.client('s3')
-    try:
-        response = s3.get_bucket_lifecycle_configuration(Bucket=bucket_name)
-    except s3.exceptions.ClientError as e:
-        if e.response['Error']['Code'] == 'NoSuchLifecycleConfiguration':
-            print(f"No lifecycle configuration found for bucket '{bucket_name}'.")
-            return []
-        else:
-            raise
-    
-    matched_rules = []
-    for rule in response.get('Rules', []):
-        # Some rules use 'Filter' while older ones use 'Prefix'
-        rule_prefix = ''
-        if 'Prefix' in rule:
-            # Old-style rule with direct Prefix
-            rule_prefix = rule['Prefix']
-        elif 'Filter' in rule:
-            filter_obj = rule['Filter']
-            if 'Prefix' in filter_obj:
-                # Filter with direct Prefix
-                rule_prefix = filter_obj['Prefix']
-            elif 'And' in filter_obj and 'Prefix' in filter_obj['And']:
-                # Filter with And containing Prefix (e.g., when combined with Tags)
-                rule_prefix = filter_obj['And']['Prefix']
-
-        if rule_prefix.startswith(prefix) and 'granica-' not in rule.get('ID', ''):
-            logging.info(f"Matched rule: {rule}")
-            matched_rules.append(rule)
-
+    s3_client = get_client('s3', region_name, role_arn)
+    matched_rules = LifecycleIndex(fetch_bucket_lifecycle_rules(bucket_name=bucket_name, s3_client=s3_client)).rules_for_prefix(prefix)
+    
+    for rule in matched_rules:
+        logging.info(f"Matched rule: {rule}")
+    
     return matched_rules
 
 
@@ -408,35 +685,78 @@ with DAG(
         do_xcom_push=True
     )
     
+    # Per-table tasks: mapped over the table details, so tables run in parallel (bounded by
+    # MAX_ACTIVE_TABLE_TASKS and the pool) and a retry only redoes the failed table
+    table_task_kwargs = {
+        'max_active_tis_per_dag': MAX_ACTIVE_TABLE_TASKS,
+        'pool': TABLE_TASKS_POOL,
+        'do_xcom_push': True
+    }
+    
+    # one task for all the tables, table definitions are fetched in bulk per database
     get_table_details_task = PythonOperator(
         task_id='get_table_details',
         python_callable=get_table_details,
+        op_kwargs={'table_configs': get_tables_configs.output},
         do_xcom_push=True
     )
     
-    get_max_retention_for_table_task = PythonOperator(
-        task_id='get_max_retention_for_table',
-        python_callable=get_max_retention_for_table,
+    build_lifecycle_index_task = PythonOperator(
+        task_id='build_lifecycle_index',
+        python_callable=build_lifecycle_index,
+        op_kwargs={'tables_details': get_table_details_task.output},
         do_xcom_push=True
     )
     
-    list_old_partitions_task = PythonOperator(
+    get_max_retention_for_table_task = PythonOperator.partial(
+        task_id='get_max_retention_for_table',
+        python_callable=get_max_retention_for_table,
+        **table_task_kwargs
+    ).expand(op_kwargs=get_table_details_task.output)
+    
+    list_old_partitions_task = PythonOperator.partial(
         task_id='list_old_partitions',
         python_callable=list_old_partitions,
-        do_xcom_push=True
-    )
+        **table_task_kwargs
+    ).expand(op_kwargs=get_max_retention_for_table_task.output)
+    
+    verify_stale_partitions_task = PythonOperator.partial(
+        task_id='verify_stale_partitions',
+        python_callable=verify_stale_partitions,
+        **table_task_kwargs
+    ).expand(op_kwargs=list_old_partitions_task.output)
     
     if env == 'production':
-        delete_stale_partitions_task = PythonOperator(
+        delete_stale_partitions_task = PythonOperator.partial(
             task_id='delete_stale_partitions',
             python_callable=delete_stale_partitions,
+            **table_task_kwargs
+        ).expand(op_kwargs=verify_stale_partitions_task.output)
+        
+        summarize_partitions_cleanup_task = PythonOperator(
+            task_id='summarize_partitions_cleanup',
+            python_callable=summarize_partitions_cleanup,
+            op_kwargs={'tables_summaries': delete_stale_partitions_task.output},
             do_xcom_push=True
         )
+        
+        delete_stale_partitions_task >> summarize_partitions_cleanup_task >> end
     else:
         # dummy task for 'developmet'
         delete_stale_partitions_task = EmptyOperator(
             task_id='dummy_delete_stale_partitions',
         )
+        
+        delete_stale_partitions_task >> end
+    
+    # the run's manifests are kept when a task failed, to clear and rerun it
+    cleanup_manifests_task = PythonOperator(
+        task_id='cleanup_manifests',
+        python_callable=cleanup_manifests,
+        trigger_rule=TriggerRule.NONE_FAILED,
+        do_xcom_push=True
+    )
     
+    delete_stale_partitions_task >> cleanup_manifests_task >> end
 
-    start >> get_tables_configs >> get_table_details_task >> get_max_retention_for_table_task >> list_old_partitions_task >> delete_stale_partitions_task >> end
+    start >> get_tables_configs >> get_table_details_task >> build_lifecycle_index_task >> get_max_retention_for_table_task >> list_old_partitions_task >> verify_stale_partitions_task >> delete_stale_partitions_task
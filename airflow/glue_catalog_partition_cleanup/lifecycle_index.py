@@ -0,0 +1,130 @@
+import logging
+import threading
+from typing import List, Dict, Any, Iterable, Optional
+
+from glue_catalog_partition_cleanup.clients import get_client
+
+
+EXCLUDED_RULE_ID_MARKERS = ['granica-']  ## lifecycle rules ignored for retention
+
+_bucket_rules_cache: Dict[str, List[Dict[str, Any]]] = {}
+_bucket_rules_cache_lock = threading.Lock()
+
+
+def get_rule_prefix(rule: Dict[str, Any]) -> str:
+    """
+    Returns the prefix a lifecycle rule applies to.
+    """
+    # Some rules use 'Filter' while older ones use 'Prefix'
+    if 'Prefix' in rule:
+        # Old-style rule with direct Prefix
+        return rule['Prefix']
+    if 'Filter' in rule:
+        filter_obj = rule['Filter']
+        if 'Prefix' in filter_obj:
+            # Filter with direct Prefix
+            return filter_obj['Prefix']
+        if 'And' in filter_obj and 'Prefix' in filter_obj['And']:
+            # Filter with And containing Prefix (e.g., when combined with Tags)
+            return filter_obj['And']['Prefix']
+    return ''
+
+
+def fetch_bucket_lifecycle_rules(bucket_name: str, s3_client=None) -> List[Dict[str, Any]]:
+    """
+    Returns the lifecycle rules of a bucket, fetched once per process.
+    """
+    with _bucket_rules_cache_lock:
+        if bucket_name in _bucket_rules_cache:
+            return _bucket_rules_cache[bucket_name]
+
+    s3 = s3_client or get_client('s3')
+    try:
+        response = s3.get_bucket_lifecycle_configuration(Bucket=bucket_name)
+        rules = response.get('Rules', [])
+    except s3.exceptions.ClientError as e:
+        if e.response['Error']['Code'] == 'NoSuchLifecycleConfiguration':
+            logging.info(f"No lifecycle configuration found for bucket '{bucket_name}'.")
+            rules = []
+        else:
+            raise
+
+    with _bucket_rules_cache_lock:
+        _bucket_rules_cache[bucket_name] = rules
+
+    return rules
+
+
+class _TrieNode:
+    __slots__ = ('children', 'rules', 'max_expiration_days')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.rules: List[Dict[str, Any]] = []
+        self.max_expiration_days: Optional[int] = None  ## max Expiration.Days of the rules in the subtree
+
+
+class LifecycleIndex:
+    """
+    Prefix trie over the lifecycle rules of a bucket.
+
+    A table prefix matches the rules whose prefix starts with it, i.e. the rules stored in the
+    subtree of the node reached by walking the table prefix. Each node keeps the max expiration
+    days of its subtree, so resolving a table retention costs O(len(prefix)).
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]]):
+        self._root = _TrieNode()
+        for rule in rules:
+            if any(marker in rule.get('ID', '') for marker in EXCLUDED_RULE_ID_MARKERS):
+                continue
+            node = self._root
+            for char in get_rule_prefix(rule):
+                node = node.children.setdefault(char, _TrieNode())
+            node.rules.append(rule)
+        self._compute_max_expiration_days()
+
+    def _compute_max_expiration_days(self) -> None:
+        # iterative post-order walk, rule prefixes may be longer than the recursion limit
+        stack = [(self._root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if not children_done:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.values())
+                continue
+            days = [rule['Expiration']['Days'] for rule in node.rules
+                    if rule.get('Expiration', {}).get('Days') is not None]
+            days.extend(child.max_expiration_days for child in node.children.values()
+                        if child.max_expiration_days is not None)
+            node.max_expiration_days = max(days) if days else None
+
+    def _find(self, prefix: str) -> Optional[_TrieNode]:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def rules_for_prefix(self, prefix: str) -> List[Dict[str, Any]]:
+        """
+        Returns all lifecycle rules that apply to the given prefix.
+        """
+        node = self._find(prefix)
+        if node is None:
+            return []
+        matched_rules = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            matched_rules.extend(node.rules)
+            stack.extend(node.children.values())
+        return matched_rules
+
+    def max_expiration_days(self, prefix: str) -> Optional[int]:
+        """
+        Returns the max Expiration.Days of the rules that apply to the given prefix, None if there are none.
+        """
+        node = self._find(prefix)
+        return node.max_expiration_days if node is not None else None
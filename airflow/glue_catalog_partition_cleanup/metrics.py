@@ -0,0 +1,222 @@
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]  ## histogram upper bounds
+STATSD_HOST = os.environ.get('GLUE_CLEANUP_STATSD_HOST')  ## StatsD sink, disabled when not set
+STATSD_PORT = int(os.environ.get('GLUE_CLEANUP_STATSD_PORT', 8125))
+STATSD_PREFIX = os.environ.get('GLUE_CLEANUP_STATSD_PREFIX', 'glue_catalog_partition_cleanup')
+
+
+def _metric_name_part(value: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_-]', '_', value)
+
+
+class LatencyHistogram:
+    """
+    Thread safe latency histogram over LATENCY_BUCKETS_MS buckets (the last one is unbounded).
+    """
+
+    def __init__(self):
+        self._counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._count = 0
+        self._sum_ms = 0.0
+        self._max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        latency_ms = seconds * 1000
+        with self._lock:
+            self._counts[bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+            self._count += 1
+            self._sum_ms += latency_ms
+            self._max_ms = max(self._max_ms, latency_ms)
+
+    def _percentile(self, counts: List[int], count: int, percentile: float) -> float:
+        # upper bound of the bucket holding the percentile
+        rank = percentile * count
+        seen = 0
+        for i, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= rank:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self._max_ms
+        return self._max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = list(self._counts)
+            count = self._count
+            sum_ms = self._sum_ms
+            max_ms = self._max_ms
+        if not count:
+            return {'count': 0}
+        return {
+            'count': count,
+            'avg_ms': round(sum_ms / count, 1),
+            'p50_ms': self._percentile(counts, count, 0.5),
+            'p90_ms': self._percentile(counts, count, 0.9),
+            'p99_ms': self._percentile(counts, count, 0.99),
+            'max_ms': round(max_ms, 1),
+            'buckets': {
+                (f'le_{LATENCY_BUCKETS_MS[i]}' if i < len(LATENCY_BUCKETS_MS) else 'inf'): bucket_count
+                for i, bucket_count in enumerate(counts) if bucket_count
+            },
+        }
+
+
+class StatsdClient:
+    """
+    Minimal fire-and-forget StatsD client (UDP, plain StatsD line protocol).
+    """
+
+    def __init__(self, host: str, port: int = 8125, prefix: str = STATSD_PREFIX):
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _send(self, name: str, value, metric_type: str) -> None:
+        try:
+            self._socket.sendto(f"{self.prefix}.{name}:{value}|{metric_type}".encode('utf-8'), self.address)
+        except OSError as e:
+            # metrics must never fail a task
+            logging.debug(f"Failed to send metric {name}: {e}")
+
+    def timing(self, name: str, milliseconds: float) -> None:
+        self._send(name, round(milliseconds, 3), 'ms')
+
+    def incr(self, name: str, value: int = 1) -> None:
+        self._send(name, value, 'c')
+
+    def gauge(self, name: str, value: float) -> None:
+        self._send(name, round(value, 3), 'g')
+
+
+_statsd_client: Optional[StatsdClient] = None
+_statsd_client_lock = threading.Lock()
+
+
+def get_statsd_client() -> Optional[StatsdClient]:
+    """
+    Returns the process StatsD client, None when GLUE_CLEANUP_STATSD_HOST is not set.
+    """
+    global _statsd_client
+    if not STATSD_HOST:
+        return None
+    with _statsd_client_lock:
+        if _statsd_client is None:
+            _statsd_client = StatsdClient(STATSD_HOST, STATSD_PORT)
+        return _statsd_client
+
+
+class TaskMetrics:
+    """
+    Per task (and table) metrics: stage timers, counters and partitions per second rates,
+    reported to the logs and to the StatsD sink, together with the API call counts and
+    latency histograms of the throttled clients.
+
+    Usage:
+        metrics = TaskMetrics('list_old_partitions', full_table_name)
+        with metrics.stage('scan'):
+            ...
+        metrics.count('stale_partitions', stale_count)
+        metrics.rate('scanned_partitions_per_second', total_partitions, 'scan')
+        metrics.report()
+    """
+
+    def __init__(self, task: str, full_table_name: Optional[str] = None, statsd_client: Optional[StatsdClient] = None):
+        self.task = task
+        self.full_table_name = full_table_name
+        self.statsd_client = statsd_client if statsd_client is not None else get_statsd_client()
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.rates: Dict[str, float] = {}
+        self._started_at = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def rate(self, name: str, count: int, stage: str) -> None:
+        """
+        Record `count` per second of the time spent in `stage`.
+        """
+        seconds = self.stages.get(stage)
+        if seconds:
+            self.rates[name] = count / seconds
+
+    def _metric_path(self, name: str) -> str:
+        parts = [self.task]
+        if self.full_table_name:
+            parts.append(self.full_table_name)
+        parts.append(name)
+        return '.'.join(_metric_name_part(part) for part in parts)
+
+    def report(self, rate_limiters: Iterable[Any] = ()) -> Dict[str, Any]:
+        """
+        Log the metrics and send them to StatsD, with the API calls counters and latencies
+        of the given throttled_client rate limiters.
+
+        Returns:
+            The metrics summary
+        """
+        summary = {
+            'task': self.task,
+            'table': self.full_table_name,
+            'total_seconds': round(time.perf_counter() - self._started_at, 3),
+            'stages_seconds': {name: round(seconds, 3) for name, seconds in self.stages.items()},
+            'counters': dict(self.counters),
+            'rates': {name: round(value, 1) for name, value in self.rates.items()},
+            'api_calls': {},
+        }
+        for rate_limiter in rate_limiters:
+            for operation_name, stats in rate_limiter.stats().items():
+                summary['api_calls'][f'{rate_limiter.name}.{operation_name}'] = stats
+
+        logging.info(f"Metrics of {self.task}{' for ' + self.full_table_name if self.full_table_name else ''}:")
+        for name, seconds in summary['stages_seconds'].items():
+            logging.info(f"  stage {name}: {seconds}s")
+        for name, value in summary['counters'].items():
+            logging.info(f"  {name}: {value}")
+        for name, value in summary['rates'].items():
+            logging.info(f"  {name}: {value}")
+        for name, stats in summary['api_calls'].items():
+            logging.info(f"  {name}: {stats}")
+
+        if self.statsd_client:
+            statsd = self.statsd_client
+            statsd.timing(self._metric_path('duration'), summary['total_seconds'] * 1000)
+            for name, seconds in self.stages.items():
+                statsd.timing(self._metric_path(f'stage.{name}'), seconds * 1000)
+            for name, value in self.counters.items():
+                statsd.incr(self._metric_path(name), value)
+            for name, value in self.rates.items():
+                statsd.gauge(self._metric_path(name), value)
+            for name, stats in summary['api_calls'].items():
+                api_name = _metric_name_part(name)
+                # API counters are cumulative for the worker process
+                statsd.gauge(f'api.{api_name}.calls', stats['calls'])
+                statsd.gauge(f'api.{api_name}.throttles', stats['throttles'])
+                statsd.gauge(f'api.{api_name}.transient_errors', stats['transient_errors'])
+                statsd.gauge(f'api.{api_name}.rate', stats['rate'])
+                for percentile in ['p50_ms', 'p90_ms', 'p99_ms']:
+                    if percentile in stats['latency']:
+                        statsd.gauge(f'api.{api_name}.latency.{percentile}', stats['latency'][percentile])
+
+        return summary
@@ -0,0 +1,244 @@
+import logging
+from datetime import date
+from itertools import compress
+from operator import itemgetter
+from typing import List, Dict, Optional, Sequence, Tuple
+
+
+DATE_KEY_NAMES = ['date', 'dt', 'partition_date', 'impression_date']  ## single key holding a 'YYYY-MM-DD' value
+DATE_PART_KEY_NAMES = ['year', 'month', 'day', 'hour', 'minute', 'second']
+
+# Ordinal multipliers (YYYYMMDD) and valid ranges of the partition parts deciding a date comparison
+_DATE_PARTS = [
+    ('year', 10000, 1000, 9999),
+    ('month', 100, 1, 12),
+    ('day', 1, 1, 31),
+]
+
+
+def extract_partition_date(partition_keys: List[Dict], partition_values: List[str]) -> str:
+    """
+    Extract date string from partition values based on partition key structure.
+
+    Reference (string based) implementation, PartitionDateExtractor compiles the same rules per table.
+    """
+    partition_date = ''
+
+    # Check if partition keys contain year, month, and day
+    for i, key_info in enumerate(partition_keys):
+        key_name = key_info['Name']
+
+        if i < len(partition_values):
+            value = partition_values[i]
+
+            if key_name == 'year':
+                partition_date += f'{value}'
+            elif key_name in ['month', 'day', 'hour', 'minute', 'second']:
+                partition_date += f'-{value.zfill(2)}'  # Pad with zero if needed
+            elif key_name in DATE_KEY_NAMES:  # Other common date partition names
+                partition_date = value
+                break
+
+    return partition_date
+
+
+def stale_date_ordinal(stale_date: str) -> int:
+    """
+    'YYYY-MM-DD' cutoff as a YYYYMMDD integer.
+    """
+    year, month, day = stale_date.split('-')
+    return int(year) * 10000 + int(month) * 100 + int(day)
+
+
+class PartitionDateExtractor:
+    """
+    Per-table partition date extractor compiled once from the partition keys schema.
+
+    Partition values are mapped straight to a YYYYMMDD integer ordinal, missing trailing
+    parts count as 0, so comparing the ordinal with stale_date_ordinal() gives the same result
+    as extract_partition_date(...) < stale_date for well formed values (hour and smaller parts
+    never change a comparison with a 'YYYY-MM-DD' cutoff, so they are not read). Values that
+    can't be parsed (non numeric, out of range, not a 'YYYY-MM-DD' calendar date) are reported
+    as malformed.
+
+    Each distinct date of a batch is parsed once (e.g. the hour partitions of a day share it), the
+    extractor keeps no state between batches and is shared by the scan segment threads as is.
+
+    Layouts without a date key or without leading year(/month/day/hour) keys are not compiled,
+    those fall back to the string comparison of extract_partition_date.
+    """
+
+    def __init__(self, partition_keys: List[Dict]):
+        self.partition_keys = partition_keys
+        key_names = [key_info['Name'] for key_info in partition_keys]
+
+        self._date_key_index: Optional[int] = None
+        self._parts: List[Tuple[int, int, int]] = []  ## (multiplier, min, max) of the date parts
+        indexes = []
+
+        date_key_indexes = [i for i, name in enumerate(key_names) if name in DATE_KEY_NAMES]
+        part_names = [name for name in key_names if name in DATE_PART_KEY_NAMES]
+
+        if date_key_indexes:
+            # the first date key overrides the parts before it
+            self._date_key_index = date_key_indexes[0]
+            indexes = [self._date_key_index]
+        elif part_names and part_names == DATE_PART_KEY_NAMES[:len(part_names)]:
+            # leading year(/month/day) parts
+            for name, multiplier, minimum, maximum in _DATE_PARTS:
+                if name in key_names:
+                    indexes.append(key_names.index(name))
+                    self._parts.append((multiplier, minimum, maximum))
+
+        self.compiled = bool(indexes)
+        self._date_values = itemgetter(*indexes) if indexes else None
+        self._min_values = max(indexes) + 1 if indexes else 0
+
+    def _parse_date_value(self, value: str) -> int:
+        if value[4:5] != '-' or value[7:8] != '-' or value[10:11] not in ('', ' ', 'T', '-'):
+            raise ValueError(f"not a 'YYYY-MM-DD' date: {value!r}")
+        # C level parsing, raises ValueError on non numeric and out of range values
+        parsed = date.fromisoformat(value[:10])
+        return parsed.year * 10000 + parsed.month * 100 + parsed.day
+
+    def _parse_date_parts(self, values: Sequence[str]) -> int:
+        ordinal = 0
+        for value, (multiplier, minimum, maximum) in zip(values, self._parts):
+            if not value.isdigit():
+                raise ValueError(f"not a number: {value!r}")
+            part = int(value)
+            if not minimum <= part <= maximum:
+                raise ValueError(f"out of range: {value!r}")
+            ordinal += part * multiplier
+        return ordinal
+
+    def _date_values_ordinal(self, date_values) -> int:
+        if self._date_key_index is not None:
+            return self._parse_date_value(date_values)
+        if len(self._parts) == 1:
+            date_values = (date_values,)
+        return self._parse_date_parts(date_values)
+
+    def ordinal(self, partition_values: Sequence[str]) -> int:
+        """
+        Returns the YYYYMMDD ordinal of the partition values, raises ValueError if malformed.
+        """
+        if not self.compiled:
+            raise ValueError(f"partition layout is not supported: {[key['Name'] for key in self.partition_keys]}")
+        try:
+            date_values = self._date_values(partition_values)
+        except IndexError:
+            raise ValueError(f"missing partition values: {partition_values!r}")
+        return self._date_values_ordinal(date_values)
+
+    def split_stale(self, partitions_values: Sequence[Sequence[str]], stale_date: str,
+                    min_date: Optional[str] = None) -> Tuple[List[Sequence[str]], List[Sequence[str]]]:
+        """
+        Classify a batch of partition values against the stale date cutoff, keeping only
+        partitions on or after `min_date` when given.
+
+        Returns:
+            Tuple of (stale partition values, malformed partition values)
+        """
+        if not self.compiled:
+            stale = []
+            for values in partitions_values:
+                partition_date = extract_partition_date(self.partition_keys, values)
+                if partition_date and partition_date < stale_date and (not min_date or partition_date >= min_date):
+                    stale.append(values)
+            return stale, []
+
+        try:
+            date_values = list(map(self._date_values, partitions_values))
+        except IndexError:
+            # some partitions miss values, classify the complete ones and report the others
+            complete = [values for values in partitions_values if len(values) >= self._min_values]
+            stale, malformed = self.split_stale(complete, stale_date, min_date)
+            malformed.extend(values for values in partitions_values if len(values) < self._min_values)
+            return stale, malformed
+
+        cutoff = stale_date_ordinal(stale_date)
+        # each distinct date of the batch is parsed once, malformed ones take the cutoff (never stale)
+        ordinals = {}
+        malformed_dates = set()
+        for date_value in set(date_values):
+            try:
+                ordinals[date_value] = self._date_values_ordinal(date_value)
+            except ValueError:
+                ordinals[date_value] = cutoff
+                malformed_dates.add(date_value)
+
+        # the per-partition work stays in C level map/compress calls
+        partition_ordinals = list(map(ordinals.__getitem__, date_values))
+        if min_date:
+            lower = stale_date_ordinal(min_date)
+            stale = list(compress(partitions_values, [lower <= partition_ordinal < cutoff for partition_ordinal in partition_ordinals]))
+        else:
+            stale = list(compress(partitions_values, map(cutoff.__gt__, partition_ordinals)))
+        malformed = []
+        if malformed_dates:
+            malformed = [values for values, date_value in zip(partitions_values, date_values) if date_value in malformed_dates]
+
+        return stale, malformed
+
+
+if __name__ == '__main__':
+    # Benchmark: per-partition extract_partition_date filtering (as list_old_partitions did it) vs
+    # PartitionDateExtractor batches, on 1M synthetic partitions in GetPartitions pages of 1000.
+    # Measured 0.7x-2.1x depending on the layout, far from the 5x first aimed at: the string baseline
+    # is already cheap per partition and doesn't validate the dates, the extractor parses every distinct
+    # date of a batch to report the malformed ones.
+    import random
+    import time
+
+    logging.basicConfig(level=logging.INFO)
+
+    PARTITIONS = 1000000
+    PAGE_SIZE = 1000
+    STALE_DATE = '2024-06-15'
+
+    layouts = {
+        'tile_granularity/year/month/day/hour': (
+            [{'Name': name} for name in ['tile_granularity', 'year', 'month', 'day', 'hour']],
+            lambda d, h: ['HOURLY', d[:4], d[5:7], d[8:10], f'{h:02d}'],
+        ),
+        'year/month/day': (
+            [{'Name': name} for name in ['year', 'month', 'day']],
+            lambda d, h: [d[:4], d[5:7], d[8:10]],
+        ),
+        'dt': (
+            [{'Name': 'dt'}],
+            lambda d, h: [d],
+        ),
+    }
+
+    random.seed(0)
+    dates = [f'{random.randint(2022, 2025)}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}' for _ in range(1000)]
+
+    for layout_name, (partition_keys, make_values) in layouts.items():
+        pages = [
+            [{'Values': make_values(random.choice(dates), random.randint(0, 23))} for _ in range(PAGE_SIZE)]
+            for _ in range(PARTITIONS // PAGE_SIZE)
+        ]
+
+        started = time.perf_counter()
+        reference = []
+        for page in pages:
+            for partition in page:
+                partition_date = extract_partition_date(partition_keys, partition['Values'])
+                if partition_date and partition_date < STALE_DATE:
+                    reference.append(partition['Values'])
+        reference_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        extractor = PartitionDateExtractor(partition_keys)
+        get_values = itemgetter('Values')
+        stale = []
+        for page in pages:
+            page_stale, malformed = extractor.split_stale(list(map(get_values, page)), STALE_DATE)
+            stale.extend(page_stale)
+        compiled_seconds = time.perf_counter() - started
+
+        assert stale == reference and not malformed
+        logging.info(f"{layout_name}: {PARTITIONS} partitions, extract_partition_date {reference_seconds:.2f}s, "
+                     f"PartitionDateExtractor {compiled_seconds:.2f}s ({reference_seconds / compiled_seconds:.1f}x)")
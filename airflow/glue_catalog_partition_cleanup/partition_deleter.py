@@ -0,0 +1,142 @@
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple
+
+
+BATCH_DELETE_SIZE = 25  ## max partitions per BatchDeletePartition call (Glue limit)
+DELETE_MAX_WORKERS = 8  ## concurrent BatchDeletePartition calls per table
+DELETE_MAX_ATTEMPTS = 5  ## attempts per batch, including retries of partial failures
+DELETE_BACKOFF_BASE_SECONDS = 1
+
+# Error codes returned per-partition in BatchDeletePartition 'Errors' (or raised for the whole call)
+# that are worth retrying. Anything else (e.g. EntityNotFoundException) is counted as an error.
+RETRYABLE_ERROR_CODES = {
+    'ThrottlingException',
+    'InternalServiceException',
+    'OperationTimeoutException',
+    'ConcurrentModificationException',
+    'ResourceNumberLimitExceededException',
+}
+
+
+def chunk_partitions(partitions: Iterable[Dict[str, Any]], size: int = BATCH_DELETE_SIZE) -> Iterable[List[List[str]]]:
+    """
+    Group partitions into lists of partition values of at most `size` entries.
+    """
+    batch = []
+    for partition_info in partitions:
+        batch.append(partition_info['values'])
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _backoff(attempt: int) -> None:
+    """Sleep with full jitter exponential backoff."""
+    time.sleep(random.uniform(0, DELETE_BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+
+def _error_code(error: Exception) -> str:
+    response = getattr(error, 'response', None) or {}
+    return response.get('Error', {}).get('Code', '')
+
+
+def delete_partition_batch(glue_client, database: str, table: str, partition_values: List[List[str]],
+                           max_attempts: int = DELETE_MAX_ATTEMPTS) -> Tuple[List[List[str]], List[Tuple[List[str], str]]]:
+    """
+    Delete one batch of partitions with BatchDeletePartition, retrying the partitions that
+    come back in the response 'Errors' with a retryable error code.
+
+    Returns:
+        Tuple of (deleted partition values, [(partition values, error code)] of failed partitions)
+    """
+    full_table_name = f"{database}.{table}"
+    pending = partition_values
+    deleted = []
+    failed = []
+
+    for attempt in range(max_attempts):
+        try:
+            response = glue_client.batch_delete_partition(
+                DatabaseName=database,
+                TableName=table,
+                PartitionsToDelete=[{'Values': values} for values in pending]
+            )
+        except Exception as e:
+            if _error_code(e) in RETRYABLE_ERROR_CODES and attempt < max_attempts - 1:
+                logging.warning(f"Retrying batch of {len(pending)} partitions for {full_table_name} "
+                                f"(attempt {attempt + 1}/{max_attempts}): {e}")
+                _backoff(attempt)
+                continue
+            logging.error(f"Error deleting batch of {len(pending)} partitions from {full_table_name}: {e}")
+            failed.extend((values, _error_code(e)) for values in pending)
+            return deleted, failed
+
+        retry = []
+        errored = set()
+        for error in response.get('Errors', []):
+            values = error['PartitionValues']
+            error_detail = error.get('ErrorDetail', {})
+            errored.add(tuple(values))
+            if error_detail.get('ErrorCode') in RETRYABLE_ERROR_CODES and attempt < max_attempts - 1:
+                retry.append(values)
+            else:
+                failed.append((values, error_detail.get('ErrorCode', '')))
+                logging.error(f"Error deleting partition {values} from {full_table_name}: "
+                              f"{error_detail.get('ErrorCode')} - {error_detail.get('ErrorMessage')}")
+
+        deleted.extend(values for values in pending if tuple(values) not in errored)
+
+        if not retry:
+            return deleted, failed
+
+        logging.warning(f"Retrying {len(retry)} partially failed partitions for {full_table_name} "
+                        f"(attempt {attempt + 1}/{max_attempts})")
+        pending = retry
+        _backoff(attempt)
+
+    return deleted, failed
+
+
+def delete_partitions(glue_client, database: str, table: str, partitions: Iterable[Dict[str, Any]],
+                      max_workers: int = DELETE_MAX_WORKERS,
+                      on_batch_result: Optional[Callable[[List[List[str]], List[Tuple[List[str], str]]], None]] = None) -> Tuple[int, int]:
+    """
+    Delete partitions in batches of BATCH_DELETE_SIZE fanned out over a bounded thread pool.
+    Only a bounded number of batches is queued at a time, so `partitions` may be a lazy iterable.
+
+    `on_batch_result(deleted, failed)` is called with every batch outcome, from the calling thread.
+
+    Returns:
+        Tuple of (deleted_count, error_count) for the table
+    """
+    full_table_name = f"{database}.{table}"
+    total_deleted = 0
+    total_errors = 0
+
+    def _collect(future):
+        nonlocal total_deleted, total_errors
+        deleted, failed = future.result()
+        total_deleted += len(deleted)
+        total_errors += len(failed)
+        if on_batch_result:
+            on_batch_result(deleted, failed)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = set()
+        for batch in chunk_partitions(partitions):
+            in_flight.add(executor.submit(delete_partition_batch, glue_client, database, table, batch))
+            if len(in_flight) >= max_workers * 2:
+                done = next(as_completed(in_flight))
+                in_flight.remove(done)
+                _collect(done)
+        for future in as_completed(in_flight):
+            _collect(future)
+
+    logging.info(f"Deleted {total_deleted} partitions from {full_table_name} ({total_errors} errors)")
+
+    return total_deleted, total_errors
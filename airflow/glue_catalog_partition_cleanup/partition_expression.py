@@ -0,0 +1,133 @@
+import logging
+from typing import List, Dict, Optional
+
+from glue_catalog_partition_cleanup.partition_date import DATE_KEY_NAMES, DATE_PART_KEY_NAMES
+
+
+STRING_KEY_TYPES = ['string', 'varchar', 'char']
+INTEGER_KEY_TYPES = ['int', 'integer', 'bigint', 'smallint', 'tinyint']
+MAX_EXPRESSION_LENGTH = 2048  ## Glue GetPartitions Expression length limit
+
+
+def _key_type(key_info: Dict) -> str:
+    # varchar(10) / char(2) -> varchar / char
+    return key_info.get('Type', 'string').split('(')[0].lower()
+
+
+def _less_than(key_name: str, key_type: str, value: int, width: int) -> str:
+    """
+    Expression for `key < value`. String keys are matched with an IN list holding both the
+    zero padded and unpadded form of every smaller value, the same way extract_partition_date
+    pads them before comparing.
+    """
+    if key_type in INTEGER_KEY_TYPES:
+        return f"{key_name} < {value}"
+    candidates = []
+    for smaller in range(value):
+        candidates.append(f"'{str(smaller).zfill(width)}'")
+        if len(str(smaller)) < width:
+            candidates.append(f"'{smaller}'")
+    return f"{key_name} IN ({', '.join(candidates)})"
+
+
+def _equals(key_name: str, key_type: str, value: int, width: int) -> str:
+    if key_type in INTEGER_KEY_TYPES:
+        return f"{key_name} = {value}"
+    padded = str(value).zfill(width)
+    if padded == str(value):
+        return f"{key_name} = '{padded}'"
+    return f"{key_name} IN ('{padded}', '{value}')"
+
+
+def _at_least(key_name: str, key_type: str, value: int, width: int, maximum: int) -> Optional[str]:
+    """
+    Expression for `key >= value`, None when no valid value is left (value > maximum).
+    """
+    if key_type in INTEGER_KEY_TYPES:
+        return f"{key_name} >= {value}"
+    if value > maximum:
+        return None
+    candidates = []
+    for larger in range(value, maximum + 1):
+        candidates.append(f"'{str(larger).zfill(width)}'")
+        if len(str(larger)) < width:
+            candidates.append(f"'{larger}'")
+    return f"{key_name} IN ({', '.join(candidates)})"
+
+
+def _date_parts_at_least(key_types: Dict[str, str], min_date: str) -> str:
+    """
+    Expression for year/month/day on or after `min_date` ('YYYY-MM-DD').
+    """
+    min_year, min_month, min_day = (int(part) for part in min_date.split('-'))
+
+    if key_types['year'] in INTEGER_KEY_TYPES:
+        year_greater, year_equals = f"year > {min_year}", f"year = {min_year}"
+    else:
+        year_greater, year_equals = f"year > '{min_year}'", f"year = '{min_year}'"
+
+    month_day = (f"{_equals('month', key_types['month'], min_month, 2)} AND "
+                 f"{_at_least('day', key_types['day'], min_day, 2, 31)}")
+    month_greater = _at_least('month', key_types['month'], min_month + 1, 2, 12)
+    if month_greater:
+        month_day = f"{month_greater} OR ({month_day})"
+
+    return f"{year_greater} OR ({year_equals} AND ({month_day}))"
+
+
+def build_stale_partition_expression(partition_keys: List[Dict], stale_date: str,
+                                     min_date: Optional[str] = None) -> Optional[str]:
+    """
+    Build a Glue GetPartitions Expression selecting the partitions extract_partition_date
+    considers older than `stale_date` ('YYYY-MM-DD'), and on or after `min_date` when given.
+
+    Supported layouts:
+        - a single date key (dt, date, partition_date, ...) of a string type
+        - year / month / day keys (optionally followed by hour/minute/second) of string or integer types
+
+    Returns:
+        The expression, or None when the layout can't be expressed and partitions must be
+        filtered in Python only.
+    """
+    keys_by_name = {key_info['Name']: key_info for key_info in partition_keys}
+
+    # extract_partition_date returns the first date key value as is, so it can be compared as a string
+    for key_info in partition_keys:
+        if key_info['Name'] in DATE_KEY_NAMES:
+            if _key_type(key_info) not in STRING_KEY_TYPES:
+                return None
+            if min_date:
+                return f"{key_info['Name']} >= '{min_date}' AND {key_info['Name']} < '{stale_date}'"
+            return f"{key_info['Name']} < '{stale_date}'"
+
+    date_part_keys = [key_info['Name'] for key_info in partition_keys if key_info['Name'] in DATE_PART_KEY_NAMES]
+    if date_part_keys[:3] != ['year', 'month', 'day']:
+        return None
+
+    key_types = {name: _key_type(keys_by_name[name]) for name in ['year', 'month', 'day']}
+    if any(key_type not in STRING_KEY_TYPES + INTEGER_KEY_TYPES for key_type in key_types.values()):
+        return None
+
+    stale_year, stale_month, stale_day = (int(part) for part in stale_date.split('-'))
+
+    if key_types['year'] in INTEGER_KEY_TYPES:
+        year_less, year_equals = f"year < {stale_year}", f"year = {stale_year}"
+    else:
+        # year values are compared unpadded by extract_partition_date
+        year_less, year_equals = f"year < '{stale_year}'", f"year = '{stale_year}'"
+
+    expression = (
+        f"{year_less} OR ({year_equals} AND ("
+        f"{_less_than('month', key_types['month'], stale_month, 2)} OR ("
+        f"{_equals('month', key_types['month'], stale_month, 2)} AND "
+        f"{_less_than('day', key_types['day'], stale_day, 2)})))"
+    )
+
+    if min_date:
+        expression = f"({expression}) AND ({_date_parts_at_least(key_types, min_date)})"
+
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        logging.warning(f"Partition expression exceeds {MAX_EXPRESSION_LENGTH} characters, filtering in Python only")
+        return None
+
+    return expression
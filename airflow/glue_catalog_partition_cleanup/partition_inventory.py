@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from glue_catalog_partition_cleanup.partition_manifest import read_bytes, write_bytes, uri_exists, join_uri, safe_path_part
+
+
+FULL_RECONCILIATION_DAYS = 7  ## force a full partitions scan when the last one is older than this
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    stale_date TEXT NOT NULL,      -- partitions before this date were stale
+    min_date TEXT,                 -- scan lower bound, NULL for a full scan
+    full_scan INTEGER NOT NULL,
+    stale_count INTEGER,
+    deleted_count INTEGER,
+    error_count INTEGER,
+    completed INTEGER NOT NULL DEFAULT 0,
+    listed_at TEXT,
+    completed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS partitions (
+    partition_values TEXT PRIMARY KEY,  -- JSON list of the partition values
+    partition_date INTEGER,             -- YYYYMMDD ordinal, NULL when it can't be extracted
+    status TEXT NOT NULL,               -- failed (deleted and missing partitions are not kept)
+    error_code TEXT,
+    run_id TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS partitions_status_date ON partitions (status, partition_date);
+"""
+
+
+def inventory_uri(root: str, full_table_name: str) -> str:
+    return join_uri(root, f"{safe_path_part(full_table_name)}.sqlite")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class PartitionInventory:
+    """
+    Persisted per-table partition inventory (SQLite snapshot on S3 or local storage).
+
+    Records every cleanup run cutoff and the partitions that failed to be deleted, so a run
+    only needs to scan the partitions dated between the last completed run cutoff and its own,
+    plus retry the partitions earlier runs failed to delete. Deleted partitions are not kept,
+    the snapshot (downloaded and uploaded by every task) doesn't grow with the deletions.
+
+    Usage:
+        with PartitionInventory(uri) as inventory:
+            ...
+    The snapshot is downloaded on enter and uploaded back on a clean exit.
+    """
+
+    def __init__(self, uri: str):
+        self.uri = uri
+        self._local_path = None
+        self.connection: Optional[sqlite3.Connection] = None
+
+    def __enter__(self) -> 'PartitionInventory':
+        fd, self._local_path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        if uri_exists(self.uri):
+            with open(self._local_path, 'wb') as f:
+                f.write(read_bytes(self.uri))
+        else:
+            logging.info(f"No partition inventory found at {self.uri}, starting a new one")
+        self.connection = sqlite3.connect(self._local_path)
+        self.connection.executescript(_SCHEMA)
+        # snapshots written before only failed partitions were kept
+        if self.connection.execute("DELETE FROM partitions WHERE status != 'failed'").rowcount:
+            self.connection.commit()
+            self.connection.execute("VACUUM")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.connection.commit()
+            self.connection.close()
+            if exc_type is None:
+                with open(self._local_path, 'rb') as f:
+                    write_bytes(self.uri, f.read())
+        finally:
+            os.remove(self._local_path)
+
+    def last_completed_run(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the completed run with the latest cutoff, None if no run completed yet.
+        """
+        row = self.connection.execute(
+            "SELECT run_id, stale_date, full_scan, completed_at FROM runs WHERE completed = 1 "
+            "ORDER BY stale_date DESC, completed_at DESC LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        return {'run_id': row[0], 'stale_date': row[1], 'full_scan': bool(row[2]), 'completed_at': row[3]}
+
+    def last_full_scan_at(self) -> Optional[str]:
+        row = self.connection.execute(
+            "SELECT MAX(completed_at) FROM runs WHERE completed = 1 AND full_scan = 1"
+        ).fetchone()
+        return row[0] if row else None
+
+    def scan_lower_bound(self, stale_date: str, force_full_scan: bool = False) -> Optional[str]:
+        """
+        Returns the date the scan of this run can start from, None when a full scan is needed
+        (no completed run yet, forced, or the last full reconciliation is too old).
+        """
+        if force_full_scan:
+            return None
+        last_run = self.last_completed_run()
+        last_full_scan_at = self.last_full_scan_at()
+        if last_run is None or last_full_scan_at is None:
+            return None
+        if (datetime.now(timezone.utc) - datetime.fromisoformat(last_full_scan_at)).days >= FULL_RECONCILIATION_DAYS:
+            return None
+        return min(last_run['stale_date'], stale_date)
+
+    def start_run(self, run_id: str, stale_date: str, min_date: Optional[str], stale_count: int) -> None:
+        self.connection.execute(
+            "INSERT OR REPLACE INTO runs (run_id, stale_date, min_date, full_scan, stale_count, completed, listed_at) "
+            "VALUES (?, ?, ?, ?, ?, 0, ?)",
+            (run_id, stale_date, min_date, int(min_date is None), stale_count, _now())
+        )
+
+    def complete_run(self, run_id: str, deleted_count: int, error_count: int) -> None:
+        self.connection.execute(
+            "UPDATE runs SET deleted_count = ?, error_count = ?, completed = 1, completed_at = ? WHERE run_id = ?",
+            (deleted_count, error_count, _now(), run_id)
+        )
+
+    def failed_partitions(self, before_date: int) -> Iterator[List[str]]:
+        """
+        Partitions earlier runs failed to delete, dated before `before_date` (YYYYMMDD ordinal),
+        i.e. outside of the range the incremental scan reads again.
+        """
+        cursor = self.connection.execute(
+            "SELECT partition_values FROM partitions WHERE status = 'failed' "
+            "AND (partition_date IS NULL OR partition_date < ?)",
+            (before_date,)
+        )
+        for (partition_values,) in cursor:
+            yield json.loads(partition_values)
+
+    def record_deletions(self, run_id: str, deleted: List[Tuple[List[str], Optional[int]]],
+                         failed: List[Tuple[List[str], Optional[int], str]]) -> None:
+        """
+        Record the outcome of deleted [(values, partition date)] and failed [(values, partition date, error code)]
+        partitions: failed ones are kept to be retried, deleted ones and EntityNotFoundException failures
+        (already gone) are removed from the failed partitions.
+        """
+        updated_at = _now()
+        gone = [(json.dumps(values),) for values, _ in deleted]
+        gone.extend((json.dumps(values),) for values, _, error_code in failed if error_code == 'EntityNotFoundException')
+        self.connection.executemany("DELETE FROM partitions WHERE partition_values = ?", gone)
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO partitions (partition_values, partition_date, status, error_code, run_id, updated_at) "
+            "VALUES (?, ?, 'failed', ?, ?, ?)",
+            [(json.dumps(values), partition_date, error_code, run_id, updated_at)
+             for values, partition_date, error_code in failed if error_code != 'EntityNotFoundException']
+        )
@@ -0,0 +1,169 @@
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Iterator, Optional
+
+from glue_catalog_partition_cleanup.clients import get_client
+
+
+MANIFEST_CHUNK_SIZE = 50000  ## partitions per compressed manifest chunk file
+MANIFEST_RETENTION_DAYS = 7  ## manifests left behind by failed runs are deleted after this
+S3_DELETE_BATCH_SIZE = 1000  ## keys per DeleteObjects call
+
+
+def _split_s3_uri(uri: str):
+    bucket, _, key = uri[len('s3://'):].partition('/')
+    return bucket, key
+
+
+def join_uri(root: str, *parts: str) -> str:
+    return '/'.join([root.rstrip('/')] + [part.strip('/') for part in parts])
+
+
+def safe_path_part(value: str) -> str:
+    """Make run ids / table names safe to use as file names and S3 keys."""
+    return re.sub(r'[^A-Za-z0-9._=-]', '_', value)
+
+
+def write_bytes(uri: str, data: bytes, s3_client=None) -> None:
+    if uri.startswith('s3://'):
+        bucket, key = _split_s3_uri(uri)
+        (s3_client or get_client('s3')).put_object(Bucket=bucket, Key=key, Body=data)
+    else:
+        os.makedirs(os.path.dirname(uri), exist_ok=True)
+        with open(uri, 'wb') as f:
+            f.write(data)
+
+
+def uri_exists(uri: str, s3_client=None) -> bool:
+    if uri.startswith('s3://'):
+        s3 = s3_client or get_client('s3')
+        bucket, key = _split_s3_uri(uri)
+        try:
+            s3.head_object(Bucket=bucket, Key=key)
+        except s3.exceptions.ClientError as e:
+            if e.response['Error']['Code'] in ['404', 'NoSuchKey', 'NotFound']:
+                return False
+            raise
+        return True
+    return os.path.exists(uri)
+
+
+def read_bytes(uri: str, s3_client=None) -> bytes:
+    if uri.startswith('s3://'):
+        bucket, key = _split_s3_uri(uri)
+        return (s3_client or get_client('s3')).get_object(Bucket=bucket, Key=key)['Body'].read()
+    with open(uri, 'rb') as f:
+        return f.read()
+
+
+def manifest_uri(root: str, run_id: str, full_table_name: str) -> str:
+    """
+    Location of a table's manifest for a DAG run: <root>/<run_id>/<database.table>
+    """
+    return join_uri(root, safe_path_part(run_id), safe_path_part(full_table_name))
+
+
+class ManifestWriter:
+    """
+    Stream partitions into gzip compressed JSON lines chunk files under a manifest location
+    (s3://bucket/prefix or a local directory). Only one chunk is held in memory at a time.
+    Thread safe, so concurrently scanned segments can share a writer.
+    """
+
+    def __init__(self, uri: str, chunk_size: int = MANIFEST_CHUNK_SIZE, s3_client=None):
+        self.uri = uri
+        self.chunk_size = chunk_size
+        self.s3_client = s3_client or (get_client('s3') if uri.startswith('s3://') else None)
+        self._buffer: List[Dict[str, Any]] = []
+        self._chunks: List[str] = []
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def add(self, partition: Dict[str, Any]) -> None:
+        with self._lock:
+            self._buffer.append(partition)
+            self._count += 1
+            if len(self._buffer) >= self.chunk_size:
+                self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        chunk_uri = join_uri(self.uri, f"part-{len(self._chunks):05d}.jsonl.gz")
+        data = gzip.compress(''.join(json.dumps(partition) + '\n' for partition in self._buffer).encode('utf-8'))
+        write_bytes(chunk_uri, data, self.s3_client)
+        self._chunks.append(chunk_uri)
+        self._buffer = []
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Flush the last chunk and return the manifest pointer to pass through XCom.
+        """
+        with self._lock:
+            self._flush()
+            pointer = {
+                'uri': self.uri,
+                'chunks': list(self._chunks),
+                'partition_count': self._count,
+            }
+        logging.info(f"Wrote manifest {self.uri} with {self._count} partitions in {len(self._chunks)} chunks")
+        return pointer
+
+
+def read_manifest(pointer: Optional[Dict[str, Any]], s3_client=None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the partitions of a manifest back, one chunk file in memory at a time.
+    """
+    if not pointer:
+        return
+    if s3_client is None and pointer['uri'].startswith('s3://'):
+        s3_client = get_client('s3')
+    for chunk_uri in pointer['chunks']:
+        for line in gzip.decompress(read_bytes(chunk_uri, s3_client)).decode('utf-8').splitlines():
+            if line:
+                yield json.loads(line)
+
+
+def delete_manifests(root: str, run_id: str, retention_days: int = MANIFEST_RETENTION_DAYS, s3_client=None) -> int:
+    """
+    Delete the manifests of a DAG run (<root>/<run_id>/), and the ones older than retention_days
+    left behind by failed runs (kept meanwhile, to clear and rerun their tasks).
+
+    Returns:
+        The number of manifest chunk files deleted
+    """
+    run_uri = join_uri(root, safe_path_part(run_id))
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    deleted = 0
+    if root.startswith('s3://'):
+        s3 = s3_client or get_client('s3')
+        bucket, prefix = _split_s3_uri(join_uri(root, ''))
+        _, run_prefix = _split_s3_uri(join_uri(run_uri, ''))
+        keys = []
+        for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefix):
+            for s3_object in page.get('Contents', []):
+                if s3_object['Key'].startswith(run_prefix) or s3_object['LastModified'] < cutoff:
+                    keys.append(s3_object['Key'])
+        for start in range(0, len(keys), S3_DELETE_BATCH_SIZE):
+            response = s3.delete_objects(Bucket=bucket, Delete={
+                'Objects': [{'Key': key} for key in keys[start:start + S3_DELETE_BATCH_SIZE]],
+                'Quiet': True
+            })
+            for error in response.get('Errors', []):
+                logging.warning(f"Failed to delete manifest file s3://{bucket}/{error['Key']}: {error.get('Message')}")
+            deleted += min(S3_DELETE_BATCH_SIZE, len(keys) - start) - len(response.get('Errors', []))
+    elif os.path.isdir(root):
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if os.path.isdir(path) and (path == run_uri or os.path.getmtime(path) < time.time() - retention_days * 86400):
+                deleted += sum(len(files) for _, _, files in os.walk(path))
+                shutil.rmtree(path, ignore_errors=True)
+    logging.info(f"Deleted {deleted} manifest files of run {run_id} and of runs older than {retention_days} days under {root}")
+    return deleted
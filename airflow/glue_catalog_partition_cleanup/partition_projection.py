@@ -0,0 +1,461 @@
+"""
+Athena partition projection properties inferred from the catalog partitions of a table.
+
+Tables with a regular calendar layout (the ones aws/s3/generate_partitions_for_table.py registers
+and the cleanup DAG deletes) can drop their catalog partitions for partition projection: Athena
+computes the partitions from table properties instead of listing them from the catalog.
+
+The table definition is resolved like get_table_details does (table_metadata, clients), its
+partitions are scanned once to infer a projection per partition key (date, integer, enum or
+injected) and the storage location template, then scanned again to verify that every catalog
+partition is covered by the projection before the table is switched.
+
+Usage, from the DAGs folder:
+    python -m glue_catalog_partition_cleanup.partition_projection --table stg.events [--region us-east-1] [--role-arn arn:...]
+"""
+import argparse
+import json
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple
+
+from glue_catalog_partition_cleanup.clients import get_client, client_scope
+from glue_catalog_partition_cleanup.partition_date import DATE_KEY_NAMES
+from glue_catalog_partition_cleanup.partition_scanner import scan_table_partitions, MAX_SCAN_SEGMENTS
+from glue_catalog_partition_cleanup.table_metadata import resolve_tables_metadata
+
+
+MAX_ENUM_VALUES = 1000  ## distinct values of a key projected as an enum, more are injected
+INTEGER_RANGE_SPARSITY = 10  ## integer ranges wider than this many times their distinct values are projected as enums
+UNCOVERED_PARTITIONS_SAMPLE = 10  ## uncovered partitions logged and returned per table
+
+# date projection formats: (Athena/Java format, Python format, interval unit, needs a date key name)
+# compact formats look like integers, they are only tried on keys named like a date (DATE_KEY_NAMES)
+DATE_FORMATS = [
+    ('yyyy-MM-dd', '%Y-%m-%d', 'DAYS', False),
+    ('yyyy/MM/dd', '%Y/%m/%d', 'DAYS', False),
+    ('yyyy-MM-dd-HH', '%Y-%m-%d-%H', 'HOURS', False),
+    ("yyyy-MM-dd'T'HH", '%Y-%m-%dT%H', 'HOURS', False),
+    ('yyyy-MM-dd HH:mm:ss', '%Y-%m-%d %H:%M:%S', 'SECONDS', False),
+    ('yyyy-MM', '%Y-%m', 'MONTHS', False),
+    ('yyyyMMdd', '%Y%m%d', 'DAYS', True),
+    ('yyyyMMddHH', '%Y%m%d%H', 'HOURS', True),
+]
+_PYTHON_DATE_FORMATS = {java_format: python_format for java_format, python_format, _, _ in DATE_FORMATS}
+
+_INTERVAL_UNITS = {
+    'SECONDS': timedelta(seconds=1),
+    'MINUTES': timedelta(minutes=1),
+    'HOURS': timedelta(hours=1),
+    'DAYS': timedelta(days=1),
+}
+
+
+def _is_date_format(values: Iterable[str], python_format: str) -> bool:
+    for value in values:
+        try:
+            # the value must round trip, so Athena renders the same (zero padded) strings
+            if datetime.strptime(value, python_format).strftime(python_format) != value:
+                return False
+        except ValueError:
+            return False
+    return True
+
+
+def _date_projection(key_name: str, values: List[str], open_ended: bool) -> Optional[Dict[str, str]]:
+    for java_format, python_format, interval_unit, needs_date_key in DATE_FORMATS:
+        if needs_date_key and key_name not in DATE_KEY_NAMES:
+            continue
+        if _is_date_format(values, python_format):
+            dates = sorted(datetime.strptime(value, python_format) for value in values)
+            upper = 'NOW' if open_ended else dates[-1].strftime(python_format)
+            return {
+                'type': 'date',
+                'format': java_format,
+                'range': f"{dates[0].strftime(python_format)},{upper}",
+                'interval': '1',
+                'interval.unit': interval_unit,
+            }
+    return None
+
+
+def _integer_projection(values: List[str]) -> Optional[Dict[str, str]]:
+    if not all(value.isdigit() for value in values):
+        return None
+    padded = [value for value in values if len(value) > 1 and value.startswith('0')]
+    lengths = {len(value) for value in values}
+    if padded and len(lengths) > 1:
+        # '01' next to '123', no single digits setting renders both
+        return None
+    numbers = sorted(int(value) for value in values)
+    if numbers[-1] - numbers[0] + 1 > INTEGER_RANGE_SPARSITY * len(numbers):
+        return None
+    projection = {
+        'type': 'integer',
+        'range': f"{numbers[0]},{numbers[-1]}",
+    }
+    if padded:
+        projection['digits'] = str(lengths.pop())
+    return projection
+
+
+def infer_key_projection(key_name: str, values: Iterable[str], open_ended: bool = False) -> Dict[str, str]:
+    """
+    Infer the projection of one partition key from its distinct values: a date (on a single date
+    key), an integer range, an enum, or an injected key when there are too many values to list.
+
+    Returns:
+        Projection settings of the key, without the 'projection.<key>.' prefix
+    """
+    values = sorted(set(values))
+    if not values:
+        return {'type': 'injected'}
+    projection = _date_projection(key_name, values, open_ended) or _integer_projection(values)
+    if projection:
+        return projection
+    if len(values) <= MAX_ENUM_VALUES and not any(',' in value for value in values):
+        return {'type': 'enum', 'values': ','.join(values)}
+    return {'type': 'injected'}
+
+
+def location_template(location: Optional[str], key_names: List[str], values: List[str]) -> Optional[str]:
+    """
+    Replace the partition values in the path segments of a partition location by ${key} placeholders,
+    e.g. 's3://bucket/events/us/2024/01/05/' -> 's3://bucket/events/${country}/${year}/${month}/${day}/'.
+    A segment takes the key named in it ('month=01') first, then the longest value found in it.
+
+    Returns:
+        The location template, None when the location doesn't hold every value
+    """
+    if not location or '://' not in location:
+        return None
+    scheme, path = location.split('://', 1)
+    remaining = [(key_name, value) for key_name, value in zip(key_names, values) if value]
+    if len(remaining) < len(key_names):
+        return None
+    segments = path.split('/')
+    for i, segment in enumerate(segments[1:], start=1):  # never in the bucket name
+        while True:
+            named = [(key_name, value) for key_name, value in remaining if f'{key_name}={value}' in segment]
+            found = named or sorted((item for item in remaining if item[1] in segment), key=lambda item: -len(item[1]))
+            if not found:
+                break
+            key_name, value = found[0]
+            prefix = f'{key_name}=' if named else ''
+            segment = segment.replace(prefix + value, prefix + f'${{{key_name}}}', 1)
+            remaining.remove((key_name, value))
+        segments[i] = segment
+    if remaining:
+        return None
+    return f"{scheme}://{'/'.join(segments)}"
+
+
+def projection_properties(key_projections: Dict[str, Dict[str, str]], storage_template: Optional[str]) -> Dict[str, str]:
+    """
+    Returns the table properties enabling the projection of the partition keys.
+    """
+    properties = {'projection.enabled': 'true'}
+    for key_name, projection in key_projections.items():
+        for setting, value in projection.items():
+            properties[f'projection.{key_name}.{setting}'] = value
+    if storage_template:
+        properties['storage.location.template'] = storage_template
+    return properties
+
+
+def _quote(value: str) -> str:
+    # Athena DDL is Hive DDL: string literals escape quotes with a backslash, not by doubling them
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def projection_statement(full_table_name: str, properties: Dict[str, str]) -> str:
+    """
+    Returns the Athena statement setting the projection properties on the table.
+    """
+    settings = ',\n'.join(f"  {_quote(name)}={_quote(value)}" for name, value in properties.items())
+    return f"ALTER TABLE {full_table_name} SET TBLPROPERTIES (\n{settings}\n);"
+
+
+def injected_keys(properties: Dict[str, str], key_names: List[str]) -> List[str]:
+    """
+    Returns the partition keys projected as injected: Athena can't enumerate their values, so every
+    query of the table has to filter them with an equality.
+    """
+    return [key_name for key_name in key_names if properties.get(f'projection.{key_name}.type') == 'injected']
+
+
+class ProjectionMatcher:
+    """
+    Checks partitions against projection table properties, the way Athena would generate them:
+    a partition is covered when every value is in its key projection and its location is the
+    storage location template rendered with its values.
+    """
+
+    def __init__(self, properties: Dict[str, str], key_names: List[str], table_location: str):
+        self.key_names = key_names
+        self._matchers: List[Callable[[str], bool]] = [self._key_matcher(properties, name) for name in key_names]
+        self.template = properties.get('storage.location.template')
+        if not self.template:
+            # without a template Athena reads Hive style key=value prefixes under the table location
+            self.template = table_location.rstrip('/') + '/' + '/'.join(f'{name}=${{{name}}}' for name in key_names) + '/'
+
+    @staticmethod
+    def _key_matcher(properties: Dict[str, str], key_name: str) -> Callable[[str], bool]:
+        prefix = f'projection.{key_name}.'
+        projection_type = properties.get(prefix + 'type')
+
+        if projection_type == 'injected':
+            return lambda value: True
+
+        if projection_type == 'enum':
+            values = set(properties[prefix + 'values'].split(','))
+            return values.__contains__
+
+        if projection_type == 'integer':
+            lower, upper = (int(bound) for bound in properties[prefix + 'range'].split(','))
+            digits = int(properties.get(prefix + 'digits', 0))
+
+            def integer_matcher(value: str) -> bool:
+                return value.isdigit() and lower <= int(value) <= upper and value == str(int(value)).zfill(digits)
+            return integer_matcher
+
+        if projection_type == 'date':
+            java_format = properties[prefix + 'format']
+            if java_format not in _PYTHON_DATE_FORMATS:
+                raise ValueError(f"Unsupported date format of {key_name} projection: {java_format}")
+            python_format = _PYTHON_DATE_FORMATS[java_format]
+            lower, upper = properties[prefix + 'range'].split(',')
+            lower = datetime.strptime(lower, python_format)
+            upper = datetime.now(timezone.utc).replace(tzinfo=None) if upper == 'NOW' else datetime.strptime(upper, python_format)
+            interval = int(properties.get(prefix + 'interval', 1))
+            step = _INTERVAL_UNITS.get(properties.get(prefix + 'interval.unit'), timedelta(days=1)) * interval
+
+            def date_matcher(value: str) -> bool:
+                try:
+                    parsed = datetime.strptime(value, python_format)
+                except ValueError:
+                    return False
+                if parsed.strftime(python_format) != value or not lower <= parsed <= upper:
+                    return False
+                # MONTHS intervals aren't a fixed timedelta, any month in range is projected with interval 1
+                return interval == 1 or (parsed - lower) % step == timedelta(0)
+            return date_matcher
+
+        raise ValueError(f"Missing or unsupported projection type of {key_name}: {projection_type}")
+
+    def uncovered_reason(self, values: List[str], location: Optional[str]) -> Optional[str]:
+        """
+        Returns why the partition isn't covered by the projection, None when it is.
+        """
+        if len(values) != len(self.key_names):
+            return f"{len(values)} values for {len(self.key_names)} partition keys"
+        for key_name, value, matcher in zip(self.key_names, values, self._matchers):
+            if not matcher(value):
+                return f"{key_name} value {value!r} not projected"
+        expected = self.template
+        for key_name, value in zip(self.key_names, values):
+            expected = expected.replace(f'${{{key_name}}}', value)
+        if location and location.rstrip('/') != expected.rstrip('/'):
+            return f"location {location} is not {expected}"
+        return None
+
+    def projected_partitions(self, properties: Dict[str, str]) -> Optional[int]:
+        """
+        Returns the number of partitions the projection generates, None when a key is injected.
+        """
+        total = 1
+        for key_name in self.key_names:
+            prefix = f'projection.{key_name}.'
+            projection_type = properties[prefix + 'type']
+            if projection_type == 'enum':
+                total *= len(properties[prefix + 'values'].split(','))
+            elif projection_type == 'integer':
+                lower, upper = (int(bound) for bound in properties[prefix + 'range'].split(','))
+                total *= upper - lower + 1
+            elif projection_type == 'date':
+                python_format = _PYTHON_DATE_FORMATS[properties[prefix + 'format']]
+                lower, upper = properties[prefix + 'range'].split(',')
+                lower = datetime.strptime(lower, python_format)
+                upper = datetime.now(timezone.utc).replace(tzinfo=None) if upper == 'NOW' else datetime.strptime(upper, python_format)
+                unit = properties.get(prefix + 'interval.unit', 'DAYS')
+                if unit == 'MONTHS':
+                    total *= (upper.year - lower.year) * 12 + upper.month - lower.month + 1
+                else:
+                    step = _INTERVAL_UNITS[unit] * int(properties.get(prefix + 'interval', 1))
+                    total *= (upper - lower) // step + 1
+            else:
+                return None
+        return total
+
+
+def _scan_partitions(glue_client, database: str, table: str, total_segments: int,
+                     sink: Callable[[Dict[str, Any]], None]) -> int:
+    lock = threading.Lock()
+
+    def locked_sink(partition_info: Dict[str, Any]) -> None:
+        with lock:
+            sink(partition_info)
+
+    _, total_partitions = scan_table_partitions(
+        glue_client=glue_client,
+        database=database,
+        table=table,
+        partition_filter=lambda partitions: [partition['Values'] for partition in partitions],
+        sink=locked_sink,
+        total_segments=total_segments,
+        include_location=True
+    )
+    return total_partitions
+
+
+def infer_table_projection(glue_client, database: str, table: str, partition_keys: List[Dict], table_location: str,
+                           total_segments: int = 1, open_ended: bool = False) -> Tuple[Dict[str, str], int]:
+    """
+    Scan the partitions of a table and infer its projection properties. Only the distinct values
+    of every key and the distinct location templates are kept, not the partitions.
+
+    Returns:
+        Tuple of (projection table properties, partitions scanned)
+    """
+    key_names = [key_info['Name'] for key_info in partition_keys]
+    key_values: List[set] = [set() for _ in key_names]
+    templates: Counter = Counter()
+
+    def collect(partition_info: Dict[str, Any]) -> None:
+        for distinct, value in zip(key_values, partition_info['values']):
+            distinct.add(value)
+        templates[location_template(partition_info.get('location'), key_names, partition_info['values'])] += 1
+
+    total_partitions = _scan_partitions(glue_client, database, table, total_segments, collect)
+
+    key_projections = {name: infer_key_projection(name, values, open_ended) for name, values in zip(key_names, key_values)}
+
+    storage_template = None
+    located = [(template, count) for template, count in templates.most_common() if template]
+    if located:
+        storage_template, count = located[0]
+        if count < total_partitions:
+            logging.warning(f"{total_partitions - count} partitions of {database}.{table} don't follow the "
+                            f"location template {storage_template} ({len(located)} distinct templates)")
+        hive_template = table_location.rstrip('/') + '/' + '/'.join(f'{name}=${{{name}}}' for name in key_names)
+        if storage_template.rstrip('/') == hive_template:
+            # Athena's default layout, no template needed
+            storage_template = None
+
+    return projection_properties(key_projections, storage_template), total_partitions
+
+
+def verify_table_projection(glue_client, database: str, table: str, partition_keys: List[Dict], table_location: str,
+                            properties: Dict[str, str], total_segments: int = 1) -> Dict[str, Any]:
+    """
+    Scan the partitions of a table and check that the projection properties generate every one of
+    them, at the same location. Injected keys match any value but don't cover the catalog: queries
+    without an equality filter on them fail once the catalog partitions are dropped.
+
+    Returns:
+        Coverage summary: partitions scanned and covered, a sample of the uncovered ones with the
+        reason, the injected keys, and the number of partitions the projection generates
+    """
+    key_names = [key_info['Name'] for key_info in partition_keys]
+    matcher = ProjectionMatcher(properties, key_names, table_location)
+    coverage = {'partitions': 0, 'covered': 0, 'uncovered': 0, 'uncovered_sample': [],
+                'injected_keys': injected_keys(properties, key_names)}
+
+    def check(partition_info: Dict[str, Any]) -> None:
+        reason = matcher.uncovered_reason(partition_info['values'], partition_info.get('location'))
+        if reason is None:
+            coverage['covered'] += 1
+            return
+        coverage['uncovered'] += 1
+        if len(coverage['uncovered_sample']) < UNCOVERED_PARTITIONS_SAMPLE:
+            coverage['uncovered_sample'].append({'values': partition_info['values'], 'reason': reason})
+
+    coverage['partitions'] = _scan_partitions(glue_client, database, table, total_segments, check)
+    coverage['projected_partitions'] = matcher.projected_partitions(properties)
+    coverage['covers_catalog'] = coverage['uncovered'] == 0 and not coverage['injected_keys']
+
+    return coverage
+
+
+def generate_table_projection(table_config: Dict[str, Any], open_ended: bool = False) -> Dict[str, Any]:
+    """
+    Infer and verify the partition projection of a configured table (a TABLES_CONFIG entry:
+    database, table and optional region, role_arn, scan_segments).
+
+    Returns:
+        The projection properties, the statement setting them and the catalog coverage
+    """
+    database = table_config['database']
+    table = table_config['table']
+    full_table_name = f"{database}.{table}"
+    region = table_config.get('region')
+    role_arn = table_config.get('role_arn')
+    total_segments = min(table_config.get('scan_segments', 1), MAX_SCAN_SEGMENTS)
+
+    glue_client = get_client('glue', region, role_arn, max_pool_connections=total_segments)
+    table_metadata = resolve_tables_metadata(glue_client, database, [table], scope=client_scope(region, role_arn)).get(table)
+    if table_metadata is None:
+        raise ValueError(f"Error getting partition keys for {full_table_name}: table not found in the Glue catalog")
+    partition_keys = table_metadata['partition_keys']
+    if not partition_keys:
+        raise ValueError(f"{full_table_name} has no partition keys to project")
+    table_location = f"s3://{table_metadata['s3_bucket']}/{table_metadata['s3_prefix']}"
+
+    properties, total_partitions = infer_table_projection(
+        glue_client, database, table, partition_keys, table_location, total_segments, open_ended
+    )
+    logging.info(f"Inferred the projection of {full_table_name} from {total_partitions} partitions")
+
+    coverage = verify_table_projection(glue_client, database, table, partition_keys, table_location, properties, total_segments)
+    if coverage['injected_keys']:
+        logging.warning(f"{full_table_name} keys {coverage['injected_keys']} fall back to injected projections "
+                        f"(too many values for an enum): every Athena query of the table must filter them with an equality "
+                        f"(e.g. WHERE {coverage['injected_keys'][0]} = '...'), other queries fail")
+    if coverage['covers_catalog']:
+        logging.info(f"Projection of {full_table_name} covers its {coverage['partitions']} catalog partitions "
+                     f"({coverage['projected_partitions']} projected partitions)")
+    elif coverage['uncovered']:
+        logging.warning(f"Projection of {full_table_name} misses {coverage['uncovered']} of {coverage['partitions']} "
+                        f"catalog partitions, e.g. {coverage['uncovered_sample'][:3]}")
+
+    return {
+        'full_table_name': full_table_name,
+        'properties': properties,
+        'statement': projection_statement(full_table_name, properties),
+        'coverage': coverage,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--table', action='append', required=True, help='database.table, repeat for several tables')
+    parser.add_argument('--region')
+    parser.add_argument('--role-arn')
+    parser.add_argument('--scan-segments', type=int, default=1)
+    parser.add_argument('--open-ended', action='store_true',
+                        help="project date keys up to NOW instead of the latest catalog partition")
+    parser.add_argument('--output', help='write the projections as JSON to this file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    projections = []
+    for full_table_name in args.table:
+        database, table = full_table_name.split('.', 1)
+        projection = generate_table_projection(
+            {'database': database, 'table': table, 'region': args.region, 'role_arn': args.role_arn,
+             'scan_segments': args.scan_segments},
+            open_ended=args.open_ended
+        )
+        projections.append(projection)
+        if projection['coverage']['injected_keys']:
+            print(f"-- WARNING: injected keys {projection['coverage']['injected_keys']}, "
+                  f"queries of {full_table_name} must filter them with an equality")
+        print(projection['statement'])
+        print(f"-- covers {projection['coverage']['covered']} of {projection['coverage']['partitions']} catalog partitions")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(projections, f, indent=2)
@@ -0,0 +1,90 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+
+MAX_SCAN_SEGMENTS = 10  ## Glue GetPartitions accepts TotalSegments between 1 and 10
+
+
+def scan_partition_segment(glue_client, database: str, table: str, segment: int, total_segments: int,
+                           partition_filter: Callable[[List[Dict[str, Any]]], List[List[str]]],
+                           sink: Callable[[Dict[str, Any]], None],
+                           expression: Optional[str] = None,
+                           include_location: bool = False) -> Tuple[int, int]:
+    """
+    Scan one GetPartitions segment page by page. `partition_filter` gets the partitions of a page
+    and returns the values of the ones to keep, which are passed to `sink` as {'values': [...]}
+    (with the partition S3 'location' when `include_location`).
+    When `expression` is given, only partitions matching it are returned by the catalog.
+
+    Returns:
+        Tuple of (matched partitions count, total partitions scanned)
+    """
+    paginate_kwargs = {
+        'DatabaseName': database,
+        'TableName': table,
+    }
+    if total_segments > 1:
+        paginate_kwargs['Segment'] = {'SegmentNumber': segment, 'TotalSegments': total_segments}
+    if expression:
+        paginate_kwargs['Expression'] = expression
+
+    paginator = glue_client.get_paginator('get_partitions')
+
+    matched_count = 0
+    total_partitions = 0
+
+    for page in paginator.paginate(**paginate_kwargs):
+        partitions = page['Partitions']
+        total_partitions += len(partitions)
+        selected = partition_filter(partitions)
+        if include_location:
+            # the filter returns the 'Values' lists of the page partitions themselves
+            locations = {id(partition['Values']): partition.get('StorageDescriptor', {}).get('Location') for partition in partitions}
+        for partition_values in selected:
+            matched_count += 1
+            partition_info = {
+                'values': partition_values
+            }
+            if include_location:
+                partition_info['location'] = locations.get(id(partition_values))
+            sink(partition_info)
+
+    return matched_count, total_partitions
+
+
+def scan_table_partitions(glue_client, database: str, table: str,
+                          partition_filter: Callable[[List[Dict[str, Any]]], List[List[str]]],
+                          sink: Callable[[Dict[str, Any]], None],
+                          total_segments: int = 1,
+                          expression: Optional[str] = None,
+                          include_location: bool = False) -> Tuple[int, int]:
+    """
+    Scan all partitions of a table split into `total_segments` segments scanned concurrently.
+    Segments are disjoint, so `sink` receives exactly the partitions a serial scan matches
+    (in no particular order). `sink` must be thread safe when total_segments > 1.
+
+    Returns:
+        Tuple of (matched partitions count, total partitions scanned). With an `expression`
+        the total only counts the partitions returned by the catalog.
+    """
+    if not 1 <= total_segments <= MAX_SCAN_SEGMENTS:
+        raise ValueError(f"total_segments must be between 1 and {MAX_SCAN_SEGMENTS}, got {total_segments}")
+
+    if total_segments == 1:
+        return scan_partition_segment(glue_client, database, table, 0, 1, partition_filter, sink, expression, include_location)
+
+    with ThreadPoolExecutor(max_workers=total_segments) as executor:
+        futures = [
+            executor.submit(scan_partition_segment, glue_client, database, table, segment, total_segments,
+                            partition_filter, sink, expression, include_location)
+            for segment in range(total_segments)
+        ]
+        results = [future.result() for future in futures]
+
+    matched_count = sum(segment_matched for segment_matched, _ in results)
+    total_partitions = sum(segment_total for _, segment_total in results)
+
+    logging.info(f"Scanned {total_partitions} partitions of {database}.{table} in {total_segments} segments")
+
+    return matched_count, total_partitions
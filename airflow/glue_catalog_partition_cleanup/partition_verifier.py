@@ -0,0 +1,141 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple
+
+
+VERIFY_MAX_WORKERS = 16  ## concurrent ListObjectsV2 listings per table
+VERIFY_SHARD_SIZE = 1000  ## candidate partitions per listing of a parent prefix (a ListObjectsV2 page)
+BATCH_GET_PARTITION_SIZE = 1000  ## max partitions per BatchGetPartition call (Glue limit)
+
+
+def _split_location(location: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Split a partition 's3://bucket/parent/child/' location into (bucket, 'parent/', 'child/').
+    """
+    if not location or not location.startswith(('s3://', 's3a://', 's3n://')):
+        return None
+    bucket, _, key = location.split('://', 1)[1].partition('/')
+    key = key.rstrip('/')
+    if not bucket or not key:
+        return None
+    parent, _, child = key.rpartition('/')
+    return bucket, f'{parent}/' if parent else '', f'{child}/'
+
+
+def _shards(children: List[str], size: int) -> Iterable[Tuple[str, str, str, List[str]]]:
+    """
+    Split the sorted child prefixes of a parent in shards of `size` children.
+
+    The common prefix of a shard (e.g. 'dt=20' for a daily layout) can match far more children than the
+    shard holds, so each shard is also bounded to the key range between its first and last child.
+
+    Returns:
+        Iterable of (common prefix, listing start after key, last child, children) per shard
+    """
+    children = sorted(children)
+    for i in range(0, len(children), size):
+        shard = children[i:i + size]
+        # without the trailing '/', the listing has to return the children themselves
+        first = shard[0].rstrip('/')
+        yield os.path.commonprefix([child.rstrip('/') for child in shard]), first[:-1], shard[-1], shard
+
+
+def _list_child_prefixes(s3_client, bucket: str, prefix: str, start_after: str = '', end: Optional[str] = None) -> Set[str]:
+    """
+    Returns the child prefixes ('directories') holding objects under `prefix`, with their
+    objects directly under `prefix` as well, listed from after `start_after` up to `end`.
+    """
+    found = set()
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter='/', StartAfter=start_after):
+        common_prefixes = [common_prefix['Prefix'] for common_prefix in page.get('CommonPrefixes', [])]
+        keys = [content['Key'] for content in page.get('Contents', [])]
+        found.update(common_prefixes)
+        found.update(keys)
+        # keys are listed in order, stop at the first page past the range
+        if end is not None and max(common_prefixes[-1:] + keys[-1:], default='') >= end:
+            break
+    return found
+
+
+def verify_partition_locations(s3_client, partitions: Iterable[Dict[str, Any]],
+                                 max_workers: int = VERIFY_MAX_WORKERS) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Check which partitions still have objects under their S3 'location'.
+
+    Candidate locations are grouped under their parent prefix, and each parent is listed with
+    Delimiter='/' in shards of VERIFY_SHARD_SIZE children, each listing only the key range between
+    the first and last child of its shard. A ListObjectsV2 page returns up to 1000 child prefixes of
+    that range, candidates or not, so a shard of consecutive stale dates takes about one page instead
+    of one listing per partition. Shards are listed concurrently.
+
+    Partitions without an S3 location can't be verified: they are returned apart, to be kept.
+
+    Returns:
+        Tuple of (partitions without objects, partitions with objects, partitions without an S3 location)
+    """
+    by_parent: Dict[Tuple[str, str], Dict[str, List[Dict[str, Any]]]] = {}
+    unverifiable = []
+    for partition_info in partitions:
+        split = _split_location(partition_info.get('location'))
+        if split is None:
+            unverifiable.append(partition_info)
+            continue
+        bucket, parent, child = split
+        by_parent.setdefault((bucket, parent), {}).setdefault(child, []).append(partition_info)
+
+    listings = [
+        (bucket, parent, shard_prefix, start_after, last, shard)
+        for (bucket, parent), children in by_parent.items()
+        for shard_prefix, start_after, last, shard in _shards(list(children), VERIFY_SHARD_SIZE)
+    ]
+
+    def list_shard(listing) -> Set[str]:
+        bucket, parent, shard_prefix, start_after, last, _ = listing
+        return _list_child_prefixes(s3_client, bucket, parent + shard_prefix, parent + start_after, parent + last)
+
+    expired = []
+    with_objects = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for (bucket, parent, _, _, _, shard), found in zip(listings, executor.map(list_shard, listings)):
+            for child in shard:
+                # a partition 'directory' listed as a common prefix, or an object named like it
+                has_objects = parent + child in found or parent + child.rstrip('/') in found
+                (with_objects if has_objects else expired).extend(by_parent[(bucket, parent)][child])
+
+    logging.info(f"Verified {len(expired) + len(with_objects)} partition locations in {len(listings)} listings: "
+                 f"{len(with_objects)} still have objects, {len(unverifiable)} without an S3 location")
+
+    return expired, with_objects, unverifiable
+
+
+def fill_partition_locations(glue_client, database: str, table: str, partitions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Set the 'location' of partitions listed without one (e.g. retried from the inventory)
+    with BatchGetPartition calls.
+
+    Returns:
+        List of the partitions no longer in the catalog
+    """
+    gone = []
+    missing = [partition_info for partition_info in partitions if not partition_info.get('location')]
+    for i in range(0, len(missing), BATCH_GET_PARTITION_SIZE):
+        batch = missing[i:i + BATCH_GET_PARTITION_SIZE]
+        locations = {}
+        partitions_to_get = [{'Values': partition_info['values']} for partition_info in batch]
+        while partitions_to_get:
+            response = glue_client.batch_get_partition(
+                DatabaseName=database,
+                TableName=table,
+                PartitionsToGet=partitions_to_get
+            )
+            for partition in response.get('Partitions', []):
+                locations[tuple(partition['Values'])] = partition.get('StorageDescriptor', {}).get('Location')
+            partitions_to_get = response.get('UnprocessedKeys', [])
+        for partition_info in batch:
+            values = tuple(partition_info['values'])
+            if values not in locations:
+                gone.append(partition_info)
+            partition_info['location'] = locations.get(values)
+    return gone
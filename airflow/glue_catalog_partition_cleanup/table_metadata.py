@@ -0,0 +1,93 @@
+import logging
+import re
+import threading
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+
+MAX_TABLES_EXPRESSION_LENGTH = 2048  ## longer table name patterns fetch the whole database instead
+_TABLE_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')  ## names safe to put in a GetTables Expression as is
+
+_tables_cache: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+_tables_cache_lock = threading.Lock()
+
+
+def parse_table_metadata(table: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns the S3 bucket, prefix and partition keys of a Glue table definition.
+    """
+    s3_location = table['StorageDescriptor']['Location']
+    s3_parts = s3_location.split('/')
+    return {
+        's3_bucket': s3_parts[2],
+        's3_prefix': '/'.join(s3_parts[3:]),  # Extract only the prefix path without bucket
+        'partition_keys': table.get('PartitionKeys', []),
+    }
+
+
+def _tables_expression(table_names: List[str]) -> Optional[str]:
+    """
+    GetTables name pattern matching exactly `table_names`, None when they can't be expressed.
+    """
+    if not all(_TABLE_NAME_PATTERN.match(name) for name in table_names):
+        return None
+    expression = f"^({'|'.join(sorted(name.lower() for name in table_names))})$"
+    if len(expression) > MAX_TABLES_EXPRESSION_LENGTH:
+        return None
+    return expression
+
+
+def _fetch_tables(glue_client, paginate_kwargs: Dict[str, Any], wanted: Dict[str, str]) -> Tuple[Dict[str, Dict[str, Any]], int]:
+    """
+    Returns the metadata of the `wanted` (lower case name to name) tables of the GetTables pages,
+    with the number of pages.
+    """
+    pages = 0
+    fetched = {}
+    for page in glue_client.get_paginator('get_tables').paginate(**paginate_kwargs):
+        pages += 1
+        for table in page['TableList']:
+            if table['Name'].lower() in wanted:
+                fetched[wanted[table['Name'].lower()]] = parse_table_metadata(table)
+    return fetched, pages
+
+
+def resolve_tables_metadata(glue_client, database: str, table_names: Iterable[str], scope: str = '') -> Dict[str, Dict[str, Any]]:
+    """
+    Resolve the metadata (see parse_table_metadata) of tables of one database with paginated
+    GetTables calls, filtered by a table names pattern when possible. Glue doesn't document how
+    it matches the pattern, so tables it leaves out are looked up again in the whole database.
+    Resolved tables are cached per scope/database for the life of the process.
+
+    Returns:
+        Dictionary of table name to its metadata, tables not found in the catalog are left out
+    """
+    table_names = sorted(set(table_names))
+    with _tables_cache_lock:
+        resolved = {name: _tables_cache[(scope, database, name)] for name in table_names if (scope, database, name) in _tables_cache}
+    missing = [name for name in table_names if name not in resolved]
+    if not missing:
+        return resolved
+
+    # Glue table names are lower case and matched case insensitively
+    wanted = {name.lower(): name for name in missing}
+    expression = _tables_expression(missing)
+    if expression:
+        fetched, pages = _fetch_tables(glue_client, {'DatabaseName': database, 'Expression': expression}, wanted)
+        not_matched = {key: name for key, name in wanted.items() if name not in fetched}
+        if not_matched:
+            logging.warning(f"GetTables Expression matched {len(fetched)} of {len(missing)} tables of database {database}, "
+                            f"looking up {sorted(not_matched.values())} in the whole database")
+            fallback, fallback_pages = _fetch_tables(glue_client, {'DatabaseName': database}, not_matched)
+            fetched.update(fallback)
+            pages += fallback_pages
+    else:
+        fetched, pages = _fetch_tables(glue_client, {'DatabaseName': database}, wanted)
+
+    logging.info(f"Resolved {len(fetched)} of {len(missing)} tables of database {database} in {pages} GetTables calls")
+
+    with _tables_cache_lock:
+        for name, metadata in fetched.items():
+            _tables_cache[(scope, database, name)] = metadata
+
+    resolved.update(fetched)
+    return resolved
@@ -3,13 +3,22 @@
 # - database: Glue database name (required)
 # - table: Glue table name (required)
 # - retention_days: Manual retention in days (optional)
+# - scan_segments: Number of GetPartitions segments scanned concurrently, 1-10 (optional, default 1)
+# - expression_pushdown: Filter stale partitions in the Glue catalog with an Expression (optional, default True).
+#                        Disable for string year/month/day keys holding non numeric values.
+# - incremental_scan: Only scan partitions dated after the last completed run cutoff, tracked in the table
+#                     partition inventory (optional, default True). A full scan still runs every few days.
+# - region: AWS region of the Glue catalog (optional, default region of the worker)
+# - role_arn: IAM role assumed to clean the catalog of another account (optional)
+# - verify_s3_location: Keep stale partitions whose S3 location still has objects (optional, default False)
 
 TABLES_CONFIG = [
     # Example with manual retention 
     # {
     #     'database': 'stg',
     #     'table': 'events',
-    #     'retention_days': 30  # (optional)
+    #     'retention_days': 30,  # (optional)
+    #     'scan_segments': 4  # (optional)
     # },
 ]
 
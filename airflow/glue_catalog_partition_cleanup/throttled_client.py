@@ -0,0 +1,341 @@
+import logging
+import os
+import random
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+import boto3
+import botocore.session
+import jmespath
+from botocore.config import Config
+from botocore.exceptions import ClientError, ConnectionError, HTTPClientError
+
+from glue_catalog_partition_cleanup.metrics import LatencyHistogram
+
+
+THROTTLE_ERROR_CODES = {
+    'ThrottlingException',
+    'Throttling',
+    'TooManyRequestsException',
+    'RequestLimitExceeded',
+    'RequestThrottled',
+    'RequestThrottledException',
+    'SlowDown',
+    'ProvisionedThroughputExceededException',
+}
+
+# errors botocore standard mode retries besides throttles (5xx responses are retried too)
+TRANSIENT_ERROR_CODES = {
+    'InternalServiceException',
+    'InternalServerException',
+    'InternalError',
+    'InternalFailure',
+    'ServiceUnavailable',
+    'ServiceUnavailableException',
+    'RequestTimeout',
+    'RequestTimeoutException',
+    'PriorRequestNotComplete',
+    'TransactionInProgressException',
+}
+
+INITIAL_RATE = float(os.environ.get('GLUE_CLEANUP_API_INITIAL_RATE', 10))  ## starting requests per second of an API operation
+MIN_RATE = 0.5  ## requests per second floor after throttling
+MAX_RATE = float(os.environ.get('GLUE_CLEANUP_API_MAX_RATE', 500))  ## requests per second ceiling
+ADDITIVE_INCREASE = 1.0  ## requests per second gained every second without throttling
+MULTIPLICATIVE_DECREASE = 0.5  ## rate factor applied on a throttle response
+DECREASE_COOLDOWN_SECONDS = 1.0  ## throttles of requests already in flight don't decrease the rate again
+THROTTLE_MAX_ATTEMPTS = 8  ## attempts per call before a throttle error is raised to the caller
+THROTTLE_BACKOFF_BASE_SECONDS = 0.5
+THROTTLE_BACKOFF_MAX_SECONDS = 20
+TRANSIENT_MAX_ATTEMPTS = 3  ## attempts per call on 5xx / connection errors (the botocore standard mode default)
+
+# botocore retries would hide throttles from the limiter, the wrapper retries them (and transient errors) instead
+NO_RETRIES_CONFIG = Config(retries={'total_max_attempts': 1, 'mode': 'standard'})
+
+
+class AdaptiveTokenBucket:
+    """
+    Token bucket whose refill rate follows AIMD: it grows by ADDITIVE_INCREASE requests per second
+    every second without throttling and is multiplied by MULTIPLICATIVE_DECREASE on a throttle.
+    Thread safe, shared by every thread calling the same API operation.
+    """
+
+    def __init__(self, rate: float = INITIAL_RATE, min_rate: float = MIN_RATE, max_rate: float = MAX_RATE):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self._tokens = 1.0
+        self._updated_at = time.monotonic()
+        self._last_decrease_at = 0.0
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.throttles = 0
+        self.transient_errors = 0
+        self.retries = 0
+        self.wait_seconds = 0.0
+        self.latency = LatencyHistogram()
+
+    def _refill(self, now: float) -> None:
+        # burst of at most one second of requests
+        self._tokens = min(max(self.rate, 1.0), self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self) -> None:
+        """
+        Block until a request may be sent.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.calls += 1
+                    self.wait_seconds += waited
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + ADDITIVE_INCREASE / self.rate)
+
+    def on_transient_error(self, retrying: bool) -> None:
+        with self._lock:
+            self.transient_errors += 1
+            self.retries += int(retrying)
+
+    def on_throttle(self, retrying: bool) -> None:
+        with self._lock:
+            self.throttles += 1
+            self.retries += int(retrying)
+            now = time.monotonic()
+            if now - self._last_decrease_at >= DECREASE_COOLDOWN_SECONDS:
+                self._refill(now)
+                self.rate = max(self.min_rate, self.rate * MULTIPLICATIVE_DECREASE)
+                self._tokens = min(self._tokens, 0.0)
+                self._last_decrease_at = now
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'rate': round(self.rate, 2),
+                'calls': self.calls,
+                'throttles': self.throttles,
+                'transient_errors': self.transient_errors,
+                'retries': self.retries,
+                'wait_seconds': round(self.wait_seconds, 2),
+                'latency': self.latency.snapshot(),
+            }
+
+
+class RateLimiter:
+    """
+    One adaptive token bucket per API operation of a service (GetPartitions and
+    BatchDeletePartition have separate quotas), with live counters. Quotas apply per
+    account and region, so clients of other accounts/regions use their own `scope` limiter.
+    """
+
+    def __init__(self, service_name: str, scope: str = '', initial_rate: float = INITIAL_RATE):
+        self.service_name = service_name
+        self.scope = scope
+        self.name = f'{service_name}@{scope}' if scope else service_name
+        self.initial_rate = initial_rate
+        self._buckets: Dict[str, AdaptiveTokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, operation_name: str) -> AdaptiveTokenBucket:
+        with self._lock:
+            if operation_name not in self._buckets:
+                self._buckets[operation_name] = AdaptiveTokenBucket(rate=self.initial_rate)
+            return self._buckets[operation_name]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the live counters of every API operation called so far.
+        """
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {operation_name: bucket.stats() for operation_name, bucket in buckets.items()}
+
+    def log_stats(self) -> None:
+        for operation_name, stats in sorted(self.stats().items()):
+            logging.info(f"{self.name}.{operation_name}: {stats}")
+
+
+_rate_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(service_name: str, scope: str = '') -> RateLimiter:
+    """
+    Returns the rate limiter of a service (in an account/region scope), shared by all the clients of the process.
+    """
+    with _rate_limiters_lock:
+        if (service_name, scope) not in _rate_limiters:
+            _rate_limiters[(service_name, scope)] = RateLimiter(service_name, scope)
+        return _rate_limiters[(service_name, scope)]
+
+
+def get_rate_limiters(service_name: str) -> List[RateLimiter]:
+    """
+    Returns the rate limiters of a service in every scope used so far.
+    """
+    with _rate_limiters_lock:
+        return [rate_limiter for (name, _), rate_limiter in sorted(_rate_limiters.items()) if name == service_name]
+
+
+def _is_throttle(error: ClientError) -> bool:
+    return error.response.get('Error', {}).get('Code', '') in THROTTLE_ERROR_CODES
+
+
+def _is_transient(error: Exception) -> bool:
+    """
+    Server side (5xx, internal error codes) and connection errors, retried without slowing down the limiter.
+    """
+    if isinstance(error, (ConnectionError, HTTPClientError)):
+        return True
+    if isinstance(error, ClientError):
+        status_code = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode') or 0
+        return status_code >= 500 or error.response.get('Error', {}).get('Code', '') in TRANSIENT_ERROR_CODES
+    return False
+
+
+_paginator_configs: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+_paginator_configs_lock = threading.Lock()
+
+
+def _paginator_config(service_model, operation_name: str) -> Dict[str, Any]:
+    """
+    Returns the pagination tokens of an API operation, from the botocore paginators model of the service.
+    """
+    key = (service_model.service_name, service_model.api_version, operation_name)
+    with _paginator_configs_lock:
+        if key not in _paginator_configs:
+            paginator_model = botocore.session.get_session().get_paginator_model(service_model.service_name, service_model.api_version)
+            _paginator_configs[key] = paginator_model.get_paginator(operation_name)
+        return _paginator_configs[key]
+
+
+def _as_list(value) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+class ThrottledPaginator:
+    """
+    Paginator fetching every page with the throttled (and retried) client method, following the
+    pagination tokens of the botocore paginators model. Supports the PageSize of PaginationConfig.
+    """
+
+    def __init__(self, method, config: Dict[str, Any]):
+        self._method = method
+        self._input_tokens = _as_list(config['input_token'])
+        self._output_tokens = [jmespath.compile(token) for token in _as_list(config['output_token'])]
+        self._more_results = jmespath.compile(config['more_results']) if 'more_results' in config else None
+        self._limit_key = config.get('limit_key')
+
+    def paginate(self, PaginationConfig: Optional[Dict[str, Any]] = None, **kwargs):
+        pagination_config = PaginationConfig or {}
+        unsupported = set(pagination_config) - {'PageSize'}
+        if unsupported:
+            raise ValueError(f"Unsupported PaginationConfig of a throttled paginator: {sorted(unsupported)}")
+        if 'PageSize' in pagination_config:
+            kwargs[self._limit_key] = pagination_config['PageSize']
+        previous_tokens = None
+        while True:
+            page = self._method(**kwargs)
+            yield page
+            tokens = [token.search(page) for token in self._output_tokens]
+            if all(token is None for token in tokens) or (self._more_results and not self._more_results.search(page)):
+                return
+            if tokens == previous_tokens:
+                raise RuntimeError(f"The same next token was received twice: {tokens}")
+            previous_tokens = tokens
+            for input_token, token in zip(self._input_tokens, tokens):
+                if token is None:
+                    kwargs.pop(input_token, None)
+                else:
+                    kwargs[input_token] = token
+
+
+def _backoff(attempt: int) -> None:
+    """Sleep with full jitter exponential backoff."""
+    time.sleep(random.uniform(0, min(THROTTLE_BACKOFF_MAX_SECONDS, THROTTLE_BACKOFF_BASE_SECONDS * (2 ** attempt))))
+
+
+class ThrottledClient:
+    """
+    boto3 client wrapper sending every API call (paginated ones included) through the service
+    rate limiter, and retrying throttled calls (max_attempts) and transient 5xx / connection
+    errors (transient_max_attempts) with jittered backoff. Anything that isn't an API operation
+    is passed through to the wrapped client.
+    """
+
+    def __init__(self, client, rate_limiter: RateLimiter, max_attempts: int = THROTTLE_MAX_ATTEMPTS,
+                 transient_max_attempts: int = TRANSIENT_MAX_ATTEMPTS):
+        self._client = client
+        self.rate_limiter = rate_limiter
+        self.max_attempts = max_attempts
+        self.transient_max_attempts = transient_max_attempts
+        self._api_methods = client.meta.method_to_api_mapping
+
+    def _wrap(self, method_name: str, method):
+        bucket = self.rate_limiter.bucket(self._api_methods[method_name])
+
+        def throttled_call(*args, **kwargs):
+            attempt = 0
+            transient_attempt = 0
+            while True:
+                bucket.acquire()
+                started = time.perf_counter()
+                try:
+                    response = method(*args, **kwargs)
+                except (ClientError, ConnectionError, HTTPClientError) as e:
+                    bucket.latency.observe(time.perf_counter() - started)
+                    if isinstance(e, ClientError) and _is_throttle(e):
+                        attempt += 1
+                        bucket.on_throttle(retrying=attempt < self.max_attempts)
+                        if attempt >= self.max_attempts:
+                            raise
+                        _backoff(attempt)
+                        continue
+                    if not _is_transient(e):
+                        raise
+                    transient_attempt += 1
+                    bucket.on_transient_error(retrying=transient_attempt < self.transient_max_attempts)
+                    if transient_attempt >= self.transient_max_attempts:
+                        raise
+                    logging.warning(f"{self.rate_limiter.name}.{method_name}: {e}, retrying")
+                    _backoff(transient_attempt)
+                    continue
+                bucket.latency.observe(time.perf_counter() - started)
+                bucket.on_success()
+                return response
+
+        throttled_call.__name__ = method_name
+        return throttled_call
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._client, name)
+        if name in self._api_methods:
+            return self._wrap(name, attribute)
+        return attribute
+
+    def get_paginator(self, operation_name: str) -> ThrottledPaginator:
+        if not self._client.can_paginate(operation_name):
+            raise ValueError(f"Operation cannot be paginated: {operation_name}")
+        config = _paginator_config(self._client.meta.service_model, self._api_methods[operation_name])
+        return ThrottledPaginator(self._wrap(operation_name, getattr(self._client, operation_name)), config)
+
+
+def throttled_client(service_name: str, config: Optional[Config] = None, session: Optional[boto3.Session] = None,
+                     scope: str = '', **client_kwargs) -> ThrottledClient:
+    """
+    Create a boto3 client (from `session` when given) whose calls go through the shared rate limiter
+    of the service in `scope`.
+    """
+    client_config = NO_RETRIES_CONFIG.merge(config) if config else NO_RETRIES_CONFIG
+    client = (session or boto3).client(service_name, config=client_config, **client_kwargs)
+    return ThrottledClient(client, get_rate_limiter(service_name, scope))
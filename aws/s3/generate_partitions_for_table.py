@@ -1,4 +1,16 @@
-from datetime import date, timedelta
+import argparse
+import copy
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
+
+import boto3
+from botocore.exceptions import BotoCoreError, ConnectionError, HTTPClientError
+
 
 table = "stg.test_population"
 hour_value = "00"          # change if you use a different hour for DAILY
@@ -8,26 +20,350 @@ start = date(2024, 11, 1)  # 2025-11-15 - 6 months
 end   = date(2025, 11, 24)
 special = date(2025, 11, 25)
 
-# 1) Partitions from location1 (no LOCATION clause)
-parts_loc1 = []
-d = start
-while d <= end:
-    y, m, day = d.strftime("%Y"), d.strftime("%m"), d.strftime("%d")
-    parts_loc1.append(
-        f"PARTITION (tile_granularity='DAILY', year='{y}', month='{m}', day='{day}', hour='{hour_value}')"
-    )
-    d += timedelta(days=1)
-
-sql_loc1 = f"ALTER TABLE {table} ADD IF NOT EXISTS\n" + "\n".join(parts_loc1) + ";\n"
-
-# 2) Special partition for 2025-11-16 from location2
-y, m, day = special.strftime("%Y"), special.strftime("%m"), special.strftime("%d")
-path = f"{location2_root}/year={y}/month={m}/day={day}/hour={hour_value}/"
-
-sql_loc2 = f"""ALTER TABLE {table} ADD IF NOT EXISTS
-PARTITION (tile_granularity='DAILY', year='{y}', month='{m}', day='{day}', hour='{hour_value}')
-  LOCATION '{path}';"""
-
-print(sql_loc1)
-print()
-print(sql_loc2)
+## partition keys, 'key=value' for a constant value, otherwise the value is formatted from the partition time
+layout = "tile_granularity=DAILY/year/month/day/hour"
+
+## partitions registered with their own LOCATION instead of the table location
+location_overrides = {
+    datetime(special.year, special.month, special.day, int(hour_value)):
+        f"{location2_root}/year={special:%Y}/month={special:%m}/day={special:%d}/hour={hour_value}/",
+}
+
+CREATE_BATCH_SIZE = 100  ## max partitions per BatchCreatePartition call (Glue limit)
+CREATE_MAX_WORKERS = 8  ## concurrent BatchCreatePartition calls
+CREATE_MAX_ATTEMPTS = 5
+CREATE_BACKOFF_BASE_SECONDS = 1
+
+MAX_STATEMENT_BYTES = 256000  ## per ALTER TABLE statement, under the Athena 262144 bytes query string limit
+STATEMENTS_MAX_CONCURRENCY = 4  ## statements running at the same time with --execute
+ATHENA_POLL_SECONDS = 1
+
+RETRYABLE_ERROR_CODES = {'ThrottlingException', 'InternalServiceException', 'OperationTimeoutException',
+                         'ConcurrentModificationException', 'ConnectionError'}
+
+## partition time formats of the well known partition key names
+TIME_KEY_FORMATS = {
+    'year': '%Y',
+    'month': '%m',
+    'day': '%d',
+    'hour': '%H',
+    'dt': '%Y-%m-%d',
+    'date': '%Y-%m-%d',
+}
+
+
+def parse_layout(layout: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    Parse a 'tile_granularity=DAILY/year/month/day/hour' layout into [(key, constant value or None)].
+    """
+    keys = []
+    for part in layout.strip('/').split('/'):
+        key, _, value = part.partition('=')
+        if not value and key not in TIME_KEY_FORMATS:
+            raise ValueError(f"Partition key '{key}' needs a constant value ('{key}=value') or one of {sorted(TIME_KEY_FORMATS)}")
+        keys.append((key, value or None))
+    return keys
+
+
+def iter_partition_times(start: date, end: date, hourly: bool = False, hour_value: str = hour_value) -> Iterator[datetime]:
+    """
+    Every day (or hour when `hourly`) from start to end, both included.
+    """
+    if hourly:
+        step = timedelta(hours=1)
+        partition_time = datetime(start.year, start.month, start.day)
+        last = datetime(end.year, end.month, end.day, 23)
+    else:
+        step = timedelta(days=1)
+        partition_time = datetime(start.year, start.month, start.day, int(hour_value))
+        last = datetime(end.year, end.month, end.day, int(hour_value))
+    while partition_time <= last:
+        yield partition_time
+        partition_time += step
+
+
+def partition_values(layout_keys: List[Tuple[str, Optional[str]]], partition_time: datetime) -> List[str]:
+    return [value if value is not None else partition_time.strftime(TIME_KEY_FORMATS[key]) for key, value in layout_keys]
+
+
+def iter_partitions(layout_keys: List[Tuple[str, Optional[str]]], start: date, end: date, hourly: bool = False,
+                    location_overrides: Optional[Dict[datetime, str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yield the partitions {'values': [...], 'location': override or None} of the range,
+    followed by the overridden partitions outside of it.
+    """
+    location_overrides = location_overrides or {}
+    in_range = set()
+    for partition_time in iter_partition_times(start, end, hourly):
+        if partition_time in location_overrides:
+            in_range.add(partition_time)
+        yield {'values': partition_values(layout_keys, partition_time), 'location': location_overrides.get(partition_time)}
+    for partition_time, location in sorted(location_overrides.items()):
+        if partition_time not in in_range:
+            yield {'values': partition_values(layout_keys, partition_time), 'location': location}
+
+
+def chunks(partitions: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for partition in partitions:
+        batch.append(partition)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def partition_input(partition: Dict[str, Any], layout_keys: List[Tuple[str, Optional[str]]],
+                    table_storage_descriptor: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    PartitionInput of a partition, with the table storage descriptor and the Hive style
+    '<table location>/key=value/...' location (as ALTER TABLE ADD PARTITION does) unless overridden.
+    """
+    storage_descriptor = copy.deepcopy(table_storage_descriptor)
+    location = partition['location']
+    if not location:
+        location = table_storage_descriptor['Location'].rstrip('/') + '/' + '/'.join(
+            f"{key}={value}" for (key, _), value in zip(layout_keys, partition['values'])) + '/'
+    storage_descriptor['Location'] = location
+    return {'Values': partition['values'], 'StorageDescriptor': storage_descriptor}
+
+
+def create_partition_batch(glue_client, database: str, table_name: str, partition_inputs: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Register one batch with BatchCreatePartition, retrying the partitions that fail with a
+    retryable error. Partitions that already exist are counted as skipped.
+    """
+    counts = {'created': 0, 'skipped': 0, 'failed': 0}
+    pending = partition_inputs
+    for attempt in range(CREATE_MAX_ATTEMPTS):
+        try:
+            response = glue_client.batch_create_partition(
+                DatabaseName=database,
+                TableName=table_name,
+                PartitionInputList=pending
+            )
+            errors = response.get('Errors', [])
+        except glue_client.exceptions.ClientError as e:
+            # the whole call failed, retry it all when possible
+            error_code = e.response['Error']['Code']
+            errors = [{'PartitionValues': partition['Values'], 'ErrorDetail': {'ErrorCode': error_code, 'ErrorMessage': str(e)}}
+                      for partition in pending]
+        except BotoCoreError as e:
+            # no response (connection error, read timeout): retried as a whole, partitions the call
+            # created anyway come back as AlreadyExistsException and are counted as skipped
+            error_code = 'ConnectionError' if isinstance(e, (ConnectionError, HTTPClientError)) else type(e).__name__
+            errors = [{'PartitionValues': partition['Values'], 'ErrorDetail': {'ErrorCode': error_code, 'ErrorMessage': str(e)}}
+                      for partition in pending]
+
+        retry_values = []
+        failed_count = 0
+        for error in errors:
+            error_code = error.get('ErrorDetail', {}).get('ErrorCode', '')
+            if error_code == 'AlreadyExistsException':
+                counts['skipped'] += 1
+            elif error_code in RETRYABLE_ERROR_CODES and attempt < CREATE_MAX_ATTEMPTS - 1:
+                retry_values.append(error['PartitionValues'])
+            else:
+                failed_count += 1
+                logging.error(f"Error creating partition {error['PartitionValues']} of {database}.{table_name}: "
+                              f"{error_code} - {error.get('ErrorDetail', {}).get('ErrorMessage', '')}")
+        counts['created'] += len(pending) - len(errors)
+        counts['failed'] += failed_count
+
+        if not retry_values:
+            break
+        pending = [partition for partition in pending if partition['Values'] in retry_values]
+        time.sleep(random.uniform(0, CREATE_BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+    return counts
+
+
+def register_partitions(glue_client, database: str, table_name: str, partitions: Iterator[Dict[str, Any]],
+                        layout_keys: List[Tuple[str, Optional[str]]], max_workers: int = CREATE_MAX_WORKERS) -> Dict[str, int]:
+    """
+    Register partitions directly in the Glue catalog, CREATE_BATCH_SIZE partitions per
+    BatchCreatePartition call on a pool of `max_workers` concurrent calls.
+
+    Returns:
+        Counts of created, skipped (already existing) and failed partitions
+    """
+    table_storage_descriptor = glue_client.get_table(DatabaseName=database, Name=table_name)['Table']['StorageDescriptor']
+    table_keys = [key for key, _ in layout_keys]
+
+    totals = {'created': 0, 'skipped': 0, 'failed': 0}
+
+    def collect(future) -> None:
+        for name, count in future.result().items():
+            totals[name] += count
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = set()
+        for batch in chunks(partitions, CREATE_BATCH_SIZE):
+            partition_inputs = [partition_input(partition, layout_keys, table_storage_descriptor) for partition in batch]
+            in_flight.add(executor.submit(create_partition_batch, glue_client, database, table_name, partition_inputs))
+            # bounded queue, the partitions of a long range are never all in memory
+            if len(in_flight) >= max_workers * 2:
+                done = next(as_completed(in_flight))
+                in_flight.remove(done)
+                collect(done)
+        for future in as_completed(in_flight):
+            collect(future)
+
+    logging.info(f"Registered partitions ({'/'.join(table_keys)}) of {database}.{table_name}: {totals}")
+    return totals
+
+
+def iter_partition_clauses(layout_keys: List[Tuple[str, Optional[str]]], partitions: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    """
+    Lazily yield the 'PARTITION (...) [LOCATION ...]' clause of every partition.
+    """
+    for partition in partitions:
+        values = ', '.join(f"{key}='{value}'" for (key, _), value in zip(layout_keys, partition['values']))
+        clause = f"PARTITION ({values})"
+        if partition['location']:
+            clause += f"\n  LOCATION '{partition['location']}'"
+        yield clause
+
+
+def iter_statements(table: str, clauses: Iterator[str], max_statement_bytes: int = MAX_STATEMENT_BYTES) -> Iterator[str]:
+    """
+    Pack partition clauses into ALTER TABLE ... ADD IF NOT EXISTS statements of at most
+    `max_statement_bytes` (UTF-8) each. Only one statement is held in memory at a time.
+    """
+    header = f"ALTER TABLE {table} ADD IF NOT EXISTS\n"
+    footer = ";\n"
+    empty_size = len(header.encode('utf-8')) + len(footer.encode('utf-8'))
+    statement_clauses = []
+    size = empty_size
+    for clause in clauses:
+        clause_size = len(clause.encode('utf-8')) + 1  # with its new line
+        if empty_size + clause_size > max_statement_bytes:
+            raise ValueError(f"Partition clause longer than the statement budget of {max_statement_bytes} bytes: {clause}")
+        if size + clause_size > max_statement_bytes:
+            yield header + "\n".join(statement_clauses) + footer
+            statement_clauses = []
+            size = empty_size
+        statement_clauses.append(clause)
+        size += clause_size
+    if statement_clauses:
+        yield header + "\n".join(statement_clauses) + footer
+
+
+def write_statements(statements: Iterator[str], output_dir: str, name: str) -> int:
+    """
+    Write every statement to its own '<name>_<n>.sql' file of `output_dir`.
+
+    Returns:
+        Number of statements written
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    count = 0
+    for count, statement in enumerate(statements, start=1):
+        with open(os.path.join(output_dir, f"{name}_{count:05d}.sql"), 'w') as f:
+            f.write(statement)
+    logging.info(f"Wrote {count} statements to {output_dir}")
+    return count
+
+
+class AthenaExecutor:
+    """
+    Statement executor running a statement on Athena and waiting for it to finish.
+    """
+
+    def __init__(self, output_location: str, workgroup: str = 'primary', athena_client=None):
+        self.output_location = output_location
+        self.workgroup = workgroup
+        self.athena_client = athena_client or boto3.client('athena')
+
+    def __call__(self, statement: str) -> str:
+        query_execution_id = self.athena_client.start_query_execution(
+            QueryString=statement,
+            WorkGroup=self.workgroup,
+            ResultConfiguration={'OutputLocation': self.output_location}
+        )['QueryExecutionId']
+        while True:
+            status = self.athena_client.get_query_execution(QueryExecutionId=query_execution_id)['QueryExecution']['Status']
+            if status['State'] in ['SUCCEEDED', 'FAILED', 'CANCELLED']:
+                break
+            time.sleep(ATHENA_POLL_SECONDS)
+        if status['State'] != 'SUCCEEDED':
+            raise RuntimeError(f"Athena query {query_execution_id} {status['State']}: {status.get('StateChangeReason', '')}")
+        return query_execution_id
+
+
+def execute_statements(statements: Iterator[str], executor: Callable[[str], Any],
+                       max_concurrency: int = STATEMENTS_MAX_CONCURRENCY) -> Dict[str, int]:
+    """
+    Submit statements to `executor` (any callable taking the statement, e.g. AthenaExecutor)
+    with at most `max_concurrency` statements running, and pulled from the generator, at a time.
+
+    Returns:
+        Counts of succeeded and failed statements
+    """
+    totals = {'succeeded': 0, 'failed': 0}
+
+    def collect(future) -> None:
+        try:
+            future.result()
+            totals['succeeded'] += 1
+        except Exception as e:
+            totals['failed'] += 1
+            logging.error(f"Error executing statement: {e}")
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        in_flight = set()
+        for statement in statements:
+            in_flight.add(pool.submit(executor, statement))
+            if len(in_flight) >= max_concurrency:
+                done = next(as_completed(in_flight))
+                in_flight.remove(done)
+                collect(done)
+        for future in as_completed(in_flight):
+            collect(future)
+
+    logging.info(f"Executed statements: {totals}")
+    return totals
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate the partitions of a table over a date/hour range")
+    parser.add_argument('--mode', choices=['sql', 'register'], default='sql',
+                        help="sql: ALTER TABLE statements (printed, written to --output-dir or run with --execute), "
+                             "register: create the partitions with Glue BatchCreatePartition")
+    parser.add_argument('--table', default=table, help='database.table')
+    parser.add_argument('--layout', default=layout)
+    parser.add_argument('--start', type=date.fromisoformat, default=start)
+    parser.add_argument('--end', type=date.fromisoformat, default=end)
+    parser.add_argument('--hourly', action='store_true', help='one partition per hour instead of one per day')
+    parser.add_argument('--workers', type=int, default=CREATE_MAX_WORKERS)
+    parser.add_argument('--max-statement-bytes', type=int, default=MAX_STATEMENT_BYTES)
+    parser.add_argument('--output-dir', help='write each statement to a .sql file of this directory')
+    parser.add_argument('--execute', action='store_true', help='run the statements on Athena')
+    parser.add_argument('--athena-output', help='Athena query results location (s3://...), required with --execute')
+    parser.add_argument('--workgroup', default='primary')
+    parser.add_argument('--concurrency', type=int, default=STATEMENTS_MAX_CONCURRENCY)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    table = args.table
+    layout_keys = parse_layout(args.layout)
+    partitions = iter_partitions(layout_keys, args.start, args.end, args.hourly, location_overrides)
+
+    if args.mode == 'register':
+        database, table_name = table.split('.', 1)
+        started = time.perf_counter()
+        totals = register_partitions(boto3.client('glue'), database, table_name, partitions, layout_keys, args.workers)
+        print(f"{totals} in {time.perf_counter() - started:.1f}s")
+    else:
+        statements = iter_statements(table, iter_partition_clauses(layout_keys, partitions), args.max_statement_bytes)
+        if args.execute:
+            if not args.athena_output:
+                parser.error('--athena-output is required with --execute')
+            execute_statements(statements, AthenaExecutor(args.athena_output, args.workgroup), args.concurrency)
+        elif args.output_dir:
+            write_statements(statements, args.output_dir, table.replace('.', '_'))
+        else:
+            for statement in statements:
+                print(statement)
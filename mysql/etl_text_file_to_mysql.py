@@ -10,10 +10,44 @@
 #   3) Row count limitation for ETL data load
 #   4) Database Create / Truncate / Insert table (DDL)
 #   5) Summary Report
+#   6) Streaming load: the file is read, parsed and inserted in batches of BATCH_SIZE rows,
+#      memory depends on the batch size and not on the file size
+#   7) csv module tokenizer (quoted values, embedded quotes, '\t' / TAB delimiter),
+#      see etl_tokenizer_benchmark.py
+#   8) Bulk load mode: LOAD DATA LOCAL INFILE of temporary files (Insert statements when the
+#      server disallows local infile)
+#   9) Multi-row Insert statements committed every N rows, with a checkpoint file (byte offset,
+#      rows commited) next to the source file to resume an interrupted load
+#  10) Parallel mode: byte ranges aligned on record boundaries (quote aware) loaded by worker
+#      processes over their own connection
+#  11) Column types inferred from a sample of rows (INT, BIGINT, DECIMAL, DATE, DATETIME, sized
+#      VARCHAR / TEXT), a LOAD DATA chunk with values coerced to them fails the load, secondary
+#      indexes dropped before the load and built after it
+#  12) Batch mode (command line arguments, no dialog): files of a glob pattern or a JSON manifest
+#      loaded by a pool of worker processes, one connection each, with a JSON summary per file
+#      (the files of a table are loaded one after the other, truncated before the first one)
 #
-# Version : 1.0v
+#      python etl_text_file_to_mysql.py --glob '/data/*.csv' --header --truncate --workers 4
+#      python etl_text_file_to_mysql.py --manifest files.json --summary summary.json
+#
+#      manifest: [{"file": "/data/a.csv", "table": "A", "delimiter": ";", "header": true}, ...]
+#
+# Version : 1.7v
 
+import argparse
+import csv
+import glob
+import io
+import json
 import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from itertools import chain, count, islice
+from operator import itemgetter, methodcaller
 import mysql.connector
 
 ## =================================================================> MySQL DB connection details:
@@ -25,243 +59,1203 @@ mysqlDS = {
 						'database' : os.environ.get('P_MYSQL_DB')
 						}
 
-## =================================================================> User Dialog and inputs:
+BATCH_SIZE = 10000          ## rows parsed and written per LOAD DATA file write
+PARALLEL_MAX_WORKERS = 16  ## parallel workers (connections), past the server write capacity more don't help
+PARALLEL_RANGES_PER_WORKER = 4  ## byte ranges per parallel worker, so workers finishing early pick up more
+INSERT_BATCH_ROWS = 1000    ## rows per multi-row Insert statement
+COMMIT_ROWS = 100000        ## rows per Insert transaction, a checkpoint is saved after each commit
+BULK_CHUNK_ROWS = 1000000   ## rows per LOAD DATA LOCAL INFILE temporary file
+WARNINGS_SAMPLE = 10        ## LOAD DATA warnings printed per chunk
+READ_BUFFER_SIZE = 1048576  ## source file read block (bytes)
+QUOTED_BLOCK_MAX_SIZE = 64 * READ_BUFFER_SIZE  ## bytes a block can grow to while a quoted value stays open
+SAMPLE_ROWS = 10000         ## rows sampled to infer the column types
+VARCHAR_MAX_LENGTH = 4096   ## longer sampled values (with the x2 margin) make TEXT columns
+ROW_SIZE_LIMIT = 65535      ## MySQL row size (bytes), TEXT columns are stored off the row
+INDEX_PREFIX_LENGTH = 768   ## indexed prefix of TEXT / long VARCHAR columns (3072 bytes in utf8mb4)
 
-print('\033c')
-print('        ***** Automation ETL process to load Flat file into MySQL ***** \n')
-
-try:
-	mydb = mysql.connector.connect(
-  host = mysqlDS['host'],
-  user = mysqlDS['user'],
-  password = mysqlDS['password'],
-  database = mysqlDS['database']
-	)	
-except mysql.connector.Error as e:
-  print("      >> Error code:", e.errno)        # error number
-  print("      >> SQLSTATE value:", e.sqlstate) # SQLSTATE value
-  print("      >> Error message:", e.msg)       # error message
-  print("      >> Error:", e)                   # errno, sqlstate, msg values
-  s = str(e)
-  print("      >> Error:", s)
-  exit()                   # errno, sqlstate, msg values
-
-schema = mysqlDS['database']
-mycursor = mydb.cursor()
-data = []  
-
-print('   | 1) Flat file definition: ')
-print('   | ----------------------------------------------------------------------------------- |')
-
-filePath = input('   |- Please insert source file path > ') 
-fileName = input('   |- Insert source filename > ') 
-
-if len(filePath) > 0:
-	filePath
-else:
-	filePath = os.path.abspath(os.getcwd()) + '/'
-
-try:
-	listDirectory = os.listdir(filePath)
-except:
-	print('\n- Error: Datasource fileName or path not exists (!) ')
-	print('Migration aboarted.  \n')
-	exit()
-else:
-	pass
-
-if fileName not in listDirectory:
-	print('\n- Error: fileName or path not exists (!) ')
-	print('ETL process aboarted.  \n')
-	exit()
-
-## ----------->>> Open source file for reading data:
-
-fileNamePath = filePath + '/' + fileName
-openFile = open(fileNamePath, 'r', encoding='utf-8',errors='ignore').read().splitlines()
-
-fileTotalRecords = str(len(openFile))
-
-print('\n   | 2) File definition: ' + fileName + ' (total rows counted:' + fileTotalRecords + ')')
-print('   | ----------------------------------------------------------------------------------- |')
-
-header =input('   |- Set first row as header (Y/N) > ').upper() 
-if header != 'Y':
-	header='N'
-
-fieldDelimiter = input('   |- Insert fields delimiter character ([,] - defualt) > ')
-if fieldDelimiter is None or len(fieldDelimiter) == 0:
-	fieldDelimiter = ','
-
-fieldTermmination = input('   |- Insert field values delimiter character ([None] - defualt) > ')
-if fieldTermmination is None or len(fieldTermmination) == 0:
-	fieldTermmination = ''
-
-limit = input('   |- Inser rows limit (0-no limit) > ')
-try:
-	int(limit)
-except:
-	limit = 0
-
-limit = int(limit)
-
-if limit>len(openFile) or limit==0:
-	if limit!=0:
-		print('   |- Warnning: Source file total counted rows (' +str(len(openFile)) + ') is lower then inserted limit value (' + str(limit) + ')')
-		print('   |            Setting value to limit=' + str(len(openFile)) + '\n')
-	
-	limit=len(openFile)
-
-else:
-	if header.upper() == 'Y':
-		limit+=1	
-
-print('\n   | 3) Target table definition: ' + fileName + ' (total rows counted:' + str(len(openFile)) + ')')
-print('   | ----------------------------------------------------------------------------------- |')
-
-createTargetTable = str(input('   |- Create target table ? (Y/N) > '))
-if createTargetTable.upper() == 'Y':
-	tableName =   str(input('   |-                 Enter table name > ').upper()).\
-									  replace('.', '_').replace(' ', '_').replace('(','_').\
-									  replace(')','_').replace('-','_').replace('\ufeff', '')
-
-else:
-	tableName = fileName.replace('.', '_').replace(' ', '_').replace('(','_').replace(')','_').replace('-','_')
-
-print(' --------------------------------->>>> ' + tableName)
-
-truncateTargetTable = input('   |- Truncate target table (Y/N) > ').upper() 
-if truncateTargetTable.upper() != 'Y':
-	truncateTargetTable='N'
-
-print('\n   |- Log output details:')
-
-###########################################################
+csv.field_size_limit(2147483647)  ## values are only bounded by the target columns
 
-## ----------->>> Generate Header Columns
+## LOAD DATA is refused by the server (1148, 3948) or by the client (2068), rows are inserted instead
+LOCAL_INFILE_DISABLED_ERRORS = (1148, 3948, 2068)
+DUPLICATE_KEY_NAME_ERROR = 1061  ## the index was already built (e.g. by an interrupted run)
+## LOAD DATA warnings of values coerced to the column type (out of range, truncated, incorrect value, too long)
+COERCED_VALUE_WARNINGS = (1264, 1265, 1292, 1366, 1406)
+LOAD_DATA_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0'})
 
-if header.upper()=='Y':
-	startRow=1
-	tableHeader = [str(field) + ' varchar(255)' for field in list(openFile[0].\
-		replace('(','_').replace(')','_').replace(' ', '_').\
-		replace('"', '').replace('.','_').replace("'", '_').\
-		replace('%', '_').replace('\ufeff', '').split(','))]
+INTEGER_PATTERN = re.compile(r'-?(0|[1-9][0-9]*)')
+DECIMAL_PATTERN = re.compile(r'-?(0|[1-9][0-9]*)(\.[0-9]+)?')
+DATE_PATTERN = re.compile(r'([0-9]{4}-[0-9]{2}-[0-9]{2})([ T]([01][0-9]|2[0-3]):[0-5][0-9]:[0-5][0-9](\.[0-9]{1,6})?)?')
+
+## =================================================================> Source file streaming:
+
+def readBlocks(fileNamePath, startOffset=0, endOffset=None, blockSize=READ_BUFFER_SIZE):
+	"""
+	Stream the source file from startOffset (up to endOffset) in text blocks of about blockSize bytes
+	ending on a line break. The file is read in binary, so the byte offset after each block is known
+	(to resume a load).
+
+	Yields (block, byte offset after the block)
+	"""
+	offset = startOffset
+	rest = b''
+	with open(fileNamePath, 'rb') as sourceFile:
+		sourceFile.seek(startOffset)
+		while True:
+			readSize = blockSize if endOffset is None else min(blockSize, endOffset - offset - len(rest))
+			chunk = sourceFile.read(readSize) if readSize > 0 else b''
+			if not chunk:
+				break
+			chunk = rest + chunk
+			end = chunk.rfind(b'\n') + 1
+			if end == 0:
+				# no line break yet, keep reading the line
+				rest = chunk
+				continue
+			rest = chunk[end:]
+			offset += end
+			yield chunk[:end].decode('utf-8', errors='ignore'), offset
+	if rest:
+		offset += len(rest)
+		yield rest.decode('utf-8', errors='ignore'), offset
+
+
+def tokenize(blocks, delimier=',', quoteChar='"', position=None):
+	"""
+	Lazily split (block, byte offset after the block) pairs of readBlocks into rows of values.
+
+	Blocks without any quote character are split with str.split, the others with the C csv parser:
+	delimiters and line breaks between quote characters don't split a value, doubled quote
+	characters are an embedded quote. A block ending inside a quoted value (odd number of quote
+	characters) is parsed together with the next one, up to QUOTED_BLOCK_MAX_SIZE bytes: past it a
+	ValueError reports the unbalanced quote character (e.g. an inch mark) instead of reading the
+	rest of the file into memory.
+
+	When a position dictionary is given ({'blockOffset': offset of the first block}), it tracks the
+	byte offset where the block of the row being read starts ('blockOffset') and the rows read
+	before that block ('rowsBefore'), so a checkpoint can point back to any row.
+	"""
+	if delimier in ('\\t', 'TAB'):
+		delimier = '\t'
+	quoteChar = quoteChar or '"'
+	splitRow = methodcaller('split', delimier)
+
+	def blockRows(blocks):
+		pending = ''
+		pendingOffset = 0
+		blockOffset = position['blockOffset'] if position is not None else 0
+		counter = None
+		for block, offset in blocks:
+			if pending:
+				block = pending + block
+				blockOffset = pendingOffset
+				pending = ''
+			if quoteChar not in block:
+				if '\r' in block:
+					block = block.replace('\r\n', '\n')
+				lines = block.split('\n')
+				if lines[-1] == '':
+					lines.pop()
+				rows = map(splitRow, lines)
+			elif block.count(quoteChar) % 2:
+				if len(block) > QUOTED_BLOCK_MAX_SIZE:
+					raise ValueError('unbalanced quote character ' + quoteChar + ' in the ' + str(len(block)) +
+									 ' bytes read from offset ' + str(blockOffset) + ', set another field values delimiter character')
+				pending = block
+				pendingOffset = blockOffset
+				blockOffset = offset
+				continue
+			else:
+				# only line breaks end a record (str.splitlines breaks on \x0c, \x1c, \u2028...)
+				rows = csv.reader(io.StringIO(block, newline=''), delimiter=delimier, quotechar=quoteChar, doublequote=True, strict=False)
+			if position is not None:
+				# the previous block is fully read once the next one is asked for
+				if counter is not None:
+					position['rowsBefore'] += next(counter) - 1
+				position['blockOffset'] = blockOffset
+				counter = count()
+				rows = map(itemgetter(1), zip(counter, rows))
+			yield rows
+			blockOffset = offset
+		if pending:
+			if position is not None:
+				if counter is not None:
+					position['rowsBefore'] += next(counter) - 1
+				position['blockOffset'] = pendingOffset
+			yield csv.reader(io.StringIO(pending, newline=''), delimiter=delimier, quotechar=quoteChar, doublequote=True, strict=False)
+
+	return chain.from_iterable(blockRows(blocks))
+
+
+def recordBoundaries(fileNamePath, targetOffsets, quoteChar='"', blockSize=READ_BUFFER_SIZE):
+	"""
+	Move each target offset to the start of the next record: after the first line break at or
+	after it that is outside of a quoted value. The quote parity is counted from the start of
+	the file (with bytes.count, doubled quotes keep it even), so line breaks inside quoted values
+	are never taken as a boundary.
+
+	Returns the sorted record boundary offsets (the file size for targets past the last record)
+	"""
+	quote = (quoteChar or '"').encode('utf-8')
+	targets = sorted(targetOffsets)
+	boundaries = []
+	blockStart = 0
+	inQuotes = False
+	with open(fileNamePath, 'rb') as sourceFile:
+		while targets:
+			block = sourceFile.read(blockSize)
+			if not block:
+				break
+			blockEnd = blockStart + len(block)
+			while targets and targets[0] < blockEnd:
+				position = max(targets[0] - blockStart, 0)
+				# quote parity at the target position
+				parity = inQuotes ^ (block.count(quote, 0, position) % 2 == 1)
+				lineBreak = block.find(b'\n', position)
+				while lineBreak >= 0:
+					parity ^= block.count(quote, position, lineBreak) % 2 == 1
+					if not parity:
+						break
+					position = lineBreak
+					lineBreak = block.find(b'\n', lineBreak + 1)
+				if lineBreak < 0:
+					# no boundary in this block, look again in the next one
+					targets[0] = blockEnd
+					break
+				boundaries.append(blockStart + lineBreak + 1)
+				targets.pop(0)
+			inQuotes ^= block.count(quote) % 2 == 1
+			blockStart = blockEnd
+	boundaries.extend(os.path.getsize(fileNamePath) for _ in targets)
+	return sorted(boundaries)
+
+
+def iterRows(rows, headerColCounted, nullColumns=()):
+	"""
+	Lazily complete missing columns of the rows by the header structure, empty values
+	of the nullColumns (non character columns) are loaded as NULL.
+	"""
+	def padRow(rowData):
+		if len(rowData) < headerColCounted:
+			rowData.extend([''] * (headerColCounted - len(rowData)))
+		return rowData
+
+	def padRowNulls(rowData):
+		padRow(rowData)
+		for i in nullColumns:
+			if rowData[i] == '':
+				rowData[i] = None
+		return rowData
+
+	return map(padRowNulls if nullColumns else padRow, rows)
+
+
+def iterBatches(rows, batchSize=BATCH_SIZE):
+	"""
+	Group rows into lists of batchSize rows, only one batch is held in memory.
+	"""
+	rows = iter(rows)
+	while True:
+		batch = list(islice(rows, batchSize))
+		if not batch:
+			return
+		yield batch
 
-	tableHeaderInsert = [field for field in list(openFile[0].\
+
+def headerColumns(headerRow):
+	"""
+	Column names of the header row.
+	"""
+	return [field.\
 		replace('(','_').replace(')','_').replace(' ', '_').\
 		replace('"', '').replace('.','_').replace("'", '_').\
-		replace('%', '_').replace('\ufeff', '').split(','))]
-
-else:
-	startRow=0
-	tableHeader = ['field' + str(i+1) + ' varchar(255)' for i in range(len(list(openFile[0].split(','))))]	
-	tableHeaderInsert = ['field' + str(i+1) for i in range(len(list(openFile[0].split(','))))]	
-
-## ----------->>> Generate Data by fields
-
-cnt=0
-data=[]
-val=''
-delimier = fieldDelimiter 
-rowData = []
-
-for line in openFile[startRow:limit]:
-	for l in line:
-		if l == '"':
-			if cnt==1:
-				cnt=0
+		replace('%', '_').replace('\ufeff', '') for field in headerRow]
+
+## =================================================================> Column types:
+
+def inferColumnType(values):
+	"""
+	Most compact column type holding all the sampled values of a column.
+
+	Returns (column type, True for non character types, their empty values are loaded as NULL)
+	"""
+	values = [value for value in values if value != '']
+	if not values:
+		return 'varchar(255)', False
+
+	if all(map(INTEGER_PATTERN.fullmatch, values)):
+		maxDigits = max(len(value.lstrip('-')) for value in values)
+		if maxDigits < 10:
+			return 'int', True
+		if maxDigits < 19:
+			return 'bigint', True
+
+	# integers past bigint are decimal(n,0)
+	if all(map(DECIMAL_PATTERN.fullmatch, values)):
+		matches = [DECIMAL_PATTERN.fullmatch(value) for value in values]
+		integerDigits = max(len(match.group(1)) for match in matches)
+		scale = max(len(match.group(2) or '.') - 1 for match in matches)
+		# room for 2 more integer digits than sampled
+		precision = integerDigits + scale + 2
+		if precision <= 65 and scale <= 30:
+			return 'decimal(' + str(precision) + ',' + str(scale) + ')', True
+
+	else:
+		matches = list(map(DATE_PATTERN.fullmatch, values))
+		if all(matches):
+			try:
+				for match in matches:
+					date.fromisoformat(match.group(1))
+			except ValueError:
+				pass
 			else:
-				cnt+=1	
-		if l != delimier:
-			val+=l
+				if not any(match.group(2) for match in matches):
+					return 'date', True
+				fsp = max(len(match.group(4) or '.') - 1 for match in matches)
+				return 'datetime' + ('(' + str(fsp) + ')' if fsp else ''), True
+
+	# room for twice the longest sampled value
+	length = 16
+	while length < max(map(len, values)) * 2:
+		length *= 2
+	if length > VARCHAR_MAX_LENGTH:
+		return 'mediumtext' if length > 16383 else 'text', False
+	return 'varchar(' + str(length) + ')', False
+
+
+def inferColumnTypes(rows, headerColCounted):
+	"""
+	Column types of the sampled rows, VARCHAR columns are turned into TEXT (largest first)
+	until the row fits in ROW_SIZE_LIMIT bytes (utf8mb4).
+
+	Returns (column types, indexes of the nullable columns)
+	"""
+	rows = list(rows)
+	if not rows:
+		return ['varchar(255)'] * headerColCounted, []
+	columnTypes = []
+	nullColumns = []
+	for i, values in enumerate(islice(zip(*rows), headerColCounted)):
+		columnType, nullable = inferColumnType(values)
+		columnTypes.append(columnType)
+		if nullable:
+			nullColumns.append(i)
+
+	def varcharLength(columnType):
+		return int(columnType[8:-1]) if columnType.startswith('varchar(') else 0
+
+	# non varchar columns are counted as 8 bytes (TEXT pointers 12)
+	while sum(varcharLength(columnType) * 4 + 2 for columnType in columnTypes) + 12 * len(columnTypes) > ROW_SIZE_LIMIT:
+		longest = max(range(len(columnTypes)), key=lambda i: varcharLength(columnTypes[i]))
+		if not varcharLength(columnTypes[longest]):
+			break
+		columnTypes[longest] = 'text'
+	return columnTypes, nullColumns
+
+
+def indexColumn(column, columnType):
+	"""
+	Indexed part of the column, a prefix of TEXT / long VARCHAR columns.
+	"""
+	if columnType.endswith('text') or (columnType.startswith('varchar(') and int(columnType[8:-1]) > INDEX_PREFIX_LENGTH):
+		return column + '(' + str(INDEX_PREFIX_LENGTH) + ')'
+	return column
+
+## =================================================================> Database:
+
+def connectMySQL():
+	try:
+		mydb = mysql.connector.connect(
+	  allow_local_infile = True,
+	  host = mysqlDS['host'],
+	  user = mysqlDS['user'],
+	  password = mysqlDS['password'],
+	  database = mysqlDS['database']
+		)
+	except mysql.connector.Error as e:
+		print("      >> Error code:", e.errno)        # error number
+		print("      >> SQLSTATE value:", e.sqlstate) # SQLSTATE value
+		print("      >> Error message:", e.msg)       # error message
+		print("      >> Error:", e)                   # errno, sqlstate, msg values
+		s = str(e)
+		print("      >> Error:", s)
+		sys.exit()                   # errno, sqlstate, msg values
+	return mydb
+
+
+class LoadError(Exception):
+	"""
+	Failed Insert statement / LOAD DATA file, the rows since the last commit are rolled back.
+	"""
+
+	def __init__(self, message, rowsCommitted, firstRow, lastRow, sampleRows):
+		Exception.__init__(self, message)
+		self.message = message
+		self.rowsCommitted = rowsCommitted
+		self.firstRow = firstRow
+		self.lastRow = lastRow
+		self.sampleRows = sampleRows
+
+
+def insertStatement(schema, tableName, columns, rowsCount):
+	"""
+	Multi-row Insert statement of rowsCount rows.
+	"""
+	rowValues = '(' + ','.join(['%s'] * len(columns)) + ')'
+	return 'Insert into ' + schema + '.' + tableName + '(' + ','.join(columns) + ') Values ' + ','.join([rowValues] * rowsCount) + ';'
+
+
+def loadBatches(mydb, schema, tableName, columns, batches, commitRows=COMMIT_ROWS, onCommit=None, progress=True):
+	"""
+	Insert each batch with one multi-row Insert statement, committed every commitRows rows
+	(onCommit is called with the rows loaded after each commit, to save a checkpoint).
+
+	Returns the number of rows inserted, raises LoadError on a failed batch
+	"""
+	mycursor = mydb.cursor()
+	statements = {}
+	rowsInserted = 0
+	rowsCommitted = 0
+	for batch in batches:
+		if len(batch) not in statements:
+			statements[len(batch)] = insertStatement(schema, tableName, columns, len(batch))
+		try:
+			mycursor.execute(statements[len(batch)], list(chain.from_iterable(batch)))
+		except mysql.connector.Error as e:
+			mydb.rollback()
+			raise LoadError('failed to insert data: ' + str(e), rowsCommitted, rowsCommitted + 1, rowsInserted + len(batch), batch[:10])
+		rowsInserted += len(batch)
+		if rowsInserted - rowsCommitted >= commitRows:
+			mydb.commit()
+			rowsCommitted = rowsInserted
+			if onCommit:
+				onCommit(rowsCommitted)
+		if progress:
+			print('      >> ' + str(rowsInserted) + ' rows inserted...', end='\r')
+	if progress:
+		print('')
+	mydb.commit()
+	if onCommit:
+		onCommit(rowsInserted)
+	return rowsInserted
+
+
+def escapeRow(rowData):
+	"""
+	Row as a LOAD DATA line (TAB separated, backslash escaped, None as \\N).
+	"""
+	return '\t'.join(['\\N' if value is None else value.translate(LOAD_DATA_ESCAPES) for value in rowData]) + '\n'
+
+
+def loadDataStatement(fileNamePath, schema, tableName, columns):
+	return "Load Data Local Infile '" + fileNamePath.replace('\\', '\\\\').replace("'", "\\'") + "'" + \
+		' Into Table ' + schema + '.' + tableName + ' Character Set utf8mb4' + \
+		" Fields Terminated By '\\t' Escaped By '\\\\' Lines Terminated By '\\n'" + \
+		' (' + ','.join(columns) + ');'
+
+
+def localInfileAllowed(mydb, schema, tableName, columns):
+	"""
+	Probe LOAD DATA LOCAL INFILE with an empty file: False when the server or client disallows it.
+	"""
+	with tempfile.NamedTemporaryFile(suffix='.tsv') as emptyFile:
+		try:
+			mydb.cursor().execute(loadDataStatement(emptyFile.name, schema, tableName, columns))
+		except mysql.connector.Error as e:
+			if e.errno in LOCAL_INFILE_DISABLED_ERRORS:
+				print('      >> Local infile is not allowed (' + str(e.errno) + ': ' + str(e.msg) + '), loading with Insert statements')
+				return False
+			raise
+	return True
+
+
+def bulkLoad(mydb, schema, tableName, columns, batches, onCommit=None, progress=True, inferredTypes=False):
+	"""
+	Stream the batches into temporary files of up to BULK_CHUNK_ROWS rows, each loaded with
+	LOAD DATA LOCAL INFILE and committed (onCommit is called with the rows read after each commit).
+	LOAD DATA LOCAL skips rows as IGNORE does (duplicate keys, invalid values), the rows loaded are
+	the server affected rows.
+
+	LOAD DATA LOCAL also stores values not matching their column type coerced (0, zero dates, truncated
+	strings) with a warning: with inferredTypes (columns typed from a sample of rows) a chunk with
+	such warnings is rolled back and fails the load.
+
+	Returns (rows read, rows loaded, warnings count), raises LoadError on a failed chunk
+	"""
+	mycursor = mydb.cursor()
+	rowsRead = 0
+	rowsLoaded = 0
+	warningsCount = 0
+	batches = iter(batches)
+	moreRows = True
+	while moreRows:
+		with tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='', suffix='.tsv') as chunkFile:
+			chunkRows = 0
+			moreRows = False
+			for batch in batches:
+				chunkFile.writelines(map(escapeRow, batch))
+				chunkRows += len(batch)
+				if chunkRows >= BULK_CHUNK_ROWS:
+					moreRows = True
+					break
+			if chunkRows == 0:
+				break
+			chunkFile.flush()
+
+			loadDataSQLState = loadDataStatement(chunkFile.name, schema, tableName, columns)
+			try:
+				mycursor.execute(loadDataSQLState)
+			except mysql.connector.Error as e:
+				mydb.rollback()
+				raise LoadError('failed to load data: ' + str(e) + '\n' + loadDataSQLState, rowsRead, rowsRead + 1, rowsRead + chunkRows, [])
+
+			if mycursor.warning_count:
+				warningsCount += mycursor.warning_count
+				mycursor.execute('Show Warnings')
+				chunkWarnings = mycursor.fetchall()
+				for level, code, message in chunkWarnings[:WARNINGS_SAMPLE]:
+					print('      >> ' + level + ' ' + str(code) + ': ' + message)
+				coerced = [message for level, code, message in chunkWarnings if code in COERCED_VALUE_WARNINGS]
+				if inferredTypes and coerced:
+					mydb.rollback()
+					raise LoadError('values not matching the column types inferred from the sampled rows (' + coerced[0] +
+									', ' + str(len(coerced)) + ' such warnings), widen the columns or load with more sampled rows',
+									rowsRead, rowsRead + 1, rowsRead + chunkRows, [])
+			chunkLoaded = mycursor.rowcount if mycursor.rowcount >= 0 else chunkRows
+			mydb.commit()
+			rowsRead += chunkRows
+			rowsLoaded += chunkLoaded
+			if onCommit:
+				onCommit(rowsRead)
+			if progress:
+				print('      >> ' + str(rowsLoaded) + ' rows loaded...', end='\r')
+			if progress and chunkLoaded < chunkRows:
+				print('      >> ' + str(chunkRows - chunkLoaded) + ' rows of the chunk skipped by LOAD DATA (see the warnings)')
+	if progress:
+		print('')
+	return rowsRead, rowsLoaded, warningsCount
+
+
+def loadRange(fileNamePath, startOffset, endOffset, fieldDelimiter, fieldTermmination, schema, tableName, columns,
+			  nullColumns, bulkLoadMode, insertBatchRows, commitRows, inferredTypes=False):
+	"""
+	Parallel mode worker: parse the records of [startOffset, endOffset) and load them over its own connection.
+
+	Returns the range summary (rows loaded, warnings, seconds and the error if the load failed)
+	"""
+	started = time.time()
+	summary = {'startOffset': startOffset, 'endOffset': endOffset, 'rowsRead': 0, 'rows': 0, 'warnings': 0, 'error': None}
+	try:
+		mydb = mysql.connector.connect(allow_local_infile = True, **mysqlDS)
+	except mysql.connector.Error as e:
+		summary['error'] = 'failed to connect: ' + str(e)
+		return summary
+
+	rows = iterRows(tokenize(readBlocks(fileNamePath, startOffset, endOffset), fieldDelimiter, fieldTermmination), len(columns), nullColumns)
+	try:
+		if bulkLoadMode == 'Y':
+			summary['rowsRead'], summary['rows'], summary['warnings'] = bulkLoad(mydb, schema, tableName, columns, iterBatches(rows), progress=False,
+																					inferredTypes=inferredTypes)
 		else:
-			if cnt ==0:
-				if fieldTermmination is not None or len(fieldTermmination) > 0:
-					val = val.replace(fieldTermmination, '')						
-				rowData.append(val)
-				val=''
-	rowData.append(val)
-	
-	data.append(rowData)
-	rowData = []
-
-## ----------->>> Complete missing columns by Header structure
-
-headerColCounted = len(tableHeader)
-
-for i in range(len(data)):
-	colCounted = len(data[i])
-	if colCounted == headerColCounted:
-		data[i]
-	else:	
-		colDelta = headerColCounted - colCounted
-		for ii in range(colDelta):
-			data[i].insert(len(data[i]), '')
-			
-dataTotalRecords = str(len(data))	
-
-## =================================================================> SQL Create statment (DLL)
-
-createSQLState = 'Create Table If Not Exists ' + schema + '.' + tableName + ' (\n' + ',\n'.join(tableHeader) + ');' 
-
-###print('\n' + createSQLState )
-
-try:
-	mycursor.execute(createSQLState)
-except:
-	print('      >> Error: failed to create table name:' + schema + '.' + tableName)	
-	print('\n', createSQLState)
-	print('      >> Process aborted.')
-	exit(0)
-else:
-	print('      >> Target table: ' + schema + '.' + tableName + ' replaced or created.')
-	
-
-## =================================================================> Truncate Target table SQL statment (DDL)
-
-if truncateTargetTable.upper() == 'Y':
-	truncateSQLState = 'Truncate Table ' + schema + '.' + tableName +';'
-	print('      >> ' + truncateSQLState )
+			summary['rows'] = summary['rowsRead'] = loadBatches(mydb, schema, tableName, columns, iterBatches(rows, insertBatchRows), commitRows, progress=False)
+	except LoadError as e:
+		summary['rows'] = summary['rowsRead'] = e.rowsCommitted
+		summary['error'] = e.message + ' (range rows ' + str(e.firstRow) + ' to ' + str(e.lastRow) + ')'
+	except ValueError as e:
+		summary['error'] = str(e)
+	finally:
+		mydb.close()
+	summary['seconds'] = round(time.time() - started, 1)
+	return summary
+
+
+def loadParallel(fileNamePath, dataOffset, workers, fieldDelimiter, fieldTermmination, schema, tableName, columns,
+				 nullColumns, bulkLoadMode, insertBatchRows, commitRows, inferredTypes=False):
+	"""
+	Split the data records (from dataOffset) into byte ranges of about the same size aligned on record
+	boundaries, loaded at the same time by a pool of worker processes (one connection each).
+
+	Returns the summaries of the ranges, in file order
+	"""
+	fileSize = os.path.getsize(fileNamePath)
+	rangesCount = workers * PARALLEL_RANGES_PER_WORKER
+	targets = [dataOffset + (fileSize - dataOffset) * i // rangesCount for i in range(1, rangesCount)]
+	boundaries = [dataOffset] + recordBoundaries(fileNamePath, targets, fieldTermmination) + [fileSize]
+	ranges = sorted(set(zip(boundaries[:-1], boundaries[1:])))
+	ranges = [(startOffset, endOffset) for startOffset, endOffset in ranges if endOffset > startOffset]
+
+	print('      >> Loading ' + str(len(ranges)) + ' ranges with ' + str(workers) + ' workers...')
+	summaries = []
+	with ProcessPoolExecutor(max_workers=workers) as executor:
+		futures = [
+			executor.submit(loadRange, fileNamePath, startOffset, endOffset, fieldDelimiter, fieldTermmination,
+							schema, tableName, columns, nullColumns, bulkLoadMode, insertBatchRows, commitRows, inferredTypes)
+			for startOffset, endOffset in ranges
+		]
+		for future in as_completed(futures):
+			summary = future.result()
+			summaries.append(summary)
+			print('      >> Range ' + str(summary['startOffset']) + '-' + str(summary['endOffset']) + ': ' +
+				  str(summary['rows']) + ' rows' + (', error: ' + summary['error'] if summary['error'] else ''))
+	return sorted(summaries, key=itemgetter('startOffset'))
+
+## =================================================================> Deferred indexes:
+
+def deferIndexes(mydb, schema, tableName, onDrop=None):
+	"""
+	Disable keys and drop the non unique secondary indexes of the table before the load, they are
+	built once over the loaded rows instead of being maintained row by row (onDrop is called with
+	their definitions before they are dropped, to save them).
+
+	Returns the definitions of the dropped indexes, added back by buildIndexes
+	"""
 	mycursor = mydb.cursor()
-	mycursor.execute(truncateSQLState)	
+	mycursor.execute('Alter Table ' + schema + '.' + tableName + ' Disable Keys;')
+	mycursor.execute('Select INDEX_NAME, INDEX_TYPE, COLUMN_NAME, SUB_PART, COLLATION From information_schema.STATISTICS'
+					 ' Where TABLE_SCHEMA = %s And TABLE_NAME = %s And NON_UNIQUE = 1 Order By INDEX_NAME, SEQ_IN_INDEX',
+					 (schema, tableName))
+	indexes = {}
+	for indexName, indexType, column, subPart, collation in mycursor.fetchall():
+		indexes.setdefault(indexName, {'type': indexType, 'columns': []})['columns'].append(
+			None if column is None else
+			'`' + column + '`' + ('(' + str(subPart) + ')' if subPart else '') + (' Desc' if collation == 'D' else ''))
 
-## =================================================================> INSERT INTO sql query statement
+	indexDefinitions = []
+	for indexName, index in indexes.items():
+		# functional indexes are kept
+		if None in index['columns']:
+			continue
+		kind = index['type'].capitalize() + ' Index' if index['type'] in ('FULLTEXT', 'SPATIAL') else 'Index'
+		indexDefinitions.append(kind + ' `' + indexName + '` (' + ', '.join(index['columns']) + ')')
+	if not indexDefinitions:
+		return []
 
-values = ['%s' for field in list(openFile[0].split(','))]
+	dropSQLState = 'Alter Table ' + schema + '.' + tableName + ' ' + \
+		', '.join('Drop Index `' + definition.split('`')[1] + '`' for definition in indexDefinitions) + ';'
+	if onDrop:
+		onDrop(indexDefinitions)
+	print('      >> ' + dropSQLState)
+	try:
+		mycursor.execute(dropSQLState)
+	except mysql.connector.Error as e:
+		# e.g. an index needed by a foreign key
+		print('      >> Secondary indexes are kept (' + str(e) + ')')
+		return []
+	return indexDefinitions
 
-insertSQLState='Insert into ' + schema + '.' + tableName + '(' + ',\n'.join(tableHeaderInsert) + ') Values(' + ','.join(values) + ');'
 
-print('      >> Inserting source data file into target table...')
+def addIndexes(mycursor, schema, tableName, indexDefinitions):
+	"""
+	Add the indexes with one Alter Table statement, one at a time when it fails.
 
-mycursor = mydb.cursor()
+	Returns the definitions of the indexes that could not be added
+	"""
+	addSQLState = 'Alter Table ' + schema + '.' + tableName + ' ' + \
+		', '.join('Add ' + definition for definition in indexDefinitions) + ';'
+	print('      >> ' + addSQLState)
+	started = time.time()
+	try:
+		mycursor.execute(addSQLState)
+	except mysql.connector.Error as e:
+		if e.errno == DUPLICATE_KEY_NAME_ERROR and len(indexDefinitions) == 1:
+			print('      >> Index already exists')
+			return []
+		print('      >> Error: failed to build indexes: ' + str(e))
+		if len(indexDefinitions) > 1:
+			return list(chain.from_iterable(addIndexes(mycursor, schema, tableName, [definition]) for definition in indexDefinitions))
+		return indexDefinitions
+	print('      >> Indexes built in ' + str(round(time.time() - started, 1)) + ' sec')
+	return []
 
-try:
-	mycursor.executemany(insertSQLState,data)
-	
-except:
-	print('      >> Error: failed to insert data into table name: ' + schema + '.' + tableName)	
-	print('\n', insertSQLState)	
 
-	print('>>>>>>>>> ' + str(len(data)))
+def buildIndexes(mydb, schema, tableName, indexDefinitions):
+	"""
+	Enable keys and add the indexes, the BTREE indexes with one Alter Table statement (a single pass
+	over the rows), FULLTEXT / SPATIAL indexes one at a time (InnoDB builds only one per statement).
+	A lost connection is opened again first.
 
-	for row in data[:10]:
-			print(row)
-	
-	print('      >> Process aborted.')
-	exit(0)
-else:	
-	mydb.commit()
+	Returns the definitions of the indexes that could not be added
+	"""
+	try:
+		if not mydb.is_connected():
+			mydb.reconnect(attempts=3, delay=1)
+		mycursor = mydb.cursor()
+		mycursor.execute('Alter Table ' + schema + '.' + tableName + ' Enable Keys;')
+	except mysql.connector.Error as e:
+		print('      >> Error: failed to enable keys: ' + str(e))
+		return list(indexDefinitions)
+	btreeIndexes = [definition for definition in indexDefinitions if definition.startswith('Index')]
+	otherIndexes = [[definition] for definition in indexDefinitions if not definition.startswith('Index')]
+	failedIndexes = []
+	for definitions in ([btreeIndexes] if btreeIndexes else []) + otherIndexes:
+		failedIndexes.extend(addIndexes(mycursor, schema, tableName, definitions))
+	return failedIndexes
+
+## =================================================================> Load checkpoints:
+
+def checkpointPath(fileNamePath, schema, tableName):
+	return fileNamePath + '.' + str(schema) + '.' + tableName + '.checkpoint'
+
+
+def indexesCheckpointPath(checkpointFile):
+	"""
+	Definitions of the dropped secondary indexes not built yet, kept next to the checkpoint of the
+	rows (parallel loads have none) and whether the load is resumed or not.
+	"""
+	return checkpointFile + '.indexes'
+
+
+def readIndexesCheckpoint(indexesFile):
+	if not os.path.exists(indexesFile):
+		return []
+	try:
+		with open(indexesFile) as f:
+			return json.load(f)
+	except ValueError:
+		print('   |- Warnning: unreadable indexes checkpoint ' + indexesFile + ', ignored')
+		return []
+
+
+def readCheckpoint(checkpointFile, fileSize):
+	"""
+	Checkpoint of an interrupted load of the file, None when there is none or the file changed.
+	"""
+	if not os.path.exists(checkpointFile):
+		return None
+	try:
+		with open(checkpointFile) as f:
+			checkpoint = json.load(f)
+	except ValueError:
+		return None
+	if checkpoint.get('fileSize') != fileSize:
+		print('   |- Warnning: source file changed since checkpoint ' + checkpointFile + ', ignored')
+		return None
+	return checkpoint
+
+
+def writeCheckpoint(checkpointFile, checkpoint):
+	"""
+	Atomically replace the checkpoint file.
+	"""
+	with open(checkpointFile + '.tmp', 'w') as f:
+		json.dump(checkpoint, f)
+	os.replace(checkpointFile + '.tmp', checkpointFile)
+
+def fileTableName(fileName):
+	return fileName.replace('.', '_').replace(' ', '_').replace('(','_').replace(')','_').replace('-','_')
+
+## =================================================================> User Dialog and inputs:
+
+def main():
+	print('\033c')
+	print('        ***** Automation ETL process to load Flat file into MySQL ***** \n')
+
+	mydb = connectMySQL()
+
+	schema = mysqlDS['database']
+	mycursor = mydb.cursor()
+
+	print('   | 1) Flat file definition: ')
+	print('   | ----------------------------------------------------------------------------------- |')
+
+	filePath = input('   |- Please insert source file path > ')
+	fileName = input('   |- Insert source filename > ')
 
-	print('      >> ' + dataTotalRecords + '/' + fileTotalRecords + ' rows loaded successfuly into target table : ' + schema + '.' + tableName)
+	if len(filePath) > 0:
+		filePath
+	else:
+		filePath = os.path.abspath(os.getcwd()) + '/'
+
+	try:
+		listDirectory = os.listdir(filePath)
+	except:
+		print('\n- Error: Datasource fileName or path not exists (!) ')
+		print('Migration aboarted.  \n')
+		sys.exit()
+	else:
+		pass
+
+	if fileName not in listDirectory:
+		print('\n- Error: fileName or path not exists (!) ')
+		print('ETL process aboarted.  \n')
+		sys.exit()
+
+	## ----------->>> Source file size (rows are counted while loading):
+
+	fileNamePath = filePath + '/' + fileName
+	fileSize = os.path.getsize(fileNamePath)
+
+	print('\n   | 2) File definition: ' + fileName + ' (file size:' + str(fileSize) + ' bytes)')
+	print('   | ----------------------------------------------------------------------------------- |')
+
+	header =input('   |- Set first row as header (Y/N) > ').upper()
+	if header != 'Y':
+		header='N'
+
+	fieldDelimiter = input('   |- Insert fields delimiter character ([,] - defualt) > ')
+	if fieldDelimiter is None or len(fieldDelimiter) == 0:
+		fieldDelimiter = ','
+
+	fieldTermmination = input('   |- Insert field values delimiter character (["] - defualt) > ')
+	if fieldTermmination is None or len(fieldTermmination) == 0:
+		fieldTermmination = '"'
+
+	limit = input('   |- Inser rows limit (0-no limit) > ')
+	try:
+		int(limit)
+	except:
+		limit = 0
+
+	limit = int(limit)
+
+	sampleRows = input('   |- Rows sampled to infer column types (0 - varchar(255)) ([' + str(SAMPLE_ROWS) + '] - defualt) > ')
+	sampleRows = int(sampleRows) if sampleRows.isdigit() else SAMPLE_ROWS
+
+	print('\n   | 3) Target table definition: ' + fileName + ' (file size:' + str(fileSize) + ' bytes)')
+	print('   | ----------------------------------------------------------------------------------- |')
+
+	createTargetTable = str(input('   |- Create target table ? (Y/N) > '))
+	if createTargetTable.upper() == 'Y':
+		tableName =   str(input('   |-                 Enter table name > ').upper()).\
+										  replace('.', '_').replace(' ', '_').replace('(','_').\
+										  replace(')','_').replace('-','_').replace('\ufeff', '')
+
+	else:
+		tableName = fileTableName(fileName)
+
+	print(' --------------------------------->>>> ' + tableName)
+
+	checkpointFile = checkpointPath(fileNamePath, schema, tableName)
+	checkpoint = readCheckpoint(checkpointFile, fileSize)
+	if checkpoint:
+		resumeLoad = input('   |- Resume interrupted load (' + str(checkpoint['rowsCommitted']) + ' rows commited) (Y/N) > ').upper()
+		if resumeLoad != 'Y':
+			checkpoint = None
+
+	if checkpoint:
+		truncateTargetTable='N'
+	else:
+		truncateTargetTable = input('   |- Truncate target table (Y/N) > ').upper()
+		if truncateTargetTable.upper() != 'Y':
+			truncateTargetTable='N'
+
+	bulkLoadMode = input('   |- Bulk load with LOAD DATA LOCAL INFILE (Y/N) ([Y] - defualt) > ').upper()
+	if bulkLoadMode != 'N':
+		bulkLoadMode='Y'
+
+	insertBatchRows = input('   |- Rows per Insert statement ([' + str(INSERT_BATCH_ROWS) + '] - defualt) > ')
+	insertBatchRows = int(insertBatchRows) if insertBatchRows.isdigit() and int(insertBatchRows) > 0 else INSERT_BATCH_ROWS
+
+	commitRows = input('   |- Commit every N rows ([' + str(COMMIT_ROWS) + '] - defualt) > ')
+	commitRows = int(commitRows) if commitRows.isdigit() and int(commitRows) > 0 else COMMIT_ROWS
+
+	deferIndexesMode = input('   |- Drop secondary indexes during the load, built after it (Y/N) > ').upper()
+	if deferIndexesMode != 'Y':
+		deferIndexesMode='N'
+
+	indexColumns = input('   |- Columns to index after the load (comma separated, empty - none) > ')
+	indexColumns = [column.strip() for column in indexColumns.split(',') if column.strip()]
+
+	workers = 1
+	if not checkpoint and limit == 0:
+		workers = input('   |- Parallel workers, without checkpoints ([1] - defualt, ' + str(os.cpu_count()) + ' CPUs) > ')
+		workers = min(int(workers), PARALLEL_MAX_WORKERS) if workers.isdigit() and int(workers) > 0 else 1
+
+	print('\n   |- Log output details:')
+
+	###########################################################
+
+	## ----------->>> Tokenize the file lines into rows, limited to the first limit rows
+
+	startOffset = checkpoint['byteOffset'] if checkpoint else 0
+	position = {'blockOffset': startOffset, 'rowsBefore': 0}
+	rows = tokenize(readBlocks(fileNamePath, startOffset), fieldDelimiter, fieldTermmination, position)
+
+	## ----------->>> Generate Header Columns (first row only)
+
+	if checkpoint:
+		firstRow = next(tokenize(readBlocks(fileNamePath), fieldDelimiter, fieldTermmination), [])
+		# skip the rows of the checkpoint block already commited
+		streamRowsBefore = checkpoint['rowsToSkip']
+		for skippedRow in islice(rows, streamRowsBefore):
+			pass
+		resumedRows = checkpoint['rowsCommitted']
+	else:
+		firstRow = next(rows, [])
+		streamRowsBefore = 1 if header.upper()=='Y' else 0
+		resumedRows = 0
+
+	if header.upper()=='Y':
+		tableHeaderInsert = headerColumns(firstRow)
+	else:
+		tableHeaderInsert = ['field' + str(i+1) for i in range(len(firstRow))]
+		if not checkpoint:
+			# the first row is data
+			rows = chain([firstRow], rows)
+
+	## ----------->>> Column types of the sampled rows (a stream of its own)
+
+	if sampleRows > 0:
+		sampleSkip = 1 if header.upper()=='Y' else 0
+		sample = islice(tokenize(readBlocks(fileNamePath), fieldDelimiter, fieldTermmination), sampleSkip, sampleSkip + sampleRows)
+		columnTypes, nullColumns = inferColumnTypes(iterRows(sample, len(tableHeaderInsert)), len(tableHeaderInsert))
+	else:
+		columnTypes, nullColumns = ['varchar(255)'] * len(tableHeaderInsert), []
+
+	tableHeader = [field + ' ' + columnType for field, columnType in zip(tableHeaderInsert, columnTypes)]
+
+	newIndexes = []
+	for column in indexColumns:
+		if column not in tableHeaderInsert:
+			print('      >> Index column ' + column + ' is not in the header, skipped')
+			continue
+		newIndexes.append('Index `idx_' + column[:60] + '` (' + indexColumn(column, columnTypes[tableHeaderInsert.index(column)]) + ')')
+
+	dataRows = iterRows(rows, len(tableHeader), nullColumns)
+	if limit > 0:
+		dataRows = islice(dataRows, max(limit - resumedRows, 0))
+
+	def saveCheckpoint(rowsLoaded):
+		# rows read from the stream up to the last commit, counted from the start of their block
+		streamRows = streamRowsBefore + rowsLoaded
+		writeCheckpoint(checkpointFile, {
+			'fileSize': fileSize,
+			'byteOffset': position['blockOffset'],
+			'rowsToSkip': streamRows - position['rowsBefore'],
+			'rowsCommitted': resumedRows + rowsLoaded,
+		})
+
+	## =================================================================> SQL Create statment (DLL)
+
+	createSQLState = 'Create Table If Not Exists ' + schema + '.' + tableName + ' (\n' + ',\n'.join(tableHeader) + ');'
+
+	###print('\n' + createSQLState )
+
+	try:
+		mycursor.execute(createSQLState)
+	except:
+		print('      >> Error: failed to create table name:' + schema + '.' + tableName)
+		print('\n', createSQLState)
+		print('      >> Process aborted.')
+		sys.exit(0)
+	else:
+		print('      >> Target table: ' + schema + '.' + tableName + ' replaced or created.')
+
+
+	## =================================================================> Truncate Target table SQL statment (DDL)
+
+	if truncateTargetTable.upper() == 'Y':
+		truncateSQLState = 'Truncate Table ' + schema + '.' + tableName +';'
+		print('      >> ' + truncateSQLState )
+		mycursor = mydb.cursor()
+		mycursor.execute(truncateSQLState)
+
+	## =================================================================> INSERT INTO / LOAD DATA
+
+	loadStarted = time.time()
+	warningsCount = 0
+
+	if checkpoint:
+		print('      >> Resuming after ' + str(resumedRows) + ' commited rows (byte offset ' + str(startOffset) + ')')
+
+	if bulkLoadMode == 'Y' and not localInfileAllowed(mydb, schema, tableName, tableHeaderInsert):
+		bulkLoadMode = 'N'
+
+	## ----------->>> Secondary indexes are saved next to the checkpoint until they are built again
+
+	indexesFile = indexesCheckpointPath(checkpointFile)
+	droppedIndexes = readIndexesCheckpoint(indexesFile)
+	if droppedIndexes:
+		print('      >> ' + str(len(droppedIndexes)) + ' secondary indexes dropped by an interrupted load are built after this one')
+
+	def saveDroppedIndexes(indexDefinitions):
+		writeCheckpoint(indexesFile, droppedIndexes + indexDefinitions)
+
+	if deferIndexesMode == 'Y':
+		droppedIndexes += deferIndexes(mydb, schema, tableName, saveDroppedIndexes)
+
+	loadCompleted = False
+	try:
+		rangeSummaries = []
+		if workers > 1:
+			# data records start after the header record
+			dataOffset = recordBoundaries(fileNamePath, [0], fieldTermmination)[0] if header.upper()=='Y' else 0
+			rangeSummaries = loadParallel(fileNamePath, dataOffset, workers, fieldDelimiter, fieldTermmination, schema, tableName,
+										  tableHeaderInsert, nullColumns, bulkLoadMode, insertBatchRows, commitRows, sampleRows > 0)
+			rowsRead = sum(summary['rowsRead'] for summary in rangeSummaries)
+			rowsLoaded = sum(summary['rows'] for summary in rangeSummaries)
+			warningsCount = sum(summary['warnings'] for summary in rangeSummaries)
+			failedRanges = [summary for summary in rangeSummaries if summary['error']]
+			if failedRanges:
+				print('      >> Error: ' + str(len(failedRanges)) + ' ranges failed, their rows after the last commit were not loaded (see the summary)')
+		else:
+			try:
+				if bulkLoadMode == 'Y':
+					print('      >> Bulk loading source data file into target table...')
+					rowsRead, rowsLoaded, warningsCount = bulkLoad(mydb, schema, tableName, tableHeaderInsert, iterBatches(dataRows), saveCheckpoint,
+																   inferredTypes=sampleRows > 0)
+				else:
+					print('      >> Inserting source data file into target table...')
+					rowsRead = rowsLoaded = loadBatches(mydb, schema, tableName, tableHeaderInsert, iterBatches(dataRows, insertBatchRows), commitRows, saveCheckpoint)
+			except LoadError as e:
+				print('      >> Error: ' + e.message)
+
+				print('>>>>>>>>> rows ' + str(resumedRows + e.firstRow) + ' to ' + str(resumedRows + e.lastRow))
+
+				for row in e.sampleRows:
+						print(row)
+
+				print('      >> ' + str(resumedRows + e.rowsCommitted) + ' rows commited, run again to resume from the checkpoint.')
+				print('      >> Process aborted.')
+				sys.exit(0)
+			except ValueError as e:
+				print('      >> Error: ' + str(e))
+				print('      >> Process aborted.')
+				sys.exit(0)
+
+			# the load is complete, nothing to resume
+			if os.path.exists(checkpointFile):
+				os.remove(checkpointFile)
+
+		loadSeconds = time.time() - loadStarted
+		loadCompleted = workers == 1 or not failedRanges
+	finally:
+
+		## =================================================================> Secondary indexes, built over the loaded rows
+		# also when the load failed or was interrupted, the new indexes only after a complete load
+
+		indexDefinitions = droppedIndexes + (newIndexes if loadCompleted else [])
+		if deferIndexesMode == 'Y' or indexDefinitions:
+			failedIndexes = buildIndexes(mydb, schema, tableName, indexDefinitions)
+			failedDropped = [definition for definition in failedIndexes if definition in droppedIndexes]
+			if failedDropped:
+				writeCheckpoint(indexesFile, failedDropped)
+				print('      >> ' + str(len(failedDropped)) + ' dropped indexes are not built, saved in ' + indexesFile + ', run again to build them')
+			elif os.path.exists(indexesFile):
+				os.remove(indexesFile)
+
+	dataTotalRecords = str(resumedRows + rowsLoaded)
+	fileTotalRecords = str(resumedRows + rowsRead + (1 if header == 'Y' else 0))
+	rowsSkipped = rowsRead - rowsLoaded
+
+	if loadCompleted:
+		print('      >> ' + dataTotalRecords + '/' + fileTotalRecords + ' rows loaded successfuly into target table : ' + schema + '.' + tableName)
+	else:
+		print('      >> Error: load incomplete, ' + dataTotalRecords + '/' + fileTotalRecords + ' rows loaded into target table : ' + schema + '.' + tableName)
+	if rowsSkipped:
+		print('      >> ' + str(rowsSkipped) + ' rows skipped by LOAD DATA (duplicate keys, invalid values - see the warnings)')
 	print('      >> ' + dataTotalRecords + ' rows commited. ')
 	print('\n')
 	print('               |                              Summary                                               |')
 	print('               | ---------------------------------------------------------------------------------- |')
 	print('               |   Source file location: ' + filePath + fileName )
-	print('               |   Total record in file: ' + fileTotalRecords)
+	print('               |   Total record read from file: ' + fileTotalRecords)
 	print('               |   Header row: ' + header)
 	print('               |   ')
 	print('               |   Target table: ' + schema + '.' + tableName)
 	print('               |   Total Inserted rows: ' + dataTotalRecords)
+	print('               |   Skipped rows: ' + str(rowsSkipped))
+	print('               |   Load mode: ' + ('LOAD DATA LOCAL INFILE' if bulkLoadMode == 'Y' else 'Insert'))
+	print('               |   Load time: ' + str(round(loadSeconds, 1)) + ' sec (' + str(int(rowsRead / max(loadSeconds, 0.001))) + ' rows/sec)')
+	if checkpoint:
+		print('               |   Resumed after rows: ' + str(resumedRows))
+	if rangeSummaries:
+		print('               |   Parallel workers: ' + str(workers) + ' (' + str(len(rangeSummaries)) + ' ranges)')
+		for summary in rangeSummaries:
+			print('               |     bytes ' + str(summary['startOffset']) + '-' + str(summary['endOffset']) + ': ' +
+				  str(summary['rows']) + ' rows' + (' (' + str(summary['rowsRead'] - summary['rows']) + ' skipped)' if summary['rowsRead'] > summary['rows'] else '') +
+				  ', ' + str(summary.get('seconds', 0)) + ' sec' +
+				  (', error: ' + summary['error'] if summary['error'] else ''))
+		print('               |   Failed ranges: ' + str(len([summary for summary in rangeSummaries if summary['error']])))
+	print('               |   Column types: ' + ', '.join(sorted(set(columnTypes))) + (' (' + str(sampleRows) + ' sampled rows)' if sampleRows > 0 else ''))
+	if droppedIndexes or newIndexes:
+		print('               |   Indexes built after the load: ' + str(len(droppedIndexes)) + ' dropped, ' + str(len(newIndexes)) + ' new')
+	print('               |   Warnings: ' + str(warningsCount))
 	print('               | ---------------------------------------------------------------------------------- |')
 
+
+## =================================================================> Batch mode:
+
+BATCH_OPTIONS = ('table', 'header', 'delimiter', 'quote', 'limit', 'truncate', 'bulk', 'sampleRows', 'insertRows', 'commitRows')
+
+workerDB = None
+
+
+def initBatchWorker():
+	"""
+	Batch worker process: one connection for all the files it loads.
+	"""
+	global workerDB
+	try:
+		workerDB = mysql.connector.connect(allow_local_infile = True, **mysqlDS)
+	except mysql.connector.Error as e:
+		workerDB = e
+
+
+def loadFile(fileNamePath, table=None, header=True, delimiter=',', quote='"', limit=0, truncate=False, bulk=True,
+			 sampleRows=SAMPLE_ROWS, insertRows=INSERT_BATCH_ROWS, commitRows=COMMIT_ROWS):
+	"""
+	Batch worker: create / truncate the table of the file and load it over the worker connection,
+	without dialog, checkpoints or printed report.
+
+	Returns the file summary (rows, bytes, seconds, rows/sec and the error if the load failed)
+	"""
+	started = time.time()
+	schema = mysqlDS['database']
+	tableName = table or fileTableName(os.path.basename(fileNamePath))
+	summary = {'file': fileNamePath, 'table': str(schema) + '.' + tableName, 'bytes': 0, 'rows': 0, 'skippedRows': 0,
+			   'seconds': 0, 'rowsPerSecond': 0, 'warnings': 0, 'loadMode': 'LOAD DATA LOCAL INFILE' if bulk else 'Insert', 'error': None}
+	if isinstance(workerDB, Exception):
+		summary['error'] = 'failed to connect: ' + str(workerDB)
+		return summary
+	mydb = workerDB
+
+	try:
+		summary['bytes'] = os.path.getsize(fileNamePath)
+		rows = tokenize(readBlocks(fileNamePath), delimiter, quote)
+		firstRow = next(rows, [])
+		if header:
+			columns = headerColumns(firstRow)
+		else:
+			columns = ['field' + str(i+1) for i in range(len(firstRow))]
+			rows = chain([firstRow], rows)
+
+		if sampleRows > 0:
+			sample = islice(tokenize(readBlocks(fileNamePath), delimiter, quote), 1 if header else 0, (1 if header else 0) + sampleRows)
+			columnTypes, nullColumns = inferColumnTypes(iterRows(sample, len(columns)), len(columns))
+		else:
+			columnTypes, nullColumns = ['varchar(255)'] * len(columns), []
+
+		mycursor = mydb.cursor()
+		mycursor.execute('Create Table If Not Exists ' + schema + '.' + tableName + ' (\n' +
+						 ',\n'.join([column + ' ' + columnType for column, columnType in zip(columns, columnTypes)]) + ');')
+		if truncate:
+			mycursor.execute('Truncate Table ' + schema + '.' + tableName + ';')
+
+		dataRows = iterRows(rows, len(columns), nullColumns)
+		if limit > 0:
+			dataRows = islice(dataRows, limit)
+
+		if bulk and localInfileAllowed(mydb, schema, tableName, columns):
+			rowsRead, summary['rows'], summary['warnings'] = bulkLoad(mydb, schema, tableName, columns, iterBatches(dataRows), progress=False,
+																	  inferredTypes=sampleRows > 0)
+			summary['skippedRows'] = rowsRead - summary['rows']
+		else:
+			summary['loadMode'] = 'Insert'
+			summary['rows'] = loadBatches(mydb, schema, tableName, columns, iterBatches(dataRows, insertRows), commitRows, progress=False)
+	except LoadError as e:
+		summary['rows'] = e.rowsCommitted
+		summary['error'] = e.message + ' (rows ' + str(e.firstRow) + ' to ' + str(e.lastRow) + ')'
+	except (mysql.connector.Error, OSError, csv.Error, ValueError) as e:
+		summary['error'] = str(e)
+
+	summary['seconds'] = round(time.time() - started, 1)
+	summary['rowsPerSecond'] = int(summary['rows'] / max(time.time() - started, 0.001))
+	return summary
+
+
+def batchFiles(args):
+	"""
+	Files to load with their options: the manifest entries (their keys override the
+	command line options) or the files of the glob pattern.
+	"""
+	defaults = {'header': args.header, 'delimiter': args.delimiter, 'quote': args.quote, 'limit': args.limit,
+				'truncate': args.truncate, 'bulk': not args.insert, 'sampleRows': args.sample_rows,
+				'insertRows': args.insert_rows, 'commitRows': args.commit_rows}
+	if args.manifest:
+		with open(args.manifest) as f:
+			entries = json.load(f)
+	else:
+		entries = [{'file': fileNamePath} for fileNamePath in sorted(glob.glob(args.glob)) if os.path.isfile(fileNamePath)]
+
+	files = []
+	for entry in entries:
+		unknown = set(entry) - set(BATCH_OPTIONS) - {'file'}
+		if unknown:
+			sys.exit('- Error: unknown manifest options ' + ', '.join(sorted(unknown)) + ' for ' + str(entry.get('file')))
+		options = dict(defaults)
+		options.update(entry)
+		files.append((options.pop('file'), options))
+	return files
+
+
+def tableGroups(files):
+	"""
+	Files grouped by target table, in file order: the files of a table are loaded one after the
+	other by the same worker, and the table is truncated (when any of them asks for it) before the
+	first one only.
+	"""
+	groups = {}
+	for fileNamePath, options in files:
+		tableName = options.get('table') or fileTableName(os.path.basename(fileNamePath))
+		groups.setdefault(tableName.lower(), []).append((fileNamePath, options))
+	for group in groups.values():
+		truncate = any(options['truncate'] for fileNamePath, options in group)
+		for i, (fileNamePath, options) in enumerate(group):
+			options['truncate'] = truncate and i == 0
+	return list(groups.values())
+
+
+def loadFiles(files):
+	"""
+	Batch worker: load the files of one target table one after the other.
+
+	Returns the file summaries
+	"""
+	return [loadFile(fileNamePath, **options) for fileNamePath, options in files]
+
+
+def batchMain():
+	parser = argparse.ArgumentParser(description='Load flat files into MySQL tables without dialog, on a pool of worker processes.')
+	source = parser.add_mutually_exclusive_group(required=True)
+	source.add_argument('--glob', help='source files pattern, one table per file (named after the file)')
+	source.add_argument('--manifest', help='JSON list of files with their options: ' + ', '.join(('file',) + BATCH_OPTIONS))
+	parser.add_argument('--header', action='store_true', help='first row is the header')
+	parser.add_argument('--delimiter', default=',', help='fields delimiter character ([,] - default)')
+	parser.add_argument('--quote', default='"', help='field values delimiter character (["] - default)')
+	parser.add_argument('--limit', type=int, default=0, help='rows limit per file (0 - no limit)')
+	parser.add_argument('--truncate', action='store_true', help='truncate the target tables')
+	parser.add_argument('--insert', action='store_true', help='Insert statements instead of LOAD DATA LOCAL INFILE')
+	parser.add_argument('--sample-rows', type=int, default=SAMPLE_ROWS, help='rows sampled to infer column types (0 - varchar(255))')
+	parser.add_argument('--insert-rows', type=int, default=INSERT_BATCH_ROWS, help='rows per Insert statement')
+	parser.add_argument('--commit-rows', type=int, default=COMMIT_ROWS, help='rows per Insert transaction')
+	parser.add_argument('--workers', type=int, default=4, help='tables loaded at the same time (one connection each)')
+	parser.add_argument('--summary', help='write the JSON summary to this file instead of stdout')
+	args = parser.parse_args()
+
+	files = batchFiles(args)
+	if not files:
+		sys.exit('- Error: no files to load')
+
+	groups = tableGroups(files)
+
+	started = time.time()
+	summaries = []
+	with ProcessPoolExecutor(max_workers=max(1, min(args.workers, PARALLEL_MAX_WORKERS, len(groups))), initializer=initBatchWorker) as executor:
+		futures = [executor.submit(loadFiles, group) for group in groups]
+		for future in as_completed(futures):
+			for summary in future.result():
+				summaries.append(summary)
+				print(summary['file'] + ': ' + str(summary['rows']) + ' rows, ' + str(summary['seconds']) + ' sec' +
+					  (', error: ' + summary['error'] if summary['error'] else ''), file=sys.stderr)
+
+	report = {
+		'files': sorted(summaries, key=itemgetter('file')),
+		'rows': sum(summary['rows'] for summary in summaries),
+		'skippedRows': sum(summary['skippedRows'] for summary in summaries),
+		'bytes': sum(summary['bytes'] for summary in summaries),
+		'seconds': round(time.time() - started, 1),
+		'failed': len([summary for summary in summaries if summary['error']]),
+	}
+	if args.summary:
+		with open(args.summary, 'w') as f:
+			json.dump(report, f, indent=2)
+	else:
+		print(json.dumps(report, indent=2))
+	sys.exit(1 if report['failed'] else 0)
+
+
+if __name__ == '__main__':
+	if len(sys.argv) > 1:
+		batchMain()
+	else:
+		main()
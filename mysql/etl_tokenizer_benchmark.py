@@ -0,0 +1,113 @@
+#!/usr/bin/python
+#
+#   ---- Benchmark: csv module tokenizer vs the legacy per-character loop of etl_text_file_to_mysql ----
+#
+# Generates synthetic flat files, plain and with quoted values (delimiters and embedded quotes),
+# and reports the CPU seconds per GB of both parsers, each reading the file the way its ETL does.
+#
+# Usage: python etl_tokenizer_benchmark.py [--size-mb 100] [--delimiter ,] [--profiles plain quoted]
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from etl_text_file_to_mysql import readBlocks, tokenize, iterRows
+
+COLUMNS = 12
+
+
+def legacyParseLine(line, delimier, fieldTermmination):
+	"""
+	The per-character loop etl_text_file_to_mysql used before the csv tokenizer.
+	"""
+	cnt = 0
+	val = ''
+	rowData = []
+	for l in line:
+		if l == '"':
+			if cnt==1:
+				cnt=0
+			else:
+				cnt+=1
+		if l != delimier:
+			val+=l
+		else:
+			if cnt ==0:
+				if fieldTermmination is not None or len(fieldTermmination) > 0:
+					val = val.replace(fieldTermmination, '')
+				rowData.append(val)
+				val=''
+	rowData.append(val)
+	return rowData
+
+
+def generateFile(fileNamePath, sizeBytes, delimier, quoted):
+	"""
+	Synthetic rows of numbers and words, with quoted values holding delimiters and embedded quotes when quoted.
+	"""
+	random.seed(0)
+	words = ['alpha', 'beta', 'gamma', 'delta', 'Tel Aviv', 'New York', 'x' * 40]
+	written = 0
+	with open(fileNamePath, 'w', encoding='utf-8') as f:
+		f.write(delimier.join('col' + str(i + 1) for i in range(COLUMNS)) + '\n')
+		while written < sizeBytes:
+			row = []
+			for i in range(COLUMNS):
+				kind = i % 4
+				if kind == 0:
+					row.append(str(random.randint(0, 10 ** 9)))
+				elif kind == 1:
+					row.append(str(round(random.random() * 1000, 4)))
+				elif kind == 2 or not quoted:
+					row.append(random.choice(words))
+				else:
+					row.append('"' + random.choice(words) + delimier + ' ""quoted""' + '"')
+			line = delimier.join(row) + '\n'
+			f.write(line)
+			written += len(line)
+
+
+def cpuSeconds(parse):
+	started = time.process_time()
+	rows = 0
+	for _ in parse():
+		rows += 1
+	return time.process_time() - started, rows
+
+
+def main():
+	parser = argparse.ArgumentParser(description='csv tokenizer vs legacy loop benchmark')
+	parser.add_argument('--size-mb', type=int, default=100)
+	parser.add_argument('--delimiter', default=',')
+	parser.add_argument('--profiles', nargs='+', choices=['plain', 'quoted'], default=['plain', 'quoted'],
+						help='plain: no quoted values (str.split path), quoted: 1 in 4 values quoted (csv path)')
+	args = parser.parse_args()
+
+	for profile in args.profiles:
+		fileNamePath = os.path.join(tempfile.mkdtemp(prefix='etl_tokenizer_benchmark_'), profile + '.csv')
+		generateFile(fileNamePath, args.size_mb * 1024 * 1024, args.delimiter, profile == 'quoted')
+		fileGB = os.path.getsize(fileNamePath) / 1024 ** 3
+
+		def legacy():
+			for line in open(fileNamePath, 'r', encoding='utf-8', errors='ignore').read().splitlines():
+				rowData = legacyParseLine(line, args.delimiter, '')
+				rowData.extend([''] * (COLUMNS - len(rowData)))
+				yield rowData
+
+		def tokenizer():
+			return iterRows(tokenize(readBlocks(fileNamePath), args.delimiter, '"'), COLUMNS)
+
+		legacySeconds, legacyRows = cpuSeconds(legacy)
+		tokenizerSeconds, tokenizerRows = cpuSeconds(tokenizer)
+
+		print('   | ' + profile + ' file: ' + str(round(fileGB * 1024, 1)) + ' MB, ' + str(tokenizerRows) + ' rows')
+		print('   |   Legacy loop:   ' + str(round(legacySeconds / fileGB, 1)) + ' CPU seconds/GB (' + str(legacyRows) + ' rows)')
+		print('   |   Tokenizer:     ' + str(round(tokenizerSeconds / fileGB, 1)) + ' CPU seconds/GB (' + str(tokenizerRows) + ' rows)')
+		print('   |   Speedup:       ' + str(round(legacySeconds / tokenizerSeconds, 1)) + 'x')
+
+		os.remove(fileNamePath)
+
+if __name__ == '__main__':
+	main()
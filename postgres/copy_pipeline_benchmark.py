@@ -0,0 +1,114 @@
+"""
+Benchmark: batched COPY of load_csv_to_table, sequential (one COPY and commit per batch)
+vs the batches streamed into one COPY and commit per commit_rows rows.
+
+Loads a synthetic DataFrame into a table of a local Postgres (POSTGRES_DB_* env vars), created and
+dropped by the run (a logged table: temporary tables skip the WAL and hide the commit cost), and
+reports the median rows/sec of each variant.
+
+Usage: python copy_pipeline_benchmark.py [--rows 1000000] [--batch-size 10000] [--commit-rows 100000 0] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from io import StringIO
+
+import pandas as pd
+import psycopg2
+
+from load_csv_to_table import _copy_csv_to_table
+
+TABLE_NAME = 'copy_pipeline_benchmark'
+
+
+def _legacy_copy_csv_to_table(df, table_name, conn, batch_size=10000, schema='public'):
+    """
+    The sequential loop _copy_csv_to_table used before the pipeline
+    """
+    cur = conn.cursor()
+    total_rows = len(df)
+
+    for start_idx in range(0, total_rows, batch_size):
+        end_idx = min(start_idx + batch_size, total_rows)
+        batch_df = df.iloc[start_idx:end_idx]
+
+        output = StringIO()
+        batch_df.to_csv(output, sep=',', header=False, index=False)
+        output.seek(0)
+
+        cur.copy_expert(f"COPY {schema}.{table_name} FROM STDIN WITH (FORMAT CSV)", output)
+        conn.commit()
+
+
+def _generate_dataframe(rows):
+    random.seed(0)
+    cities = ['Tel Aviv', 'New York', 'London', 'Paris, "Centre"', 'Berlin']
+    return pd.DataFrame({
+        'id': range(1, rows + 1),
+        'city': [random.choice(cities) for _ in range(rows)],
+        'year': [random.randint(1990, 2025) for _ in range(rows)],
+        'price': [round(random.random() * 10 ** 6, 2) for _ in range(rows)],
+        'note': ['x' * random.randint(0, 60) for _ in range(rows)],
+    })
+
+
+def _timed_load(conn, load, repeat):
+    """
+    Returns the median seconds of the load and the rows loaded
+    """
+    cur = conn.cursor()
+    runs = []
+    for _ in range(repeat):
+        cur.execute(f'TRUNCATE public.{TABLE_NAME}')
+        conn.commit()
+        started = time.perf_counter()
+        load()
+        runs.append(time.perf_counter() - started)
+    cur.execute(f'SELECT count(*) FROM public.{TABLE_NAME}')
+    return statistics.median(runs), cur.fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='sequential vs pipelined batched COPY benchmark')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--commit-rows', type=int, nargs='+', default=[100000, 0], help='0 - one transaction')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per variant, the median is reported')
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(
+        host=os.getenv('POSTGRES_DB_HOST', 'localhost'),
+        port=os.getenv('POSTGRES_DB_PORT', '5432'),
+        database=os.getenv('POSTGRES_DB_NAME'),
+        user=os.getenv('POSTGRES_DB_USER'),
+        password=os.getenv('POSTGRES_DB_PASSWORD')
+    )
+    cur = conn.cursor()
+    cur.execute(f'CREATE TABLE public.{TABLE_NAME} (id int, city text, year int, price float, note text)')
+    conn.commit()
+
+    df = _generate_dataframe(args.rows)
+    print(f'   | {len(df)} rows, batches of {args.batch_size} rows')
+
+    try:
+        seconds, rows = _timed_load(conn, lambda: _legacy_copy_csv_to_table(df, TABLE_NAME, conn, args.batch_size), args.repeat)
+        legacy_rate = rows / seconds
+        print('   |   Sequential (commit per batch):'.ljust(46) + f'{int(legacy_rate)} rows/sec ({round(seconds, 1)} sec)')
+
+        for commit_rows in args.commit_rows:
+            seconds, rows = _timed_load(conn, lambda: _copy_csv_to_table(
+                df, TABLE_NAME, conn, args.batch_size, commit_rows=commit_rows), args.repeat)
+            commits = f'commit per {commit_rows} rows' if commit_rows else 'one commit'
+            print(f'   |   Streamed ({commits}):'.ljust(46) +
+                  f'{int(rows / seconds)} rows/sec ({round(seconds, 1)} sec), {round(rows / seconds / legacy_rate, 2)}x')
+    finally:
+        conn.rollback()
+        cur.execute(f'DROP TABLE public.{TABLE_NAME}')
+        conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
 import pandas as pd
+import csv
+import io
 from io import StringIO
+from itertools import chain, count, islice
 import psycopg2
 import os
 
 
 MAPPING_DF_TO_PG_FIELDS = {'int64': 'int', 'object' : 'text', 'float64': 'float'}
+CHUNK_ROWS = 10000           # csv rows parsed per chunk of the COPY stream
+COPY_READ_SIZE = 1024 * 1024  # bytes copy_expert reads from the stream per call
+COMMIT_ROWS = 100000         # rows per COPY transaction of _copy_csv_to_table (0 - one transaction)
 
 
 def _load_csv_to_dataframe(csv_filepath):
@@ -15,7 +21,7 @@ def _load_csv_to_dataframe(csv_filepath):
 
 
         # Trim spaces from all string columns
-        df = df.apply(lambda x: x.str.strip() if x.dtype == "object" else x)
+        df = df.apply(lambda x: x.str.strip() if pd.api.types.is_string_dtype(x.dtype) else x)
 
         return df
     except Exception as err:
@@ -23,49 +29,126 @@ def _load_csv_to_dataframe(csv_filepath):
         print(err)
 
 
-def _copy_csv_to_table(df, table_name, conn, batch_size=10000, schema='public'):
+def _encode_batch(df, start_idx, batch_size):
+    output = StringIO()
+    df.iloc[start_idx:start_idx + batch_size].to_csv(output, sep=',', header=False, index=False)
+    return output.getvalue()
+
+
+def _copy_csv_to_table(df, table_name, conn, batch_size=10000, schema='public', commit_rows=COMMIT_ROWS):
     """
-    Copy data in batches for large datasets
+    Copy data in batches for large datasets: the batches are serialized as the COPY reads them,
+    one COPY and commit per commit_rows rows instead of one per batch
     """
     cur = conn.cursor()
-    try:
-        # cur = conn.cursor()
-        total_rows = len(df)
-
-        for start_idx in range(0, total_rows, batch_size):
-            end_idx = min(start_idx + batch_size, total_rows)
-            batch_df = df.iloc[start_idx:end_idx]
-
-            output = StringIO()
-            batch_df.to_csv(output, sep=',', header=False, index=False)
-            output.seek(0)
+    total_rows = len(df)
+    commit_size = max(batch_size, commit_rows - commit_rows % batch_size) if commit_rows else max(total_rows, 1)
 
+    try:
+        for commit_idx in range(0, total_rows, commit_size):
+            end_idx = min(commit_idx + commit_size, total_rows)
+            batches = (_encode_batch(df, start_idx, min(batch_size, end_idx - start_idx))
+                       for start_idx in range(commit_idx, end_idx, batch_size))
             cur.copy_expert(
                 f"""
                 COPY {schema}.{table_name} FROM STDIN WITH (
                     FORMAT CSV
                 )
                 """,
-                output
+                _ChunksReader(batches),
+                size=COPY_READ_SIZE
             )
 
             conn.commit()
-            print(f"Loaded rows {start_idx} to {end_idx}")
+            print(f"Loaded rows {commit_idx} to {commit_idx + cur.rowcount}")
     except Exception as e:
+        conn.rollback()
         print(e)
 
 
-def load_dataframe_to_postgres(csv_filepath, table_name, conn):
-    df = _load_csv_to_dataframe(csv_filepath)
-    print(df)
+class _ChunksReader(io.TextIOBase):
+    """
+    Read-only file object over an iterator of strings, so COPY pulls the chunks as they are produced
+    """
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._chunk = ''
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        parts = []
+        while size != 0:
+            if self._pos >= len(self._chunk):
+                self._chunk = next(self._chunks, '')
+                self._pos = 0
+                if not self._chunk:
+                    break
+            end = len(self._chunk) if size < 0 else self._pos + size
+            part = self._chunk[self._pos:end]
+            self._pos += len(part)
+            parts.append(part)
+            if size > 0:
+                size -= len(part)
+        return ''.join(parts)
+
+
+def _csv_rows(reader, width):
+    """
+    The csv rows padded to the header width (missing values load as NULL, like pd.read_csv does),
+    blank lines skipped
+    """
+    for row in reader:
+        if not row:
+            continue
+        if len(row) > width:
+            raise ValueError(f"Expected {width} fields in line {reader.line_num}, saw {len(row)}")
+        if len(row) < width:
+            row += [''] * (width - len(row))
+        yield row
+
+
+def _iter_csv_chunks(csv_filepath, chunk_rows=CHUNK_ROWS):
+    """
+    Stream the csv rows (without the header) as COPY CSV text chunks of chunk_rows rows,
+    with the sequential id first and the values trimmed
+    """
+    ids = count(1)
+    total_rows = 0
+    with open(csv_filepath, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(filter(None, reader), [])
+        rows_iter = _csv_rows(reader, len(header))
+        while True:
+            rows = list(islice(rows_iter, chunk_rows))
+            if not rows:
+                return
+            output = StringIO()
+            writer = csv.writer(output, lineterminator='\n')
+            writer.writerows(chain((next(ids),), map(str.strip, row)) for row in rows)
+            yield output.getvalue()
+            total_rows += len(rows)
+            print(f"Streamed rows {total_rows - len(rows)} to {total_rows}")
+
 
+def _create_table_query(table_name, dtypes):
     schema = []
-    for col, dtype in df.dtypes.items():
+    for col, dtype in dtypes.items():
         column = col.replace(' ', '_').lower()
         field_type = MAPPING_DF_TO_PG_FIELDS[str(dtype)] if str(dtype) in MAPPING_DF_TO_PG_FIELDS else dtype
         schema.append(f"{column} {field_type}")
 
-    query_create_table = f'CREATE TABLE {table_name} ({', '.join(schema)})'
+    columns = ', '.join(schema)
+    return f'CREATE TABLE {table_name} ({columns})'
+
+
+def load_dataframe_to_postgres(csv_filepath, table_name, conn):
+    df = _load_csv_to_dataframe(csv_filepath)
+    print(df)
+
+    query_create_table = _create_table_query(table_name, df.dtypes)
     print(query_create_table)
 
     db_connection = psycopg2.connect(**conn)
@@ -75,6 +158,38 @@ def load_dataframe_to_postgres(csv_filepath, table_name, conn):
     cur.close()
 
 
+def load_csv_to_postgres(csv_filepath, table_name, conn, schema='sbp', chunk_rows=CHUNK_ROWS):
+    """
+    Streaming load: the csv chunks (id added, values trimmed) feed one COPY ... FROM STDIN,
+    memory is bounded by chunk_rows and the column types come from the first chunk only
+    """
+    first_chunk = pd.read_csv(csv_filepath, header=0, nrows=chunk_rows)
+    first_chunk.insert(0, 'id', range(1, len(first_chunk) + 1))
+
+    query_create_table = _create_table_query(table_name, first_chunk.dtypes)
+    print(query_create_table)
+
+    db_connection = psycopg2.connect(**conn)
+    cur = db_connection.cursor()
+    try:
+        cur.copy_expert(
+            f"""
+            COPY {schema}.{table_name} FROM STDIN WITH (
+                FORMAT CSV
+            )
+            """,
+            _ChunksReader(_iter_csv_chunks(csv_filepath, chunk_rows)),
+            size=COPY_READ_SIZE
+        )
+        db_connection.commit()
+        print(f"Loaded {cur.rowcount} rows")
+    except Exception as e:
+        db_connection.rollback()
+        print(e)
+    finally:
+        cur.close()
+
+
 
 
 
@@ -96,5 +211,5 @@ if __name__ == "__main__":
     csv_path = ''
     table_name = ''
 
-    load_dataframe_to_postgres(csv_path, table_name=table_name, conn=connection_details)
+    load_csv_to_postgres(csv_path, table_name=table_name, conn=connection_details)
 
@@ -0,0 +1,54 @@
+from io import StringIO
+
+import pandas as pd
+import pytest
+
+from load_csv_to_table import _encode_batch, _iter_csv_chunks, _load_csv_to_dataframe
+
+CSV_TEXT = (
+    'city,year,price,note\n'
+    ' Tel Aviv ,2020,10.5,  first \n'
+    '\n'
+    'London,2021\n'
+    '"Paris, ""Centre""",,7,\n'
+    '\n'
+    'Berlin,2023,3.25, last\n'
+)
+
+
+def _parsed(csv_text):
+    return pd.read_csv(StringIO(csv_text), header=None)
+
+
+@pytest.fixture
+def csv_filepath(tmp_path):
+    path = tmp_path / 'rows.csv'
+    path.write_text(CSV_TEXT, encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 2, 10000])
+def test_streamed_rows_match_dataframe_path(csv_filepath, chunk_rows):
+    df = _load_csv_to_dataframe(csv_filepath)
+    streamed = ''.join(_iter_csv_chunks(csv_filepath, chunk_rows=chunk_rows))
+
+    pd.testing.assert_frame_equal(_parsed(streamed), _parsed(_encode_batch(df, 0, len(df))))
+
+
+def test_short_rows_are_padded_blank_lines_skipped(csv_filepath):
+    lines = ''.join(_iter_csv_chunks(csv_filepath)).splitlines()
+
+    assert lines == [
+        '1,Tel Aviv,2020,10.5,first',
+        '2,London,2021,,',
+        '3,"Paris, ""Centre""",,7,',
+        '4,Berlin,2023,3.25,last',
+    ]
+
+
+def test_long_row_fails_with_line_number(tmp_path):
+    path = tmp_path / 'long.csv'
+    path.write_text('a,b\n1,2\n\n3,4,5\n', encoding='utf-8')
+
+    with pytest.raises(ValueError, match='line 4'):
+        list(_iter_csv_chunks(str(path)))